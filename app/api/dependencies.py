@@ -3,8 +3,27 @@ import logging
 from functools import lru_cache
 from app.core.database import db
 from app.core.config import Config
+from app.core.health import DatabaseHealthMonitor
+from app.core.metrics import LatencyRecorder, MetricsExporter
 from app.repositories.chat import ChatRepository
 from app.repositories.business import BusinessRepository
+from app.repositories.vector import VectorRepository
+from app.repositories.source import SourceRepository
+from app.repositories.embedding import EmbeddingCacheRepository
+from app.infrastructure.ai.providers.registry import LLMClientRegistry
+from app.infrastructure.ai.embeddings import EmbeddingClient
+from app.core.notifications import NotificationListener
+from app.services.business_cache import BusinessCache
+from app.services.bot_cache import BotCache
+from app.services.context_window import ContextWindowManager
+from app.services.message_persister import MessagePersister
+from app.services.suggestions import SuggestionService
+from app.services.product_search import ProductSearchEngine
+from app.services.retrieval import RetrievalService
+from app.services.vector_index import VectorIndexManager
+from app.services.ingestion import DocumentFetcher, IngestionPipeline
+from app.services.embedding_cache import EmbeddingCache
+from app.services.response_cache import ResponseCache
 
 @lru_cache()
 def get_config() -> Config:
@@ -14,10 +33,132 @@ def get_config() -> Config:
 def logger():
     return logging.getLogger(__name__)
 
+@lru_cache()
+def get_chat_latency() -> LatencyRecorder:
+    """Per-stage timings and counters of the chat hot path; no-op unless METRICS_ENABLED"""
+    return LatencyRecorder(enabled=get_config().METRICS_ENABLED)
+
 @lru_cache()
 def get_chat_repository() -> ChatRepository:
-    return ChatRepository(db.prisma)
+    return ChatRepository(db.prisma, db)
 
 @lru_cache()
 def get_business_repository() -> BusinessRepository:
-    return BusinessRepository(db.prisma)
\ No newline at end of file
+    return BusinessRepository(db.prisma)
+
+@lru_cache()
+def get_vector_repository() -> VectorRepository:
+    return VectorRepository(db.prisma)
+
+@lru_cache()
+def get_source_repository() -> SourceRepository:
+    return SourceRepository(db.prisma)
+
+@lru_cache()
+def get_embedding_cache_repository() -> EmbeddingCacheRepository:
+    return EmbeddingCacheRepository(db.prisma)
+
+@lru_cache()
+def get_llm_client_registry() -> LLMClientRegistry:
+    return LLMClientRegistry(get_config())
+
+@lru_cache()
+def get_db_health_monitor() -> DatabaseHealthMonitor:
+    config = get_config()
+    return DatabaseHealthMonitor(
+        db,
+        interval=config.DB_HEALTH_INTERVAL,
+        timeout=config.DB_HEALTH_TIMEOUT,
+        failure_threshold=config.DB_HEALTH_FAILURE_THRESHOLD,
+    )
+
+@lru_cache()
+def get_notification_listener() -> NotificationListener:
+    return NotificationListener(get_config().DB_URL)
+
+@lru_cache()
+def get_metrics_exporter() -> MetricsExporter:
+    def cache_stats():
+        business_stats = get_business_cache().stats()
+        return {
+            "bots": get_bot_cache().stats(),
+            "businesses": business_stats["businesses"],
+            "prompts": business_stats["prompts"],
+            "facts": business_stats["facts"],
+            "product_indexes": get_product_search_engine().stats(),
+        }
+
+    config = get_config()
+    return MetricsExporter(
+        get_chat_latency(),
+        directory=config.METRICS_DIR,
+        interval=config.METRICS_EXPORT_INTERVAL,
+        caches=cache_stats,
+    )
+
+@lru_cache()
+def get_business_cache() -> BusinessCache:
+    return BusinessCache(get_business_repository(), get_config())
+
+@lru_cache()
+def get_bot_cache() -> BotCache:
+    return BotCache(get_chat_repository(), get_config())
+
+@lru_cache()
+def get_context_window_manager() -> ContextWindowManager:
+    return ContextWindowManager(get_chat_repository(), get_config())
+
+@lru_cache()
+def get_message_persister() -> MessagePersister:
+    return MessagePersister(
+        get_chat_repository(),
+        get_context_window_manager(),
+        get_config(),
+        latency=get_chat_latency(),
+    )
+
+@lru_cache()
+def get_suggestion_service() -> SuggestionService:
+    return SuggestionService()
+
+@lru_cache()
+def get_product_search_engine() -> ProductSearchEngine:
+    return ProductSearchEngine(get_business_repository(), get_config())
+
+@lru_cache()
+def get_embedding_client() -> EmbeddingClient:
+    return EmbeddingClient(
+        get_llm_client_registry(), get_config(), cache=get_embedding_cache()
+    )
+
+@lru_cache()
+def get_embedding_cache() -> EmbeddingCache:
+    return EmbeddingCache(get_embedding_cache_repository(), get_config())
+
+@lru_cache()
+def get_retrieval_service() -> RetrievalService:
+    return RetrievalService(
+        get_vector_repository(),
+        get_embedding_client(),
+        get_vector_index_manager(),
+        get_config(),
+    )
+
+@lru_cache()
+def get_vector_index_manager() -> VectorIndexManager:
+    return VectorIndexManager(get_vector_repository(), get_config())
+
+@lru_cache()
+def get_response_cache() -> ResponseCache:
+    cache = ResponseCache(get_embedding_client(), get_config(), latency=get_chat_latency())
+    get_business_cache().on_invalidate(cache.invalidate)
+    return cache
+
+def create_ingestion_pipeline(fetcher: DocumentFetcher) -> IngestionPipeline:
+    return IngestionPipeline(
+        get_source_repository(),
+        get_vector_repository(),
+        get_embedding_client(),
+        fetcher,
+        get_config(),
+    )
\ No newline at end of file
@@ -1,12 +1,11 @@
+from typing import Literal
 from fastapi import Response, Request
-from app.services.chat import ChatService
 from app.domain.requests import ChatRequest
 from fastapi.responses import StreamingResponse
 from fastapi import APIRouter, HTTPException, Body
 from app.controllers.chat import ChatController
 
 router = APIRouter()
-chat_service = ChatService()
 
 
 
@@ -28,6 +27,27 @@ async def chat(
             response=response
         )
         return StreamingResponse(streaming_response, media_type="text/event-stream")
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{bot_id}/chat/{conversation_id}/suggestions", operation_id="chat_suggestions")
+async def chat_suggestions(
+    bot_id: str,
+    conversation_id: str,
+    request: Request,
+    chat_mode: Literal["whatsapp", "web"] = "web",
+):
+    try:
+        chat_controller = ChatController()
+        return await chat_controller.handle_suggestions(
+            bot_id=bot_id,
+            conversation_id=conversation_id,
+            chat_request=ChatRequest(prompt="", chat_mode=chat_mode),
+            request=request,
+        )
     except Exception as e:
         if isinstance(e, HTTPException):
             raise e
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.controllers.metrics import MetricsController
+
+router = APIRouter()
+
+
+@router.get("", operation_id="metrics", response_class=PlainTextResponse)
+async def metrics():
+    try:
+        metrics_controller = MetricsController()
+        return PlainTextResponse(
+            await metrics_controller.handle_metrics(),
+            media_type="text/plain; version=0.0.4",
+        )
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(status_code=500, detail=str(e))
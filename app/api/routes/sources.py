@@ -0,0 +1,24 @@
+from typing import List
+from fastapi import APIRouter, BackgroundTasks, Body, HTTPException
+from app.controllers.sources import SourceController
+
+router = APIRouter()
+
+
+@router.post("/{workspace_id}/sync", operation_id="sync_sources")
+async def sync_sources(
+    workspace_id: str,
+    background_tasks: BackgroundTasks,
+    source_ids: List[str] = Body(...),
+):
+    try:
+        source_controller = SourceController()
+        return await source_controller.handle_sync(
+            workspace_id=workspace_id,
+            source_ids=source_ids,
+            background_tasks=background_tasks,
+        )
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,89 @@
+import json
+import time
+import asyncio
+from typing import Any, AsyncIterator, Dict
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder yields equivalent frames
+    orjson = None
+
+
+def encode_event(data: Dict[str, Any]) -> bytes:
+    """Serialize one chat event as a server-sent event frame"""
+    if orjson is not None:
+        return b"data: " + orjson.dumps(data) + b"\n\n"
+    return f"data: {json.dumps(data)}\n\n".encode()
+
+
+async def coalesce_tokens(
+    events: AsyncIterator[Dict[str, Any]], max_chars: int, max_delay: float
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Merge runs of `{"token": ...}` events into frames of about `max_chars`
+    characters, so the client gets a few frames per word instead of one per
+    model token. A run is flushed once it is `max_delay` seconds old, even
+    while upstream is still waiting on the model, and before any other
+    event, so actions, errors and completion keep their order relative to
+    the text. Closing the returned generator closes `events` too.
+    """
+    iterator = events.__aiter__()
+    parts = []
+    size = 0
+    deadline = 0.0
+    # Next upstream item, awaited in a task while a run is buffered so the
+    # run can be flushed when its deadline passes first
+    pending = None
+    try:
+        if max_chars <= 1:
+            async for event in iterator:
+                yield event
+            return
+
+        while True:
+            if not parts:
+                # A flush on timeout leaves the upstream read in flight
+                next_event, pending = pending or iterator.__anext__(), None
+                try:
+                    event = await next_event
+                except StopAsyncIteration:
+                    break
+            else:
+                if pending is None:
+                    pending = asyncio.ensure_future(iterator.__anext__())
+                done, _ = await asyncio.wait(
+                    {pending}, timeout=max(deadline - time.monotonic(), 0)
+                )
+                if not done:
+                    yield {"token": "".join(parts)}
+                    parts, size = [], 0
+                    continue
+                task, pending = pending, None
+                try:
+                    event = task.result()
+                except StopAsyncIteration:
+                    break
+
+            token = event.get("token") if len(event) == 1 else None
+            if token is not None:
+                if not parts:
+                    deadline = time.monotonic() + max_delay
+                parts.append(token)
+                size += len(token)
+                if size >= max_chars or time.monotonic() >= deadline:
+                    yield {"token": "".join(parts)}
+                    parts, size = [], 0
+                continue
+            if parts:
+                yield {"token": "".join(parts)}
+                parts, size = [], 0
+            yield event
+        if parts:
+            yield {"token": "".join(parts)}
+    finally:
+        if pending is not None:
+            pending.cancel()
+            # The cancelled read must unwind before its generator can be closed
+            await asyncio.wait({pending})
+        if hasattr(iterator, "aclose"):
+            await iterator.aclose()
@@ -1,15 +1,31 @@
+import time
+import asyncio
 import logging
 from fastapi import Request, Response
 from app.services.chat import ChatService
 from app.domain.requests import ChatRequest
 from fastapi.exceptions import HTTPException
-from app.api.dependencies import get_chat_repository, logger
+from app.api.streaming import coalesce_tokens, encode_event
+from app.api.dependencies import (
+    get_config,
+    get_chat_latency,
+    get_bot_cache,
+    get_chat_repository,
+    get_context_window_manager,
+    get_message_persister,
+    logger,
+)
 from app.domain.errors import ClientDisconnectError, PrismaExecutionError
 
 class ChatController:
     def __init__(self):
         self.chat_service = ChatService()
         self.chat_repo = get_chat_repository()
+        self.bot_cache = get_bot_cache()
+        self.context_window = get_context_window_manager()
+        self.persister = get_message_persister()
+        self.config = get_config()
+        self.latency = get_chat_latency()
 
     async def handle_prompt(
         self,
@@ -20,40 +36,71 @@ class ChatController:
         response: Response,
     ):
         try:
-            bot = await self.chat_repo.get_bot(bot_id=bot_id)
+            started = time.perf_counter()
+            with self.latency.time("bootstrap"):
+                bot, conversation = await asyncio.gather(
+                    self.latency.timed("get_bot", self.bot_cache.get_bot(bot_id)),
+                    self.latency.timed(
+                        "conversation",
+                        self.chat_repo.get_or_create_conversation(
+                            bot_id=bot_id,
+                            conversation_id=conversation_id,
+                            chat_request=chat_request,
+                            request=request,
+                            response=response,
+                        ),
+                    ),
+                    return_exceptions=True,
+                )
+            # A missing bot also fails the conversation insert; report the 404
+            if isinstance(bot, Exception):
+                raise bot
             if not bot:
                 logger().warning(f"Bot not found: {bot_id}")
                 raise HTTPException(404, "Bot not found")
-
-            conversation = await self.chat_repo.get_or_create_conversation(
-                bot_id=bot_id,
-                conversation_id=conversation_id,
-                chat_request=chat_request,
-                request=request,
-                response=response,
-            )
+            if isinstance(conversation, Exception):
+                raise conversation
             if not conversation:
                 logger().error("Failed to create or retrieve conversation")
                 raise HTTPException(500, "Creating and Retrieving Conversation failed")
 
             async def stream_with_error_handling():
-                try:
-                    async for chunk in self.chat_service.handle_chat(
+                events = coalesce_tokens(
+                    self.chat_service.handle_chat(
                         bot=bot,
                         prompt=chat_request.prompt,
                         conversation_id=conversation.id,
                         chat_request=chat_request,
-                    ):
+                    ),
+                    max_chars=self.config.STREAM_COALESCE_CHARS,
+                    max_delay=self.config.STREAM_COALESCE_INTERVAL,
+                )
+                first_token = True
+                try:
+                    async for event in events:
+                        if first_token and "token" in event:
+                            first_token = False
+                            self.latency.record(
+                                "time_to_first_token", time.perf_counter() - started
+                            )
                         if await request.is_disconnected():
                             logger().info(f"Client disconnected from conversation {conversation.id}")
                             raise ClientDisconnectError("Client disconnected")
-                        yield chunk
+                        yield encode_event(event)
                 except ClientDisconnectError:
                     logger().info("Client disconnected, stopping stream")
-                    await self.chat_repo.delete_latest_message(conversationId=conversation.id, role="user")
+                    if not self.persister.discard_latest(conversation.id, role="user"):
+                        await self.persister.flush(conversation.id)
+                        await self.chat_repo.delete_latest_message(conversationId=conversation.id, role="user")
+                    self.context_window.invalidate(conversation.id)
+                    self.chat_service.suggestions.cancel(conversation.id)
                 except Exception as e:
                     logger().error(f"Error in stream: {str(e)}", exc_info=True)
-                    yield self.chat_service._stream_data({"error": str(e)})
+                    yield encode_event(self.chat_service._stream_data({"error": str(e)}))
+                finally:
+                    # Stop the model stream and pending tool calls now rather
+                    # than whenever the abandoned generator is collected
+                    await events.aclose()
 
             return stream_with_error_handling()
 
@@ -67,3 +114,39 @@ class ChatController:
             
             logger().error(f"Error handling prompt: {str(e)}", exc_info=True)
             raise HTTPException(status_code=500, detail=str(e))
+
+    async def handle_suggestions(
+        self,
+        bot_id: str,
+        conversation_id: str,
+        chat_request: ChatRequest,
+        request: Request,
+    ):
+        try:
+            bot, conversation = await asyncio.gather(
+                self.bot_cache.get_bot(bot_id),
+                self.chat_repo.get_session_conversation(bot_id, conversation_id, request),
+            )
+            if not bot:
+                logger().warning(f"Bot not found: {bot_id}")
+                raise HTTPException(404, "Bot not found")
+            # Suggestions are generated from the history: never serve another session's
+            if not conversation:
+                logger().warning(f"Conversation {conversation_id} not found for bot {bot_id}")
+                raise HTTPException(404, "Conversation not found")
+
+            suggestions = await self.chat_service.get_question_suggestions(
+                bot=bot, conversation_id=conversation_id, chat_request=chat_request
+            )
+            return {"suggestions": suggestions}
+
+        except Exception as e:
+            if isinstance(e, PrismaExecutionError):
+                logger().error(f"Prisma Execution error {str(e)}", exc_info=True)
+                raise HTTPException(500, "Internal Server Error")
+            if isinstance(e, HTTPException):
+                logger().warning(f"HTTP Exception: {str(e)}")
+                raise e
+
+            logger().error(f"Error handling suggestions: {str(e)}", exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,25 @@
+import os
+from fastapi.exceptions import HTTPException
+from app.core.metrics import render_prometheus
+from app.api.dependencies import (
+    get_config,
+    get_db_health_monitor,
+    get_metrics_exporter,
+)
+
+
+class MetricsController:
+    def __init__(self):
+        self.config = get_config()
+        self.exporter = get_metrics_exporter()
+        self.health = get_db_health_monitor()
+
+    async def handle_metrics(self) -> str:
+        if not self.config.METRICS_ENABLED:
+            raise HTTPException(404, "Metrics are disabled")
+
+        snapshot = await self.exporter.collect()
+        # Database state is per process, so it is reported by the serving worker only
+        worker = {"worker": os.getpid()}
+        gauges = {"db_up": [(worker, int(self.health.available))]}
+        return render_prometheus(snapshot, gauges)
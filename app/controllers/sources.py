@@ -0,0 +1,31 @@
+from typing import List
+from fastapi import BackgroundTasks
+from fastapi.exceptions import HTTPException
+from app.services.ingestion import HttpFetcher
+from app.api.dependencies import create_ingestion_pipeline, logger
+
+
+class SourceController:
+    async def handle_sync(
+        self,
+        workspace_id: str,
+        source_ids: List[str],
+        background_tasks: BackgroundTasks,
+    ):
+        if not source_ids:
+            raise HTTPException(400, "No sources given")
+        background_tasks.add_task(self.run_sync, workspace_id, source_ids)
+        return {
+            "status": "success",
+            "message": f"Sync started for {len(source_ids)} sources",
+        }
+
+    async def run_sync(self, workspace_id: str, source_ids: List[str]) -> None:
+        fetcher = HttpFetcher()
+        try:
+            results = await create_ingestion_pipeline(fetcher).run(workspace_id, source_ids)
+            logger().info(f"Synced sources for workspace {workspace_id}: {results}")
+        except Exception as e:
+            logger().error(f"Source sync failed: {str(e)}", exc_info=True)
+        finally:
+            await fetcher.close()
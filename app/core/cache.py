@@ -0,0 +1,135 @@
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    In-process LRU cache whose entries also expire after `ttl` seconds.
+
+    `get_or_load` coalesces concurrent misses for the same key into a single
+    loader call, so a burst of requests for a cold key hits the database once.
+    Every key with a load in flight has a generation that `pop`, `invalidate`
+    and `clear` bump; a load whose key was invalidated meanwhile is returned
+    to its callers but not stored, so it can't outlive the invalidation.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[K, tuple[float, V]]" = OrderedDict()
+        self._inflight: Dict[K, asyncio.Future] = {}
+        self._generations: Dict[K, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return self._lookup(key) is not None
+
+    def _lookup(self, key: K) -> Optional[tuple[float, V]]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, _ = entry
+        if expires_at and expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else 0
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def _bump(self, key: K) -> None:
+        if key in self._generations:
+            self._generations[key] += 1
+
+    def pop(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        self._bump(key)
+        entry = self._data.pop(key, None)
+        return entry[1] if entry else default
+
+    def invalidate(self, predicate: Callable[[K], bool]) -> int:
+        """Drop every entry whose key matches `predicate`; returns the count"""
+        for key in self._generations:
+            if predicate(key):
+                self._generations[key] += 1
+        keys = [key for key in self._data if predicate(key)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        for key in self._generations:
+            self._generations[key] += 1
+        self._data.clear()
+
+    async def get_or_load(self, key: K, loader: Callable[[], Awaitable[V]]) -> V:
+        entry = self._lookup(key)
+        if entry is not None:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # The leader was cancelled (e.g. client disconnect), not us
+                if not inflight.cancelled():
+                    raise
+                return await self.get_or_load(key, loader)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self._generations[key] = 0
+        try:
+            value = await loader()
+            if self._generations.get(key) == 0:
+                self.set(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unobserved failure doesn't log a warning
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            self._generations.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -13,8 +13,121 @@ class Config:
         self.DB_NAME = os.environ.get("DB_NAME", "{**}")
         self.DB_USER = os.environ.get("DB_USER", "root")
         self.DB_PASSWORD = os.environ.get("DB_PASSWORD", "1234")
+        # Optional read replica for read-only hot-path queries
+        self.DB_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+        # Prisma pool size per client (0 keeps Prisma's num_cpus * 2 + 1) and wait for a free connection
+        self.DB_CONNECTION_LIMIT = int(os.environ.get("DB_CONNECTION_LIMIT", 0))
+        self.DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+        # Interactive transactions: runtime limit and wait to start
+        self.DB_TX_TIMEOUT = float(os.environ.get("DB_TX_TIMEOUT", 5))
+        self.DB_TX_MAX_WAIT = float(os.environ.get("DB_TX_MAX_WAIT", 2))
 
         # EMBEDDING settings
         self.EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL")
         self.EMBEDDING_API_KEY = os.environ.get("EMBEDDING_API_KEY")
         self.EMBEDDING_BASE_URL = os.environ.get("EMBEDDING_BASE_URL")
+        self.EMBEDDING_DIMENSIONS = int(os.environ.get("EMBEDDING_DIMENSIONS", 1024))
+        self.EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", 64))
+        self.EMBEDDING_BATCH_WINDOW = float(os.environ.get("EMBEDDING_BATCH_WINDOW", 0.005))
+        self.EMBEDDING_CACHE_SIZE = int(os.environ.get("EMBEDDING_CACHE_SIZE", 20000))
+        # Share cached embeddings across workers through the `embedding_cache` table
+        self.EMBEDDING_CACHE_PERSIST = os.environ.get("EMBEDDING_CACHE_PERSIST", "true").lower() == "true"
+
+        # Knowledge retrieval over the pgvector `vectors` table
+        self.RETRIEVAL_ENABLED = os.environ.get("RETRIEVAL_ENABLED", "false").lower() == "true"
+        self.RETRIEVAL_TOP_K = int(os.environ.get("RETRIEVAL_TOP_K", 4))
+        self.RETRIEVAL_CANDIDATES = int(os.environ.get("RETRIEVAL_CANDIDATES", 40))
+        self.RETRIEVAL_PROBES = int(os.environ.get("RETRIEVAL_PROBES", 10))
+        self.RETRIEVAL_RRF_K = int(os.environ.get("RETRIEVAL_RRF_K", 60))
+        self.RETRIEVAL_SOURCES_TTL = float(os.environ.get("RETRIEVAL_SOURCES_TTL", 5 * 60))
+
+        # In-process FAISS mirror of `vectors` (requires faiss-cpu and numpy)
+        self.FAISS_ENABLED = os.environ.get("FAISS_ENABLED", "false").lower() == "true"
+        self.FAISS_WORKSPACES = os.environ.get("FAISS_WORKSPACES", "")
+        self.FAISS_INDEX_DIR = os.environ.get("FAISS_INDEX_DIR", "/tmp/faiss-indexes")
+        self.FAISS_CACHE_SIZE = int(os.environ.get("FAISS_CACHE_SIZE", 16))
+        self.FAISS_IVF_MIN_ROWS = int(os.environ.get("FAISS_IVF_MIN_ROWS", 20000))
+        self.FAISS_SYNC_INTERVAL = float(os.environ.get("FAISS_SYNC_INTERVAL", 30))
+        # Re-read window behind the sync watermark; covers chunk transactions
+        # that commit after rows stamped later than theirs
+        self.FAISS_SYNC_OVERLAP = float(os.environ.get("FAISS_SYNC_OVERLAP", 60))
+        self.FAISS_DELTA_LIMIT = int(os.environ.get("FAISS_DELTA_LIMIT", 5000))
+        self.FAISS_REBUILD_INTERVAL = float(os.environ.get("FAISS_REBUILD_INTERVAL", 6 * 60 * 60))
+
+        # Source ingestion pipeline
+        self.INGEST_QUEUE_SIZE = int(os.environ.get("INGEST_QUEUE_SIZE", 4))
+        self.INGEST_FETCH_CONCURRENCY = int(os.environ.get("INGEST_FETCH_CONCURRENCY", 4))
+        self.INGEST_CHUNK_SIZE = int(os.environ.get("INGEST_CHUNK_SIZE", 1500))
+        self.INGEST_CHUNK_OVERLAP = int(os.environ.get("INGEST_CHUNK_OVERLAP", 200))
+
+        # Shared key (X-API-Key header) for admin/write routes; unset keeps them closed
+        self.ADMIN_API_KEY = os.environ.get("ADMIN_API_KEY")
+
+        # LLM client pool settings
+        self.LLM_HTTP2 = os.environ.get("LLM_HTTP2", "true").lower() == "true"
+        self.LLM_POOL_MAX_CONNECTIONS = int(os.environ.get("LLM_POOL_MAX_CONNECTIONS", 100))
+        self.LLM_POOL_MAX_KEEPALIVE = int(os.environ.get("LLM_POOL_MAX_KEEPALIVE", 20))
+        self.LLM_POOL_KEEPALIVE_EXPIRY = float(os.environ.get("LLM_POOL_KEEPALIVE_EXPIRY", 30))
+        self.LLM_CLIENT_IDLE_TTL = float(os.environ.get("LLM_CLIENT_IDLE_TTL", 15 * 60))
+
+        # Tool calls from one model turn run concurrently, each under its own limits
+        self.TOOL_TIMEOUT = float(os.environ.get("TOOL_TIMEOUT", 10))
+        self.TOOL_RESULT_MAX_CHARS = int(os.environ.get("TOOL_RESULT_MAX_CHARS", 6000))
+
+        # Chat streaming: merge model tokens into frames of about this many characters
+        self.STREAM_COALESCE_CHARS = int(os.environ.get("STREAM_COALESCE_CHARS", 24))
+        self.STREAM_COALESCE_INTERVAL = float(os.environ.get("STREAM_COALESCE_INTERVAL", 0.05))
+
+        # Business data / prompt cache settings
+        self.BUSINESS_CACHE_SIZE = int(os.environ.get("BUSINESS_CACHE_SIZE", 1024))
+        self.BUSINESS_CACHE_TTL = float(os.environ.get("BUSINESS_CACHE_TTL", 5 * 60))
+
+        # Bot / model / AI provider cache settings
+        self.BOT_CACHE_SIZE = int(os.environ.get("BOT_CACHE_SIZE", 1024))
+        self.BOT_CACHE_TTL = float(os.environ.get("BOT_CACHE_TTL", 5 * 60))
+
+        # Background database health probe / circuit breaker
+        self.DB_HEALTH_INTERVAL = float(os.environ.get("DB_HEALTH_INTERVAL", 5))
+        self.DB_HEALTH_TIMEOUT = float(os.environ.get("DB_HEALTH_TIMEOUT", 2))
+        self.DB_HEALTH_FAILURE_THRESHOLD = int(os.environ.get("DB_HEALTH_FAILURE_THRESHOLD", 2))
+
+        # Hot-path metrics, exported on /metrics and shared across workers through METRICS_DIR
+        self.METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "false").lower() == "true"
+        self.METRICS_DIR = os.environ.get("METRICS_DIR", "/tmp/chat-metrics")
+        self.METRICS_EXPORT_INTERVAL = float(os.environ.get("METRICS_EXPORT_INTERVAL", 5))
+
+        # Postgres LISTEN/NOTIFY cache invalidation (requires asyncpg)
+        self.DB_NOTIFY_ENABLED = os.environ.get("DB_NOTIFY_ENABLED", "false").lower() == "true"
+
+        # Conversation context window settings
+        self.CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", 3000))
+        self.CONTEXT_CACHE_SIZE = int(os.environ.get("CONTEXT_CACHE_SIZE", 10000))
+        self.CONTEXT_CACHE_TTL = float(os.environ.get("CONTEXT_CACHE_TTL", 30 * 60))
+        self.CONTEXT_SUMMARIZE = os.environ.get("CONTEXT_SUMMARIZE", "false").lower() == "true"
+        # Re-read window behind the newest cached message; covers write-behind batches
+        # that commit late, including retries (MESSAGE_FLUSH_* backoff)
+        self.CONTEXT_RELOAD_OVERLAP = float(os.environ.get("CONTEXT_RELOAD_OVERLAP", 60))
+
+        # Write-behind chat message persistence
+        self.MESSAGE_FLUSH_SIZE = int(os.environ.get("MESSAGE_FLUSH_SIZE", 50))
+        self.MESSAGE_FLUSH_INTERVAL = float(os.environ.get("MESSAGE_FLUSH_INTERVAL", 2))
+        # A failing batch is retried with exponential backoff, then dropped
+        self.MESSAGE_FLUSH_MAX_RETRIES = int(os.environ.get("MESSAGE_FLUSH_MAX_RETRIES", 5))
+        self.MESSAGE_FLUSH_MAX_BACKOFF = float(os.environ.get("MESSAGE_FLUSH_MAX_BACKOFF", 60))
+
+        # In-process product search index (replaces the full-text query in search_products).
+        # Needs DB_NOTIFY_ENABLED, like PRODUCT_FUZZY_SEARCH below
+        self.PRODUCT_SEARCH_INDEX = os.environ.get("PRODUCT_SEARCH_INDEX", "false").lower() == "true"
+        # Fall back to the index's typo-tolerant matching when full-text search finds nothing.
+        # Needs DB_NOTIFY_ENABLED, which keeps the index's prices, stock and active flags current
+        self.PRODUCT_FUZZY_SEARCH = os.environ.get("PRODUCT_FUZZY_SEARCH", "false").lower() == "true"
+        self.PRODUCT_INDEX_CACHE_SIZE = int(os.environ.get("PRODUCT_INDEX_CACHE_SIZE", 64))
+        self.PRODUCT_INDEX_TTL = float(os.environ.get("PRODUCT_INDEX_TTL", 10 * 60))
+
+        # Semantic cache of opening-question answers per business (opt-in)
+        self.RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+        self.RESPONSE_CACHE_THRESHOLD = float(os.environ.get("RESPONSE_CACHE_THRESHOLD", 0.95))
+        # Answers can mention the current time ("we're open now"), so keep this short
+        self.RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", 15 * 60))
+        self.RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", 1024))
+        self.RESPONSE_CACHE_ENTRIES = int(os.environ.get("RESPONSE_CACHE_ENTRIES", 64))
@@ -1,14 +1,44 @@
+import math
+import asyncio
 import logging
 from prisma import Prisma
-from typing import AsyncGenerator
+from datetime import timedelta
+from app.core.config import Config
 from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 logger = logging.getLogger(__name__)
 
+def pooled_url(url: str, connection_limit: int, pool_timeout: float) -> str:
+    """Add Prisma pool parameters to a datasource URL unless it already sets them"""
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    if connection_limit:
+        query.setdefault("connection_limit", str(connection_limit))
+    # Prisma takes whole seconds and reads 0 as "wait forever"; round up instead
+    query.setdefault("pool_timeout", str(max(math.ceil(pool_timeout), 1)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
 class Database:
-    def __init__(self):
-        self._prisma = Prisma()
+    def __init__(self, config: Config):
+        self.config = config
+        self._prisma = self._client(config.DB_URL)
+        self._replica = self._client(config.DB_REPLICA_URL) if config.DB_REPLICA_URL else None
         self._is_connected = False
+        self._replica_connected = False
+
+    def _client(self, url: Optional[str]) -> Prisma:
+        if not url:
+            return Prisma()
+        return Prisma(
+            datasource={
+                "url": pooled_url(
+                    url, self.config.DB_CONNECTION_LIMIT, self.config.DB_POOL_TIMEOUT
+                )
+            }
+        )
 
     async def connect(self) -> None:
         try:
@@ -19,9 +49,24 @@ class Database:
         except Exception as e:
             logger.error(f"Failed to connect to database: {str(e)}")
             raise
+        await self._connect_replica()
+
+    async def _connect_replica(self) -> None:
+        if self._replica is None or self._replica_connected:
+            return
+        try:
+            await self._replica.connect()
+            self._replica_connected = True
+            logger.info("Successfully connected to read replica")
+        except Exception as e:
+            # Reads fall back to the primary
+            logger.error(f"Failed to connect to read replica: {str(e)}")
 
     async def disconnect(self) -> None:
         try:
+            if self._replica_connected:
+                await self._replica.disconnect()
+                self._replica_connected = False
             if self._is_connected:
                 await self._prisma.disconnect()
                 self._is_connected = False
@@ -30,10 +75,46 @@ class Database:
             logger.error(f"Error disconnecting from database: {str(e)}")
             raise
 
+    async def reconnect(self) -> None:
+        """Drop the current query engine, if any, and connect again"""
+        try:
+            if self._prisma.is_connected():
+                await self._prisma.disconnect()
+        except Exception as e:
+            logger.warning(f"Error dropping stale database connection: {str(e)}")
+        self._is_connected = False
+        await self.connect()
+
+    async def reconnect_replica(self) -> None:
+        """Reconnect a replica that dropped; reads use the primary until it is back"""
+        if self._replica is None or self._replica_connected:
+            return
+        try:
+            if self._replica.is_connected():
+                await self._replica.disconnect()
+        except Exception as e:
+            logger.warning(f"Error dropping stale replica connection: {str(e)}")
+        await self._connect_replica()
+
+    @property
+    def has_replica(self) -> bool:
+        return self._replica is not None
+
+    @property
+    def replica_connected(self) -> bool:
+        return self._replica_connected
+
     @property
     def prisma(self) -> Prisma:
         return self._prisma
 
+    @property
+    def reader(self) -> Prisma:
+        """Client for read-only queries: the replica when configured, else the primary"""
+        if self._replica is not None and self._replica_connected:
+            return self._replica
+        return self._prisma
+
     async def verify_connection(self) -> bool:
         """Verify database connection is still alive"""
         try:
@@ -43,13 +124,30 @@ class Database:
             self._is_connected = False
             return False
 
-    @asynccontextmanager
-    async def transaction(self) -> AsyncGenerator[Prisma, None]:
-        """Context manager for database transactions"""
+    async def verify_replica(self, timeout: float) -> bool:
+        """Probe the replica; a failed probe sends reads back to the primary"""
+        if self._replica is None or not self._replica_connected:
+            return False
         try:
-            await self.connect()
-            yield self._prisma
-        finally:
-            await self.disconnect()
+            await asyncio.wait_for(self._replica.query_raw("SELECT 1"), timeout)
+            return True
+        except Exception as e:
+            logger.error(
+                f"Read replica unavailable, reading from the primary: {str(e) or type(e).__name__}"
+            )
+            self._replica_connected = False
+            return False
+
+    @asynccontextmanager
+    async def transaction(
+        self, timeout: Optional[float] = None, max_wait: Optional[float] = None
+    ) -> AsyncGenerator[Prisma, None]:
+        """Interactive transaction on the primary; commits on exit, rolls back on error"""
+        async with self._prisma.tx(
+            timeout=timedelta(seconds=timeout or self.config.DB_TX_TIMEOUT),
+            max_wait=timedelta(seconds=max_wait or self.config.DB_TX_MAX_WAIT),
+        ) as tx:
+            yield tx
+
 
-db = Database()
\ No newline at end of file
+db = Database(Config())
@@ -0,0 +1,129 @@
+import time
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+from app.core.database import Database
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseHealthMonitor:
+    """
+    Background database probe with circuit-breaker semantics. Requests read
+    `available` instead of running their own `SELECT 1`: the circuit opens
+    after `failure_threshold` consecutive failed probes, requests then fail
+    fast, and the monitor keeps reconnecting until a probe succeeds.
+    A configured read replica is probed too: the first failed probe moves
+    reads back to the primary, and the replica is reconnected in the
+    background.
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        interval: float,
+        timeout: float,
+        failure_threshold: int,
+    ):
+        self.database = database
+        self.interval = interval
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.available = True
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_checked: Optional[float] = None
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+        self.replica_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Database health check failed: {str(e)}")
+
+    async def check(self) -> bool:
+        """Probe once, reconnecting first while the circuit is open"""
+        await self.check_replica()
+        try:
+            if not self.available:
+                await self._reconnect()
+            healthy = await asyncio.wait_for(
+                self.database.verify_connection(), self.timeout
+            )
+            error = None if healthy else "probe failed"
+        except asyncio.TimeoutError:
+            healthy, error = False, f"probe timed out after {self.timeout}s"
+        except Exception as e:
+            healthy, error = False, str(e)
+        self.last_checked = time.time()
+
+        if healthy:
+            if not self.available:
+                logger.info("Database connection restored, closing circuit")
+            self.available = True
+            self.failures = 0
+            self.opened_at = None
+            self.last_error = None
+            return True
+
+        self.failures += 1
+        self.last_error = error
+        if self.available and self.failures >= self.failure_threshold:
+            logger.error(f"Database unavailable, opening circuit: {error}")
+            self.available = False
+            self.opened_at = self.last_checked
+            self.trips += 1
+        return False
+
+    async def check_replica(self) -> None:
+        if not self.database.has_replica:
+            return
+        if not self.database.replica_connected:
+            try:
+                await asyncio.wait_for(self.database.reconnect_replica(), self.timeout)
+            except asyncio.TimeoutError:
+                self.replica_error = f"reconnect timed out after {self.timeout}s"
+                return
+            if not self.database.replica_connected:
+                self.replica_error = "reconnect failed"
+                return
+            logger.info("Read replica reconnected")
+        if await self.database.verify_replica(self.timeout):
+            self.replica_error = None
+        else:
+            self.replica_error = "probe failed"
+
+    async def _reconnect(self) -> None:
+        await asyncio.wait_for(self.database.reconnect(), self.timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "available": self.available,
+            "consecutive_failures": self.failures,
+            "trips": self.trips,
+            "last_error": self.last_error,
+            "last_checked": self.last_checked,
+            "opened_at": self.opened_at,
+            "replica_available": self.database.replica_connected if self.database.has_replica else None,
+            "replica_error": self.replica_error,
+        }
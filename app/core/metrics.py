@@ -0,0 +1,247 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from pathlib import Path
+from contextlib import contextmanager, nullcontext
+from typing import Any, Awaitable, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Upper bounds in seconds, from cache hits up to slow completions
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30,
+)
+
+# Shared no-op timer handed out by disabled recorders
+_DISABLED = nullcontext()
+
+
+class LatencyRecorder:
+    """
+    Per-stage latency counters (count, total, max and histogram buckets) plus
+    plain counters for hot-path timings. A disabled recorder hands out a shared
+    no-op timer, so instrumented code costs a method call when metrics are off.
+    """
+
+    def __init__(self, enabled: bool = True, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._counters: Dict[str, float] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        stats = self._stages.get(stage)
+        if stats is None:
+            stats = self._stages[stage] = {
+                "count": 0,
+                "total": 0.0,
+                "max": 0.0,
+                "buckets": [0] * len(self.buckets),
+            }
+        stats["count"] += 1
+        stats["total"] += seconds
+        stats["max"] = max(stats["max"], seconds)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                stats["buckets"][i] += 1
+                break
+
+    def increment(self, counter: str, amount: float = 1) -> None:
+        if self.enabled:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    def time(self, stage: str) -> ContextManager[None]:
+        return self._timer(stage) if self.enabled else _DISABLED
+
+    @contextmanager
+    def _timer(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    async def timed(self, stage: str, awaitable: Awaitable[T]) -> T:
+        """Await `awaitable` under `stage`; handy inside `asyncio.gather`"""
+        with self.time(stage):
+            return await awaitable
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            stage: {
+                "count": int(stats["count"]),
+                "avg_ms": round(stats["total"] / stats["count"] * 1000, 3),
+                "max_ms": round(stats["max"] * 1000, 3),
+            }
+            for stage, stats in self._stages.items()
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Raw, mergeable state: per-bucket (not cumulative) counts and counters"""
+        return {
+            "buckets": list(self.buckets),
+            "stages": {
+                stage: {**stats, "buckets": list(stats["buckets"])}
+                for stage, stats in self._stages.items()
+            },
+            "counters": dict(self._counters),
+        }
+
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum recorder snapshots from several workers; all must share bucket bounds"""
+    merged: Dict[str, Any] = {"buckets": list(DEFAULT_BUCKETS), "stages": {}, "counters": {}}
+    for snapshot in snapshots:
+        merged["buckets"] = snapshot.get("buckets", merged["buckets"])
+        for stage, stats in snapshot.get("stages", {}).items():
+            into = merged["stages"].get(stage)
+            if into is None:
+                merged["stages"][stage] = {**stats, "buckets": list(stats["buckets"])}
+                continue
+            into["count"] += stats["count"]
+            into["total"] += stats["total"]
+            into["max"] = max(into["max"], stats["max"])
+            into["buckets"] = [a + b for a, b in zip(into["buckets"], stats["buckets"])]
+        for counter, value in snapshot.get("counters", {}).items():
+            merged["counters"][counter] = merged["counters"].get(counter, 0) + value
+        for name, stats in snapshot.get("caches", {}).items():
+            into = merged.setdefault("caches", {}).setdefault(name, {})
+            for key in ("size", "hits", "misses", "evictions"):
+                into[key] = into.get(key, 0) + stats.get(key, 0)
+    return merged
+
+
+def _labels(**labels: Any) -> str:
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+def render_prometheus(
+    snapshot: Dict[str, Any],
+    gauges: Optional[Dict[str, List[Tuple[Dict[str, Any], float]]]] = None,
+    prefix: str = "chat",
+) -> str:
+    """Render a merged snapshot in the Prometheus text exposition format"""
+    lines: List[str] = []
+    bounds = snapshot["buckets"]
+
+    if snapshot["stages"]:
+        name = f"{prefix}_stage_seconds"
+        lines.append(f"# HELP {name} Time spent in each stage of a chat turn")
+        lines.append(f"# TYPE {name} histogram")
+        for stage, stats in sorted(snapshot["stages"].items()):
+            cumulative = 0
+            for bound, count in zip(bounds, stats["buckets"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(stage=stage, le=bound)} {cumulative}")
+            lines.append(f'{name}_bucket{_labels(stage=stage, le="+Inf")} {stats["count"]}')
+            lines.append(f"{name}_sum{_labels(stage=stage)} {stats['total']}")
+            lines.append(f"{name}_count{_labels(stage=stage)} {stats['count']}")
+
+    for counter, value in sorted(snapshot["counters"].items()):
+        name = f"{prefix}_{counter}_total"
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name} {value}")
+
+    caches = snapshot.get("caches", {})
+    for key in ("hits", "misses", "evictions"):
+        if caches:
+            name = f"cache_{key}_total"
+            lines.append(f"# TYPE {name} counter")
+            for cache, stats in sorted(caches.items()):
+                lines.append(f"{name}{_labels(cache=cache)} {stats[key]}")
+    if caches:
+        lines.append("# TYPE cache_entries gauge")
+        for cache, stats in sorted(caches.items()):
+            lines.append(f"cache_entries{_labels(cache=cache)} {stats['size']}")
+
+    for name, samples in sorted((gauges or {}).items()):
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            lines.append(f"{name}{_labels(**labels) if labels else ''} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """
+    Shares a worker's metrics with its siblings. Each uvicorn/pm2 worker
+    writes its snapshot to `<directory>/<pid>.json` every `interval` seconds,
+    and whichever worker serves `/metrics` sums the files that are fresh.
+    """
+
+    def __init__(
+        self,
+        recorder: LatencyRecorder,
+        directory: str,
+        interval: float,
+        caches: Optional[Callable[[], Dict[str, Dict[str, Any]]]] = None,
+    ):
+        self.recorder = recorder
+        self.directory = Path(directory)
+        self.interval = interval
+        self.caches = caches
+        self.path = self.directory / f"{os.getpid()}.json"
+        self._task: Optional[asyncio.Task] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = self.recorder.snapshot()
+        if self.caches:
+            try:
+                snapshot["caches"] = self.caches()
+            except Exception as e:
+                logger.error(f"Failed to collect cache stats: {str(e)}")
+        return snapshot
+
+    def start(self) -> None:
+        if self._task is None and self.recorder.enabled:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self.path.unlink(missing_ok=True)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self._write, self.snapshot())
+            except Exception as e:
+                logger.error(f"Failed to export metrics: {str(e)}")
+
+    def _write(self, snapshot: Dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(snapshot))
+        os.replace(tmp, self.path)
+
+    def _read_siblings(self) -> List[Dict[str, Any]]:
+        # Files of workers that stopped refreshing them (crashed or restarted) are ignored
+        cutoff = time.time() - self.interval * 3
+        snapshots = []
+        for path in self.directory.glob("*.json"):
+            if path == self.path:
+                continue
+            try:
+                if path.stat().st_mtime < cutoff:
+                    continue
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    async def collect(self) -> Dict[str, Any]:
+        """This worker's live snapshot merged with every sibling's latest export"""
+        siblings = await asyncio.to_thread(self._read_siblings)
+        return merge_snapshots([self.snapshot(), *siblings])
@@ -0,0 +1,108 @@
+import json
+import asyncio
+import logging
+from urllib.parse import urlsplit, urlunsplit
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+NotificationHandler = Callable[[Dict[str, Any]], Union[None, Awaitable[None]]]
+
+
+class NotificationListener:
+    """
+    Postgres LISTEN/NOTIFY subscriber used to propagate cache invalidations
+    across uvicorn workers. Prisma cannot LISTEN, so this holds a dedicated
+    asyncpg connection; asyncpg is optional and the listener is a no-op
+    when it isn't installed.
+    """
+
+    RECONNECT_DELAY = 5
+
+    def __init__(self, dsn: Optional[str]):
+        self.dsn = self._strip_query(dsn) if dsn else None
+        self._handlers: Dict[str, List[NotificationHandler]] = {}
+        self._connection = None
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _strip_query(dsn: str) -> str:
+        # Prisma URLs carry options such as ?schema= that asyncpg rejects
+        parts = urlsplit(dsn)
+        return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+    def subscribe(self, channel: str, handler: NotificationHandler) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+
+    async def start(self) -> None:
+        if self._task or not self._handlers:
+            return
+        if not self.dsn:
+            logger.warning("Notification listener disabled: DATABASE_URL is not set")
+            return
+        try:
+            import asyncpg  # noqa: F401
+        except ImportError:
+            logger.warning("Notification listener disabled: asyncpg is not installed")
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close_connection()
+
+    async def _close_connection(self) -> None:
+        if self._connection is not None:
+            try:
+                await self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    async def _run(self) -> None:
+        import asyncpg
+
+        connected_before = False
+        while True:
+            try:
+                self._connection = await asyncpg.connect(self.dsn)
+                lost = asyncio.Event()
+                self._connection.add_termination_listener(lambda _: lost.set())
+                for channel in self._handlers:
+                    await self._connection.add_listener(channel, self._on_notification)
+                logger.info(f"Listening for notifications on {', '.join(self._handlers)}")
+                if connected_before:
+                    # Changes made while disconnected were missed; resync everything
+                    for channel in self._handlers:
+                        self._dispatch(channel, {"op": "RESYNC"})
+                connected_before = True
+                await lost.wait()
+                logger.warning("Notification connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Notification listener error: {str(e)}")
+            await self._close_connection()
+            await asyncio.sleep(self.RECONNECT_DELAY)
+
+    def _on_notification(self, connection, pid, channel: str, payload: str) -> None:
+        try:
+            data = json.loads(payload) if payload else {}
+        except json.JSONDecodeError:
+            data = {"payload": payload}
+        self._dispatch(channel, data)
+
+    def _dispatch(self, channel: str, data: Dict[str, Any]) -> None:
+        for handler in self._handlers.get(channel, []):
+            try:
+                result = handler(data)
+                if asyncio.iscoroutine(result):
+                    asyncio.create_task(result)
+            except Exception as e:
+                logger.error(f"Notification handler for {channel} failed: {str(e)}")
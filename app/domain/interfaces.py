@@ -1,5 +1,6 @@
 import json
 from enum import Enum
+from datetime import datetime
 from dataclasses import dataclass
 from prisma.enums import ChatFeedback
 from typing import Optional, Dict, Any, List, TypeVar, Generic
@@ -80,9 +81,11 @@ class Message:
     toolCallId: Optional[str] = None
     tokens: Optional[int] = None
     feedback: Optional[str] = ChatFeedback.NONE.value
+    id: Optional[str] = None
+    createdAt: Optional[datetime] = None
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
+        data = {
             "role": self.role,
             "content": str(self.content),
             "toolCalls": json.dumps(self.toolCalls if self.toolCalls else []),
@@ -90,3 +93,8 @@ class Message:
             "tokens": self.tokens or len(str(self.content).split()),
             "feedback": self.feedback,
         }
+        if self.id:
+            data["id"] = self.id
+        if self.createdAt:
+            data["createdAt"] = self.createdAt
+        return data
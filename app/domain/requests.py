@@ -3,4 +3,6 @@ from pydantic import BaseModel
 
 class ChatRequest(BaseModel):
     prompt: str
-    chat_mode: Literal["whatsapp", "web"] = "web"
\ No newline at end of file
+    chat_mode: Literal["whatsapp", "web"] = "web"
+    # Close the stream after "complete"; fetch suggestions from the suggestions endpoint
+    defer_suggestions: bool = False
\ No newline at end of file
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from typing import List, Optional, Sequence
+from app.core.config import Config
+from app.infrastructure.ai.providers.registry import LLMClientRegistry
+from app.services.embedding_cache import EmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingClient:
+    """
+    Embeds text through the EMBEDDING_* endpoint. Concurrent `embed` calls
+    made within EMBEDDING_BATCH_WINDOW are coalesced into one request of up
+    to EMBEDDING_BATCH_SIZE inputs, so a burst of chat turns costs a single
+    round-trip to the embedding server. With an `EmbeddingCache`, text that
+    was embedded before is served from the cache instead.
+    """
+
+    def __init__(
+        self,
+        client_registry: LLMClientRegistry,
+        config: Config,
+        cache: Optional[EmbeddingCache] = None,
+    ):
+        self.client_registry = client_registry
+        self.cache = cache
+        self.model = config.EMBEDDING_MODEL
+        self.base_url = config.EMBEDDING_BASE_URL
+        self.api_key = config.EMBEDDING_API_KEY
+        self.batch_size = config.EMBEDDING_BATCH_SIZE
+        self.batch_window = config.EMBEDDING_BATCH_WINDOW
+        self._pending: List[tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.model and self.base_url)
+
+    async def embed(self, text: str) -> List[float]:
+        """Embed one text, batched with other concurrent callers"""
+        if self.cache:
+            key = self.cache.key(text)
+            embedding = self.cache.get_cached(key)
+            if embedding is None:
+                embedding = await self._embed_batched(text)
+                self.cache.put(key, embedding)
+            return embedding
+        return await self._embed_batched(text)
+
+    async def _embed_batched(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return await future
+
+    async def embed_many(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed many texts in EMBEDDING_BATCH_SIZE requests, preserving order"""
+        if not self.cache:
+            return await self._request_all(texts)
+
+        keys = [self.cache.key(text) for text in texts]
+        embeddings = await self.cache.get_many(keys)
+        missing = {key: text for key, text in zip(keys, texts) if key not in embeddings}
+        if missing:
+            computed = dict(zip(missing, await self._request_all(list(missing.values()))))
+            await self.cache.put_many(computed)
+            embeddings.update(computed)
+        return [embeddings[key] for key in keys]
+
+    async def _request_all(self, texts: Sequence[str]) -> List[List[float]]:
+        embeddings: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            embeddings.extend(await self._request(texts[start : start + self.batch_size]))
+        return embeddings
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[tuple[str, asyncio.Future]]) -> None:
+        try:
+            embeddings = await self._request([text for text, _ in batch])
+        except Exception as e:
+            logger.error(f"Embedding request failed: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+                    # Mark retrieved so a caller that went away doesn't log a warning
+                    future.exception()
+            return
+        for (_, future), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
+    async def _request(self, texts: Sequence[str]) -> List[List[float]]:
+        client = await self.client_registry.get_client(self.base_url, self.api_key)
+        response = await client.embeddings.create(model=self.model, input=list(texts))
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
@@ -1,4 +1,5 @@
 import json
+import hashlib
 from datetime import datetime, timezone
 from typing import List, Dict, Optional, Literal
 from prisma.models import (
@@ -30,6 +31,12 @@ class SellerPromptGenerator:
         self.operating_hours = operating_hours
         self.mode = mode
         self.extra_context = extra_context
+        self._static_prompt: Optional[str] = None
+        self._prefix_hash: Optional[str] = None
+
+    def _sorted_locations(self) -> List[BusinessLocation]:
+        """Locations in a deterministic order so the prompt prefix is byte-stable."""
+        return sorted(self.locations, key=lambda loc: (not loc.isMain, loc.name, loc.id))
 
     def _get_current_time(self) -> str:
         """Generate formatted UTC timestamp."""
@@ -41,13 +48,13 @@ class SellerPromptGenerator:
         return [
             f"{loc.name}: {loc.address}, {loc.city}, {loc.country} "
             f"({loc.phone if loc.phone else 'No phone'})"
-            for loc in self.locations
+            for loc in self._sorted_locations()
         ]
 
     def _format_contact_data(self) -> List[Dict]:
         """Format contact data for WhatsApp API."""
         contacts = []
-        for loc in self.locations:
+        for loc in self._sorted_locations():
             if loc.phone:
                 contact = {
                     "name": {
@@ -74,11 +81,13 @@ class SellerPromptGenerator:
         """Format operating hours from the database with proper alignment."""
         hours_by_day = {}
 
-        for location in self.locations:
+        for location in self._sorted_locations():
             seen_days = set()
             location_hours = []
 
-            for hour in sorted(self.operating_hours, key=lambda x: x.dayOfWeek):
+            for hour in sorted(
+                self.operating_hours, key=lambda x: (x.dayOfWeek, x.openTime, x.id)
+            ):
                 hour: BusinessOperatingHours = hour
                 if hour.locationId == location.id:
                     if hour.dayOfWeek not in seen_days:
@@ -125,6 +134,32 @@ class SellerPromptGenerator:
             return """"""
 
     def generate_prompt(self) -> str:
+        """Full system prompt: the stable prefix followed by the volatile tail."""
+        return self.generate_static_prompt() + self.generate_volatile_prompt()
+
+    @property
+    def prefix_hash(self) -> str:
+        """Content hash of the static prefix, stable until business data changes."""
+        if self._prefix_hash is None:
+            self._prefix_hash = hashlib.sha256(
+                self.generate_static_prompt().encode("utf-8")
+            ).hexdigest()
+        return self._prefix_hash
+
+    def generate_volatile_prompt(self) -> str:
+        """Per-turn tail (time, extra context), kept after the cacheable prefix."""
+        return f"""
+Current time: {self._get_current_time()}
+{self.extra_context if self.extra_context else ""}
+"""
+
+    def generate_static_prompt(self) -> str:
+        """Rules, formatting guide and business data; identical across turns."""
+        if self._static_prompt is None:
+            self._static_prompt = self._render_static_prompt()
+        return self._static_prompt
+
+    def _render_static_prompt(self) -> str:
         locations_data = self._format_locations_data()
         operating_hours_str = self._format_operating_hours()
         formatting_guide = self._get_formatting_guide()
@@ -137,7 +172,7 @@ class SellerPromptGenerator:
   2. Show ALL results found
   3. NEVER ask for more specifics first
   4. To ensure a seamless real-time chat flow during conversations, if a tool responds with "none" or "results not found," you must always invoke the tool again to retrieve results or provide the most relevant information available.
-- NEVER make multiple tool calls at once
+- When a question needs several lookups (e.g. two different products, or a product and delivery fees), make all the tool calls at once instead of one after another
 - For multiple search terms (e.g. "Adidas Yeezy"), combine them into a single query: search_products with query="adidas yeezy"
 - When users ask to see all products, use search_products with query="*LATEST*"
 - NEVER tell users you can't show products - always attempt to search and display what's available
@@ -179,7 +214,4 @@ BUSINESS HOURS:
 # IMPORTANT REMINDERS
 - NEVER reply about product availability without calling search_products first
 - Provide direct contact information instead of website references
-
-Current time: {self._get_current_time()}
-{self.extra_context if self.extra_context else ""}
 """
\ No newline at end of file
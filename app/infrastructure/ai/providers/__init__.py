@@ -1,21 +1,29 @@
 from abc import ABC, abstractmethod
-from app.domain.interfaces import Completion
-from typing import AsyncGenerator, List, Dict, Any
+from app.domain.interfaces import Completion, StreamResponse
+from typing import AsyncGenerator, AsyncIterator, List, Dict, Any
 
 class ChatProvider(ABC):
+    """
+    Base class for streaming chat providers.
+
+    Implementations must be fully asynchronous: completions are requested with
+    an async client (``AsyncOpenAI``) and consumed with ``async for`` so a single
+    worker can multiplex many in-flight streams on its event loop.
+    """
+
     @abstractmethod
     async def request(
         self, 
         messages: List[Dict[str, str]], 
         **kwargs
-    ) -> AsyncGenerator[str, None]:
-        """Process and stream chat completion requests"""
+    ) -> AsyncGenerator[StreamResponse, None]:
+        """Process and stream chat completion requests as typed events"""
         pass
 
     @abstractmethod
     async def stream(
         self,
-        completion: List[Completion]
-    ) -> AsyncGenerator[str, None]:
+        completion: AsyncIterator[Completion]
+    ) -> AsyncGenerator[StreamResponse, None]:
         """Handle streaming of completion responses"""
         pass
\ No newline at end of file
@@ -1,5 +1,4 @@
-import json
-from openai import OpenAI
+from openai import AsyncOpenAI
 from app.domain.interfaces import (
     StreamResponse,
     StreamResponseType,
@@ -8,7 +7,7 @@ from app.domain.interfaces import (
 from . import ChatProvider
 from app.api.dependencies import logger
 from app.domain.interfaces import Message
-from typing import List, Dict, Any, AsyncGenerator
+from typing import List, Dict, Any, AsyncGenerator, AsyncIterator
 from app.domain.errors import StreamProcessingError
 
 
@@ -17,13 +16,13 @@ class CloudflareProvider(ChatProvider):
     CloudflareProvider handles chat completions using OpenAI's API through Cloudflare
     """
 
-    def __init__(self, client: OpenAI, model: str):
+    def __init__(self, client: AsyncOpenAI, model: str):
         self.model = model
         self.client = client
 
     async def request(
         self, messages: List[Dict[str, str]], **kwargs: Any
-    ) -> AsyncGenerator[str, None]:  # Changed return type to str
+    ) -> AsyncGenerator[StreamResponse, None]:
         """
         Process chat completion request with streaming support
         """
@@ -37,7 +36,7 @@ class CloudflareProvider(ChatProvider):
             if kwargs:
                 completion_params.update(kwargs)
 
-            completion = self.client.with_options(
+            completion = await self.client.with_options(
                 max_retries=1, timeout=60 * 2
             ).chat.completions.create(**completion_params)
 
@@ -46,24 +45,24 @@ class CloudflareProvider(ChatProvider):
 
         except Exception as e:
             error_msg = f"Chat completion failed: {str(e)}"
-            yield f"data: {json.dumps({'error': error_msg})}\n\n"
+            yield StreamResponse(type=StreamResponseType.ERROR, content="", error=error_msg)
             raise StreamProcessingError(error_msg)
 
-    async def stream(self, completion: List[Completion]) -> AsyncGenerator[str, None]:
+    async def stream(
+        self, completion: AsyncIterator[Completion]
+    ) -> AsyncGenerator[StreamResponse, None]:
         """
         Process the completion stream and handle different response types
         """
         try:
-            for chunk in completion:
+            async for chunk in completion:
                 if chunk.response:
-                    content = chunk.response
-                    response = StreamResponse(
-                        type=StreamResponseType.TOKEN, content=content
+                    yield StreamResponse(
+                        type=StreamResponseType.TOKEN, content=chunk.response
                     )
-                    yield f"data: {json.dumps({'token': response.content})}\n\n"
         except Exception as e:
             error_msg = f"Stream processing failed: {str(e)}"
-            yield f"data: {json.dumps({'error': error_msg})}\n\n"
+            yield StreamResponse(type=StreamResponseType.ERROR, content="", error=error_msg)
             raise StreamProcessingError(error_msg)
 
     async def generate_suggestions(
@@ -93,24 +92,15 @@ Only generate questions that can be answered using the provided business context
         messages = [
             {"role": "system", "content": prompt},
         ]
-        suggestions_str = ""
-        async for chunk in self.request(
+        parts = []
+        async for event in self.request(
             messages=messages,
         ):
-            chunk_data = self._parse_chunk(chunk=chunk)
-            if "token" in chunk_data:
-                suggestions_str += chunk_data["token"]
+            if event.type == StreamResponseType.TOKEN:
+                parts.append(event.content)
+        suggestions_str = "".join(parts)
 
         suggestions = [q.strip() for q in suggestions_str.replace("<|im_end|>", "").replace("-", "").split("\n") if q.strip()][
             :3
         ]
         return suggestions
-
-    def _parse_chunk(self, chunk: str) -> Dict[str, Any]:
-        """Parse streaming chunk data"""
-        try:
-            if chunk.startswith("data: "):
-                chunk = chunk[6:]
-            return json.loads(chunk)
-        except json.JSONDecodeError:
-            return {"token": chunk}
\ No newline at end of file
@@ -1,10 +1,10 @@
-import json
-from openai import OpenAI
+from openai import AsyncOpenAI
 from . import ChatProvider
 from openai.types.chat.chat_completion_chunk import ChatCompletionChunk
 from app.domain.interfaces import StreamResponse, StreamResponseType, Message
-from typing import List, Dict, Any, AsyncGenerator
+from typing import List, Dict, Any, AsyncGenerator, AsyncIterator
 from app.domain.errors import StreamProcessingError
+from app.infrastructure.ai.tools.parser import tool_call_from_dict
 
 
 class OpenAIProvider(ChatProvider):
@@ -12,13 +12,13 @@ class OpenAIProvider(ChatProvider):
     OpenAIProvider handles chat completions using OpenAI's direct API
     """
 
-    def __init__(self, client: OpenAI, model: str):
+    def __init__(self, client: AsyncOpenAI, model: str):
         self.model = model
         self.client = client
 
     async def request(
         self, messages: List[Message], **kwargs: Any
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[StreamResponse, None]:
         """
         Process chat completion request with streaming support
         """
@@ -32,7 +32,7 @@ class OpenAIProvider(ChatProvider):
             if kwargs:
                 completion_params.update(kwargs)
 
-            completion = self.client.with_options(
+            completion = await self.client.with_options(
                 max_retries=1, timeout=60 * 2
             ).chat.completions.create(**completion_params)
 
@@ -44,45 +44,38 @@ class OpenAIProvider(ChatProvider):
             raise StreamProcessingError(error_msg)
 
     async def stream(
-        self, completion: List[ChatCompletionChunk]
-    ) -> AsyncGenerator[str, None]:
+        self, completion: AsyncIterator[ChatCompletionChunk]
+    ) -> AsyncGenerator[StreamResponse, None]:
         """
         Process the completion stream and handle different response types
         """
-        function_call = None
-        function_name = ""
-        function_arguments = ""
-        stream_ended = False
+        # Native tool calls arrive as per-index deltas: the name once, the
+        # arguments JSON in fragments. Each is decoded once it is complete.
+        tool_calls: Dict[int, Dict[str, str]] = {}
         try:
-            for chunk in completion:
-                if hasattr(chunk.choices[0].delta, "content"):
-                    content = chunk.choices[0].delta.content
-                    if content:
-                        response = StreamResponse(
-                            type=StreamResponseType.TOKEN, content=content
-                        )
-                        yield f"data: {json.dumps({'token': response.content})}\n\n"
+            async for chunk in completion:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                content = choice.delta.content
+                if content:
+                    yield StreamResponse(type=StreamResponseType.TOKEN, content=content)
 
-                if hasattr(chunk.choices[0].delta, "tool_calls"):
-                    tool_calls = chunk.choices[0].delta.tool_calls
-                    if tool_calls:
-                        function_call = tool_calls[0].function
-                        function_name += function_call.name if function_call.name  else ""
-                        function_arguments += function_call.arguments if function_call.arguments else ""
-                    if chunk.choices[0].finish_reason == "tool_calls":
-                        stream_ended = True
+                for delta in choice.delta.tool_calls or []:
+                    call = tool_calls.setdefault(delta.index, {"name": "", "arguments": ""})
+                    if delta.function and delta.function.name:
+                        call["name"] += delta.function.name
+                    if delta.function and delta.function.arguments:
+                        call["arguments"] += delta.function.arguments
 
-                    if stream_ended:
-                        function_name = f'"{function_name}"'
-                        response = StreamResponse(
-                            type=StreamResponseType.TOKEN,
-                            content="""<tool_call>{"name": """
-                            + function_name
-                            + ""","arguments": """
-                            + function_arguments
-                            + """}</tool_call>""",
+                if choice.finish_reason and tool_calls:
+                    for _, call in sorted(tool_calls.items()):
+                        yield StreamResponse(
+                            type=StreamResponseType.TOOL_CALL,
+                            content=call["arguments"],
+                            tool_call=tool_call_from_dict(call),
                         )
-                        yield f"data: {json.dumps({'token': response.content})}\n\n"
+                    tool_calls = {}
         except Exception as e:
             error_msg = f"Stream processing failed: {str(e)}"
             raise StreamProcessingError(error_msg)
@@ -0,0 +1,143 @@
+import time
+import hashlib
+import logging
+import httpx
+from openai import AsyncOpenAI
+from dataclasses import dataclass, field
+from typing import Dict, Any, Tuple, Optional
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PooledClient:
+    client: AsyncOpenAI
+    http_client: httpx.AsyncClient
+    base_url: str
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    requests: int = 0
+    leases: int = 0
+
+
+class LLMClientRegistry:
+    """
+    Process-wide registry of long-lived AsyncOpenAI clients keyed by AI provider
+    (endpoint URL + API key). Each client owns an httpx connection pool, so
+    consecutive turns and recursive tool turns reuse keep-alive connections
+    instead of paying a new TLS handshake per message.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self._clients: Dict[Tuple[str, str], _PooledClient] = {}
+        self._stats = {
+            "clients_created": 0,
+            "client_reuses": 0,
+            "clients_evicted": 0,
+        }
+
+    @staticmethod
+    def _key(base_url: str, api_key: str) -> Tuple[str, str]:
+        return base_url, hashlib.sha256((api_key or "").encode()).hexdigest()
+
+    def _create(self, base_url: str, api_key: str) -> _PooledClient:
+        limits = httpx.Limits(
+            max_connections=self.config.LLM_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=self.config.LLM_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=self.config.LLM_POOL_KEEPALIVE_EXPIRY,
+        )
+        pooled: Optional[_PooledClient] = None
+
+        async def count_request(request: httpx.Request):
+            pooled.requests += 1
+
+        hooks = {"request": [count_request]}
+        try:
+            http_client = httpx.AsyncClient(
+                http2=self.config.LLM_HTTP2, limits=limits, event_hooks=hooks
+            )
+        except ImportError:
+            logger.warning("HTTP/2 support unavailable (install 'h2'), using HTTP/1.1")
+            http_client = httpx.AsyncClient(limits=limits, event_hooks=hooks)
+
+        client = AsyncOpenAI(base_url=base_url, api_key=api_key, http_client=http_client)
+        pooled = _PooledClient(client=client, http_client=http_client, base_url=base_url)
+        return pooled
+
+    async def get_client(self, base_url: str, api_key: str) -> AsyncOpenAI:
+        """Return the pooled client for an endpoint, creating it on first use"""
+        await self.evict_idle()
+
+        key = self._key(base_url, api_key)
+        pooled = self._clients.get(key)
+        if pooled is None:
+            pooled = self._create(base_url, api_key)
+            self._clients[key] = pooled
+            self._stats["clients_created"] += 1
+            logger.info(f"Created pooled LLM client for {base_url}")
+        else:
+            self._stats["client_reuses"] += 1
+
+        pooled.leases += 1
+        pooled.last_used = time.monotonic()
+        return pooled.client
+
+    async def get_provider_client(self, ai_provider: Any) -> AsyncOpenAI:
+        """Return the pooled client for a model's `aiProvider` record"""
+        return await self.get_client(ai_provider.endpointUrl, ai_provider.apiKey)
+
+    async def evict_idle(self) -> None:
+        """Close clients that have not been used within LLM_CLIENT_IDLE_TTL"""
+        now = time.monotonic()
+        expired = [
+            key
+            for key, pooled in self._clients.items()
+            if now - pooled.last_used > self.config.LLM_CLIENT_IDLE_TTL
+        ]
+        for key in expired:
+            pooled = self._clients.pop(key)
+            self._stats["clients_evicted"] += 1
+            logger.info(f"Evicting idle LLM client for {pooled.base_url}")
+            await self._close(pooled)
+
+    async def close(self) -> None:
+        """Close every pooled client; called on application shutdown"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for pooled in clients:
+            await self._close(pooled)
+
+    async def _close(self, pooled: _PooledClient) -> None:
+        try:
+            await pooled.client.close()
+        except Exception as e:
+            logger.error(f"Error closing LLM client for {pooled.base_url}: {str(e)}")
+
+    @staticmethod
+    def _open_connections(pooled: _PooledClient) -> int:
+        # httpx does not expose its pool publicly; best-effort introspection
+        try:
+            return len(pooled.http_client._transport._pool.connections)
+        except AttributeError:
+            return 0
+
+    def metrics(self) -> Dict[str, Any]:
+        """Connection reuse metrics for every pooled client"""
+        clients = []
+        for pooled in self._clients.values():
+            connections = self._open_connections(pooled)
+            clients.append(
+                {
+                    "base_url": pooled.base_url,
+                    "leases": pooled.leases,
+                    "requests": pooled.requests,
+                    "open_connections": connections,
+                    "connection_reuse_ratio": (
+                        1 - connections / pooled.requests if pooled.requests else 0.0
+                    ),
+                    "idle_seconds": round(time.monotonic() - pooled.last_used, 3),
+                }
+            )
+        return {**self._stats, "clients": clients}
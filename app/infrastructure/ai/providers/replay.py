@@ -0,0 +1,34 @@
+import re
+from . import ChatProvider
+from app.domain.interfaces import StreamResponse, StreamResponseType
+from typing import List, Dict, Any, AsyncGenerator, AsyncIterator
+
+
+class ReplayProvider(ChatProvider):
+    """
+    ReplayProvider streams a previously generated answer (e.g. from the
+    response cache) in the same frames as the live providers
+    """
+
+    WORDS_PER_TOKEN = 4
+
+    def __init__(self, answer: str):
+        self.answer = answer
+
+    async def request(
+        self, messages: List[Dict[str, str]], **kwargs: Any
+    ) -> AsyncGenerator[StreamResponse, None]:
+        async for response in self.stream(self._tokens()):
+            yield response
+
+    async def _tokens(self) -> AsyncIterator[str]:
+        # Split before each word so whitespace and newlines are kept verbatim
+        words = re.split(r"(?<=\s)(?=\S)", self.answer)
+        for start in range(0, len(words), self.WORDS_PER_TOKEN):
+            yield "".join(words[start : start + self.WORDS_PER_TOKEN])
+
+    async def stream(
+        self, completion: AsyncIterator[str]
+    ) -> AsyncGenerator[StreamResponse, None]:
+        async for token in completion:
+            yield StreamResponse(type=StreamResponseType.TOKEN, content=token)
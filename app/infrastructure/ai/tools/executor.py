@@ -0,0 +1,80 @@
+import json
+import asyncio
+import logging
+from dataclasses import dataclass
+from app.domain.interfaces import ToolCall
+from typing import Any, Awaitable, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+NO_RESULTS = "No results found."
+
+
+@dataclass
+class ToolResult:
+    tool_call: ToolCall
+    content: str
+    failed: bool = False
+
+
+class ToolExecutor:
+    """
+    Runs the tool calls of one model turn concurrently. Each call gets its
+    own timeout, and results are serialized as JSON and capped in size.
+    A call that fails, times out or names an unknown tool yields an error
+    result instead of aborting the turn, so the follow-up completion still
+    sees the results of its siblings.
+    """
+
+    def __init__(
+        self,
+        functions: Dict[str, Callable[..., Awaitable[Any]]],
+        timeout: float,
+        max_result_chars: int,
+    ):
+        self.functions = functions
+        self.timeout = timeout
+        self.max_result_chars = max_result_chars
+
+    async def run(self, tool_calls: List[ToolCall]) -> List[ToolResult]:
+        """Execute every call at once; results keep the order of `tool_calls`"""
+        return list(await asyncio.gather(*(self._run_one(call) for call in tool_calls)))
+
+    async def _run_one(self, tool_call: ToolCall) -> ToolResult:
+        function = self.functions.get(tool_call.name)
+        if function is None:
+            return ToolResult(tool_call, f"Unknown function: {tool_call.name}", failed=True)
+        try:
+            result = await asyncio.wait_for(
+                function(**(tool_call.arguments or {})), self.timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Tool {tool_call.name} timed out after {self.timeout}s")
+            return ToolResult(
+                tool_call, f"{tool_call.name} timed out, try again later.", failed=True
+            )
+        except Exception as e:
+            logger.error(f"Tool {str(tool_call)} failed: {str(e)}")
+            return ToolResult(tool_call, f"{tool_call.name} failed: {str(e)}", failed=True)
+        logger.info(f"EXECUTED TOOL: {str(tool_call)}")
+        return ToolResult(tool_call, self._format(result))
+
+    def _format(self, result: Any) -> str:
+        if result in ([], None, "", "[]", {}):
+            return NO_RESULTS
+        if isinstance(result, str):
+            text = result
+        else:
+            text = json.dumps(result, default=str)
+        if len(text) <= self.max_result_chars:
+            return text
+
+        if isinstance(result, list):
+            # Drop whole rows so the model still gets valid JSON
+            keep = len(result)
+            while keep > 1 and len(text) > self.max_result_chars:
+                keep -= 1
+                text = json.dumps(result[:keep], default=str)
+            if len(text) <= self.max_result_chars:
+                return f"{text}\n({len(result) - keep} more results omitted)"
+        return text[: self.max_result_chars] + "... (truncated)"
@@ -1,69 +1,119 @@
+import re
 from app.core.database import db
 from app.utils import split_camel_case, is_positive_integer
-from typing import List, Dict, Any, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.services.product_search import ProductSearchEngine
+from app.services.business_cache import BusinessCache
+from app.services.business_facts import BusinessFacts
+from app.repositories.business import BusinessRepository
 
 
 class BusinessFunctions:
-    def __init__(self, business_id: str):
+    # Expressions must match the GIN indexes in the chat_hot_path_indexes migration
+    SEARCH_PRODUCTS_QUERY = """
+        WITH q AS (SELECT to_tsquery('english', $2) AS query),
+        matches AS (
+            SELECT p."id"
+            FROM "products" p, q
+            WHERE p."businessId" = $1
+              AND p."isActive" = true
+              AND to_tsvector('english', coalesce(p."name", '') || ' ' || coalesce(p."description", '')) @@ q.query
+            UNION
+            SELECT p."id"
+            FROM "products" p
+            JOIN "categories" c ON c."id" = p."categoryId", q
+            WHERE p."businessId" = $1
+              AND p."isActive" = true
+              AND to_tsvector('english', c."name") @@ q.query
+        )
+        SELECT p."id", p."name", p."description", p."price", p."stock", p."images",
+               c."name" AS "category"
+        FROM "products" p
+        JOIN matches m ON m."id" = p."id"
+        LEFT JOIN "categories" c ON c."id" = p."categoryId", q
+        ORDER BY ts_rank(to_tsvector('english', p."name"), q.query) DESC, p."name" ASC
+        LIMIT $3
+    """
+
+    def __init__(
+        self,
+        business_id: str,
+        search_engine: Optional[ProductSearchEngine] = None,
+        business_cache: Optional[BusinessCache] = None,
+    ):
         self.prisma = db.prisma
         self.business_id = business_id
+        self.search_engine = search_engine
+        self.business_cache = business_cache
+
+    @property
+    def reader(self):
+        # Per call, so reads follow the replica connecting or dropping
+        return db.reader
+
+    def tool_functions(self) -> Dict[str, Callable[..., Awaitable[Any]]]:
+        """Functions the model may call, by tool name"""
+        return {
+            "search_products": self.search_products,
+            "check_product_availability": self.check_product_availability,
+            "get_locations": self.get_locations,
+            "get_delivery_info": self.get_delivery_info,
+            "get_categories": self.get_categories,
+            "get_business_policies": self.get_business_policies,
+        }
 
     async def search_products(
         self,
         query: str,
     ) -> List[Dict[str, Any]]:
         """Search products with filters (name, description, category, brand)."""
-        where = {}
         if query == "*LATEST*":
-            where = {
-                "businessId": self.business_id,
-                "isActive": True,
-            }
-        else:
-            formatted_query = " | ".join(f"{word}:*" for word in query.lower().split())
-            where = {
-                "OR": [
-                    {"name": {"search": formatted_query}},
-                    {"description": {"search": formatted_query}},
-                    {
-                        "category": {
-                            "name": {
-                                "search": formatted_query,
-                            }
-                        }
-                    },
-                ],
-                "businessId": self.business_id,
-                "isActive": True,
-            }
-        
-        order = [{"name": "asc"}]
-        if query != "*LATEST*":
-            order = [
+            products = await self.reader.businessproduct.find_many(
+                where={
+                    "businessId": self.business_id,
+                    "isActive": True,
+                },
+                include={"category": True},
+                take=15,
+                order=[{"name": "asc"}],
+            )
+            return [
                 {
-                    "_relevance": {
-                        "fields": ["name"],
-                        "search": formatted_query,
-                        "sort": "desc"
-                    }
+                    "id": product.id,
+                    "name": product.name,
+                    "description": product.description,
+                    "price": product.price,
+                    "stock": product.stock,
+                    "category": product.category.name if product.category else None,
+                    "images": product.images,
                 }
+                for product in products
             ]
-        
-        products = await self.prisma.businessproduct.find_many(
-            where=where,
-            include={"category": True},
-            take=15,
-            order=order
+
+        if self.search_engine and self.search_engine.enabled:
+            return await self.search_engine.search(self.business_id, query, limit=15)
+
+        # Keep only word characters so user input can't break to_tsquery syntax
+        words = re.findall(r"\w+", query.lower())
+        if not words:
+            return []
+        formatted_query = " | ".join(f"{word}:*" for word in words)
+
+        products = await self.reader.query_raw(
+            self.SEARCH_PRODUCTS_QUERY, self.business_id, formatted_query, 15
         )
+        if not products and self.search_engine and self.search_engine.fuzzy_fallback:
+            # Misspelled terms never match the prefix tsquery
+            return await self.search_engine.search(self.business_id, query, limit=15)
         return [
             {
-                "id": product.id,
-                "name": product.name,
-                "description": product.description,
-                "price": product.price,
-                "stock": product.stock,
-                "category": product.category.name if product.category else None,
-                "images": product.images,
+                "id": product["id"],
+                "name": product["name"],
+                "description": product["description"],
+                "price": product["price"],
+                "stock": product["stock"],
+                "category": product["category"],
+                "images": product["images"],
             }
             for product in products
         ]
@@ -72,112 +122,72 @@ class BusinessFunctions:
         self, product_id: str, location_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Check product stock availability."""
-        product = await self.prisma.businessproduct.find_unique(
-            where={"id": product_id},
+        product = await self.prisma.businessproduct.find_first(
+            where={"id": product_id, "businessId": self.business_id},
         )
+        if not product:
+            return {}
 
-        in_stock = "No"
         stock_value = product.stock
         if is_positive_integer(stock_value):
-            in_stock = int(stock_value) > 0 
+            in_stock = "Yes" if int(stock_value) > 0 else "No"
         elif stock_value == "IN_STOCK":
             in_stock = "Yes"
         else:
             in_stock = "No"
         return {
-            "product_name": in_stock,
-            "in_stock": stock_value,
+            "product_name": product.name,
+            "in_stock": in_stock,
             "stock_count": product.stock,
             "location": location_id if location_id else "all",
         }
 
-    async def get_locations(self, city: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get business locations with optional city filter."""
-        where = {"city": city} if city else {}
-
-        locations = await self.prisma.businesslocation.find_many(
-            where=where, include={"hours": True}
+    async def _facts(self) -> BusinessFacts:
+        if self.business_cache:
+            return await self.business_cache.get_facts(self.business_id)
+        repo = BusinessRepository(self.prisma)
+        return BusinessFacts.build(
+            await repo.get_business_data(self.business_id),
+            await repo.get_category_counts(self.business_id),
         )
 
-        return [
-            {
-                "id": loc.id,
-                "name": loc.name,
-                "address": loc.address,
-                "city": loc.city,
-                "phone": loc.phone,
-                "email": loc.email,
-                "is_main": loc.isMain,
-                "operating_hours": [
-                    {
-                        "day": hour.dayOfWeek,
-                        "open_time": hour.openTime,
-                        "close_time": hour.closeTime,
-                        "is_closed": hour.isClosed,
-                    }
-                    for hour in loc.hours
-                ],
-            }
-            for loc in locations
-        ]
+    async def get_locations(self, city: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get business locations with optional city filter."""
+        locations = (await self._facts()).locations
+        if city:
+            city = city.strip().lower()
+            locations = [loc for loc in locations if (loc["city"] or "").lower() == city]
+        return locations
 
     async def get_delivery_info(self, total_amount: float) -> Dict[str, Any]:
         """Calculate delivery availability and fees."""
-        config = await self.prisma.businessconfig.find_first()
+        delivery = (await self._facts()).delivery
+        if not delivery.get("available"):
+            return {"available": False, "message": "Delivery is not available"}
 
-        if total_amount < config.minDeliveryOrderAmount:
+        min_amount = delivery["min_amount"] or 0
+        if total_amount < min_amount:
             return {
                 "available": False,
-                "message": f"Minimum order amount for delivery is {config.minDeliveryOrderAmount}",
-                "min_amount": config.minDeliveryOrderAmount,
+                "message": f"Minimum order amount for delivery is {min_amount}",
+                "min_amount": min_amount,
             }
 
+        fee = delivery["fee"] or 0
         return {
             "available": True,
-            "delivery_fee": config.deliveryFee,
-            "estimated_delivery_arrival": config.estimatedDeliveryArrival,
-            "total_with_delivery": total_amount + config.deliveryFee,
+            "delivery_fee": fee,
+            "estimated_delivery_arrival": delivery["estimated_delivery_arrival"],
+            "total_with_delivery": total_amount + fee,
         }
 
     async def get_categories(self) -> List[Dict[str, Any]]:
         """Get all product categories."""
-        categories = await self.prisma.productcategory.find_many(
-            include={"products": {"select": {"id": True}}}
-        )
-
-        return [
-            {
-                "id": cat.id,
-                "name": cat.name,
-                "description": cat.description,
-                "product_count": len(cat.products),
-            }
-            for cat in categories
-        ]
+        return (await self._facts()).categories
 
     async def get_business_policies(
         self, policy_type: Optional[str] = None
     ) -> Dict[str, Any]:
         """Get business policies."""
-        config = await self.prisma.businessconfig.find_first()
-        business = await self.prisma.business.find_first()
-
-        policies = {
-            "returns": {
-                "available": config.acceptsReturns,
-                "period_days": config.returnPeriod,
-                "conditions": "Item must be unused and in original packaging",
-            },
-            "warranty": {
-                "available": config.hasWarranty,
-                "period_days": config.warrantyPeriod,
-                "conditions": "Covers manufacturing defects",
-            },
-            "delivery": {
-                "available": config.hasDelivery,
-                "min_amount": config.minDeliveryOrderAmount,
-                "fee": config.deliveryFee,
-            },
-        }
-
-        return policies[policy_type] if policy_type else policies
+        policies = (await self._facts()).policies
+        return policies.get(policy_type, policies) if policy_type else policies
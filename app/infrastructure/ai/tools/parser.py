@@ -0,0 +1,113 @@
+import json
+from typing import Any, Dict, List
+from app.domain.interfaces import StreamResponse, StreamResponseType, ToolCall
+
+OPEN_TAG = "<tool_call>"
+CLOSE_TAG = "</tool_call>"
+
+
+def parse_tool_call(payload: str) -> ToolCall:
+    """Decode a `{"name": ..., "arguments": ...}` tool call body"""
+    try:
+        data = json.loads(payload)
+    except json.JSONDecodeError:
+        # Some models emit Python reprs (single quotes, None) instead of JSON
+        lenient = payload.replace("None", "null").replace("'", '"')
+        try:
+            data = json.loads(lenient)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid tool call content: {payload}") from e
+    if not isinstance(data, dict):
+        raise ValueError(f"Invalid tool call content: {payload}")
+    return tool_call_from_dict(data)
+
+
+def tool_call_from_dict(data: Dict[str, Any]) -> ToolCall:
+    """Build a ToolCall; `arguments` may be a dict or a JSON string (OpenAI deltas)"""
+    if not data.get("name"):
+        raise ValueError(f"Tool call without a function name: {data}")
+    arguments = data.get("arguments") or {}
+    if isinstance(arguments, str):
+        try:
+            arguments = json.loads(arguments) if arguments.strip() else {}
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid tool call arguments: {arguments}") from e
+    return ToolCall(name=data["name"], arguments=arguments)
+
+
+def _partial_tag_length(text: str, tag: str) -> int:
+    """Length of the longest suffix of `text` that is a proper prefix of `tag`"""
+    for length in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:length]):
+            return length
+    return 0
+
+
+class ToolCallStreamParser:
+    """
+    Incremental parser for `<tool_call>{...}</tool_call>` blocks embedded
+    in a token stream. Each token is scanned once: text outside the tags is
+    released as TOKEN events as soon as it can't be the start of a tag, and
+    each closed block becomes a TOOL_CALL event, so tags split across
+    chunks and several calls in one completion are handled.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._call_parts: List[str] = []
+        self.collecting = False
+        self.tool_calls: List[ToolCall] = []
+
+    def feed(self, token: str) -> List[StreamResponse]:
+        events: List[StreamResponse] = []
+        text = self._buffer + token
+        self._buffer = ""
+        while text:
+            if self.collecting:
+                end = text.find(CLOSE_TAG)
+                if end == -1:
+                    keep = _partial_tag_length(text, CLOSE_TAG)
+                    self._call_parts.append(text[: len(text) - keep])
+                    self._buffer = text[len(text) - keep :]
+                    break
+                self._call_parts.append(text[:end])
+                events.append(self._close_call())
+                text = text[end + len(CLOSE_TAG) :]
+            else:
+                start = text.find(OPEN_TAG)
+                if start == -1:
+                    keep = _partial_tag_length(text, OPEN_TAG)
+                    self._emit_text(events, text[: len(text) - keep])
+                    self._buffer = text[len(text) - keep :]
+                    break
+                self._emit_text(events, text[:start])
+                self.collecting = True
+                text = text[start + len(OPEN_TAG) :]
+        return events
+
+    def finish(self) -> List[StreamResponse]:
+        """Flush held-back text at the end of the stream"""
+        if self.collecting:
+            raise ValueError(f"Unterminated tool call: {''.join(self._call_parts)}")
+        events: List[StreamResponse] = []
+        self._emit_text(events, self._buffer)
+        self._buffer = ""
+        return events
+
+    def _emit_text(self, events: List[StreamResponse], text: str) -> None:
+        if text:
+            events.append(StreamResponse(type=StreamResponseType.TOKEN, content=text))
+
+    def _close_call(self) -> StreamResponse:
+        payload = "".join(self._call_parts).strip()
+        self._call_parts = []
+        self.collecting = False
+        tool_call = parse_tool_call(payload)
+        self.tool_calls.append(tool_call)
+        return StreamResponse(
+            type=StreamResponseType.TOOL_CALL, content=payload, tool_call=tool_call
+        )
+
+    def add(self, tool_call: ToolCall) -> None:
+        """Record a tool call the provider delivered natively rather than as tags"""
+        self.tool_calls.append(tool_call)
@@ -1,3 +1,5 @@
+from functools import lru_cache
+from typing import Literal, Optional
 from pydantic.v1 import BaseModel, Field
 from langchain.tools import StructuredTool
 from langchain_core.utils.function_calling import convert_to_openai_tool
@@ -8,17 +10,48 @@ class SearchProducts(BaseModel):
         description="The name/brand/category/description key of the product to search for."
     )
 
+class CheckProductAvailability(BaseModel):
+    product_id: str = Field(description="The id of a product returned by search_products.")
+    location_id: Optional[str] = Field(
+        default=None, description="Optional id of the location to check."
+    )
+
+class GetLocations(BaseModel):
+    city: Optional[str] = Field(default=None, description="Only return locations in this city.")
+
+class GetDeliveryInfo(BaseModel):
+    total_amount: float = Field(description="The order total, in the business currency.")
+
+class GetCategories(BaseModel):
+    pass
+
+class GetBusinessPolicies(BaseModel):
+    policy_type: Optional[Literal["returns", "warranty", "delivery"]] = Field(
+        default=None, description="A single policy to return; all policies when omitted."
+    )
+
 def get_all_business_tools() -> list[StructuredTool]:
     business_functions = BusinessFunctions("-")
     search_products = StructuredTool.from_function(description="Search for products with filters.", func=business_functions.search_products, name="search_products", args_schema=SearchProducts)
+    check_product_availability = StructuredTool.from_function(description="Check whether a product is in stock.", func=business_functions.check_product_availability, name="check_product_availability", args_schema=CheckProductAvailability)
+    get_locations = StructuredTool.from_function(description="List the business locations with their opening hours.", func=business_functions.get_locations, name="get_locations", args_schema=GetLocations)
+    get_delivery_info = StructuredTool.from_function(description="Check delivery availability and fees for an order total.", func=business_functions.get_delivery_info, name="get_delivery_info", args_schema=GetDeliveryInfo)
+    get_categories = StructuredTool.from_function(description="List product categories with their product counts.", func=business_functions.get_categories, name="get_categories", args_schema=GetCategories)
+    get_business_policies = StructuredTool.from_function(description="Get return, warranty and delivery policies.", func=business_functions.get_business_policies, name="get_business_policies", args_schema=GetBusinessPolicies)
 
     business_tools = [
         search_products,
+        check_product_availability,
+        get_locations,
+        get_delivery_info,
+        get_categories,
+        get_business_policies,
     ]
     return business_tools
 
+@lru_cache()
 def get_all_business_functions():
-    """Convert business tools to OpenAI function format."""
+    """Convert business tools to OpenAI function format (built once per process)."""
     business_tools = get_all_business_tools()
     business_functions = [convert_to_openai_tool(f) for f in business_tools]
-    return business_functions
\ No newline at end of file
+    return business_functions
@@ -1,10 +1,32 @@
 import logging
+import secrets
+from typing import Optional
 from app.core.database import db
 from contextlib import asynccontextmanager
 from app.api.routes import chat as chats_router
+from app.api.routes import sources as sources_router
+from app.api.routes import metrics as metrics_router
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, Header, HTTPException
 from app.core.logging import setup_logging
+from app.api.dependencies import (
+    get_config,
+    get_bot_cache,
+    get_business_cache,
+    get_context_window_manager,
+    get_db_health_monitor,
+    get_llm_client_registry,
+    get_message_persister,
+    get_metrics_exporter,
+    get_notification_listener,
+    get_product_search_engine,
+    get_retrieval_service,
+)
+from app.services.bot_cache import BOTS_CHANGED_CHANNEL
+from app.services.business_cache import BUSINESS_CHANGED_CHANNEL
+from app.services.context_window import CHATS_DELETED_CHANNEL
+from app.services.product_search import PRODUCTS_CHANGED_CHANNEL
+from app.services.retrieval import BOT_SOURCES_CHANGED_CHANNEL
 
 # Setup logging at application startup
 setup_logging()
@@ -18,10 +40,39 @@ async def lifespan(app: FastAPI):
         logger.info("Starting up application...")
         await db.connect()
         logger.info("Database connected successfully")
+        get_db_health_monitor().start()
+        get_message_persister().start()
+        get_metrics_exporter().start()
+        if get_config().DB_NOTIFY_ENABLED:
+            listener = get_notification_listener()
+            listener.subscribe(BOTS_CHANGED_CHANNEL, get_bot_cache().handle_notification)
+            listener.subscribe(
+                CHATS_DELETED_CHANNEL, get_context_window_manager().handle_notification
+            )
+            listener.subscribe(
+                BUSINESS_CHANGED_CHANNEL, get_business_cache().handle_notification
+            )
+            listener.subscribe(
+                PRODUCTS_CHANGED_CHANNEL, get_business_cache().handle_products_notification
+            )
+            listener.subscribe(
+                BOT_SOURCES_CHANGED_CHANNEL, get_retrieval_service().handle_notification
+            )
+            if get_config().PRODUCT_SEARCH_INDEX or get_config().PRODUCT_FUZZY_SEARCH:
+                listener.subscribe(
+                    PRODUCTS_CHANGED_CHANNEL,
+                    get_product_search_engine().handle_notification,
+                )
+            await listener.start()
         yield
     finally:
         # Shutdown
         logger.info("Shutting down application...")
+        await get_metrics_exporter().stop()
+        await get_notification_listener().stop()
+        await get_db_health_monitor().stop()
+        await get_message_persister().close()
+        await get_llm_client_registry().close()
         await db.disconnect()
         logger.info("Database disconnected successfully")
 
@@ -43,18 +94,35 @@ app.add_middleware(
 
 
 async def verify_db():
-    if not await db.verify_connection():
-        try:
-            await db.connect()
-        except Exception as e:
-            logger.error(f"Database connection failed: {str(e)}")
-            raise HTTPException(status_code=503, detail="Database connection error")
+    # The health monitor probes in the background; requests only read its state
+    if not get_db_health_monitor().available:
+        raise HTTPException(status_code=503, detail="Database connection error")
     return db.prisma
 
 
+async def verify_api_key(x_api_key: Optional[str] = Header(None)):
+    expected = get_config().ADMIN_API_KEY
+    if not expected or not x_api_key or not secrets.compare_digest(x_api_key, expected):
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+
 app.include_router(
     chats_router.router,
     prefix="/api/v1/bots",
     tags=["chat"],
     dependencies=[Depends(verify_db)],
 )
+
+app.include_router(
+    sources_router.router,
+    prefix="/api/v1/sources",
+    tags=["sources"],
+    dependencies=[Depends(verify_api_key), Depends(verify_db)],
+)
+
+# Not behind verify_db: metrics must stay readable while the database is down
+app.include_router(
+    metrics_router.router,
+    prefix="/metrics",
+    tags=["metrics"],
+)
@@ -1,6 +1,6 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 from prisma import Prisma
-from prisma.models import Business
+from prisma.models import Business, BusinessProduct
 
 
 class BusinessRepository:
@@ -14,3 +14,32 @@ class BusinessRepository:
             include={"configurations": True, "locations": True, "operatingHours": True},
         )
         return business
+
+    async def get_active_products(self, business_id: str) -> List[BusinessProduct]:
+        """Fetch every active product of a business with its category."""
+        return await self.db.businessproduct.find_many(
+            where={"businessId": business_id, "isActive": True},
+            include={"category": True},
+        )
+
+    async def get_category_counts(self, business_id: str) -> List[Dict[str, Any]]:
+        """Categories of a business with their active product counts, in one aggregate query."""
+        return await self.db.query_raw(
+            """
+            SELECT c."id", c."name", c."description",
+                   count(p."id") FILTER (WHERE p."isActive") AS "productCount"
+            FROM "categories" c
+            LEFT JOIN "products" p ON p."categoryId" = c."id"
+            WHERE c."businessId" = $1
+            GROUP BY c."id"
+            ORDER BY c."name"
+            """,
+            business_id,
+        )
+
+    async def get_product(self, product_id: str) -> (BusinessProduct | None):
+        """Fetch a single product with its category."""
+        return await self.db.businessproduct.find_unique(
+            where={"id": product_id},
+            include={"category": True},
+        )
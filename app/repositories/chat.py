@@ -1,20 +1,69 @@
 import httpagentparser
 from prisma import Prisma
-from typing import List, Optional
-from prisma.models import Chat, Bot
+from datetime import datetime
+from typing import Any, List, Optional
+from prisma.models import Chat, Bot, Conversation
 from app.utils import generate_cuid
 from fastapi import Response, Request
 from app.domain.requests import ChatRequest
 from fastapi.exceptions import HTTPException
 from app.domain.validators import CuidValidator
+from app.core.database import Database
 from app.domain.errors import PrismaExecutionError
 
 
 class ChatRepository:
-    def __init__(self, db: Prisma):
+    # Lookup by id, then by (botId, sessionId), then insert; guarded so only
+    # one branch yields a row. Two requests can race to create the same
+    # client-supplied id: the loser's no-op update (same bot only) returns
+    # the winner's row instead of nothing.
+    RESOLVE_CONVERSATION_QUERY = """
+        WITH by_id AS (
+            SELECT * FROM "conversations"
+            WHERE "id" = $1::text AND "botId" = $2
+        ),
+        by_session AS (
+            SELECT * FROM "conversations"
+            WHERE "botId" = $2 AND "sessionId" = $3
+              AND NOT EXISTS (SELECT 1 FROM by_id)
+            ORDER BY "createdAt" DESC
+            LIMIT 1
+        ),
+        inserted AS (
+            INSERT INTO "conversations" ("id", "botId", "sessionId", "countryCode", "createdAt", "updatedAt")
+            SELECT $4, $2, $3, $5, now(), now()
+            WHERE $6::boolean
+              AND NOT EXISTS (SELECT 1 FROM by_id)
+              AND NOT EXISTS (SELECT 1 FROM by_session)
+            ON CONFLICT ("id") DO UPDATE
+                SET "updatedAt" = "conversations"."updatedAt"
+                WHERE "conversations"."botId" = EXCLUDED."botId"
+            RETURNING *
+        )
+        SELECT * FROM by_id
+        UNION ALL SELECT * FROM by_session
+        UNION ALL SELECT * FROM inserted
+        LIMIT 1
+    """
+
+    def __init__(self, db: Prisma, database: Optional[Database] = None):
         self.db = db
+        self.database = database
+
+    @property
+    def reader(self) -> Prisma:
+        """
+        Read replica (or the primary) for reads that tolerate replication lag.
+        Looked up per call: the replica may connect or drop after startup.
+        """
+        return self.database.reader if self.database else self.db
 
     async def get_chats(self, conversation_id: str) -> List[Chat]:
+        """
+        A conversation's messages, oldest first. Read from the primary, like
+        get_chats_since: the context window is built from these rows, and a
+        lagging replica would leave the latest turns out of the prompt.
+        """
         try:
             chats = await self.db.chat.find_many(
                 where={"conversationId": conversation_id}, order={"createdAt": "asc"}
@@ -23,6 +72,19 @@ class ChatRepository:
         except Exception as e:
             raise PrismaExecutionError(f"Failed to get chat history: {str(e)}")
 
+    async def get_chats_since(
+        self, conversation_id: str, since: datetime
+    ) -> List[Chat]:
+        """Get messages created at or after `since`, oldest first"""
+        try:
+            chats = await self.db.chat.find_many(
+                where={"conversationId": conversation_id, "createdAt": {"gte": since}},
+                order={"createdAt": "asc"},
+            )
+            return chats
+        except Exception as e:
+            raise PrismaExecutionError(f"Failed to get chat history: {str(e)}")
+
     async def save_chat_message(self, chat: Chat) -> Chat:
         try:
             created_chat = await self.db.chat.create(data=chat)
@@ -30,16 +92,37 @@ class ChatRepository:
         except Exception as e:
             raise PrismaExecutionError(f"Failed to save chat message: {str(e)}")
 
+    async def save_chat_messages(self, chats: List[dict]) -> int:
+        """Insert several chat messages in a single statement"""
+        try:
+            return await self.db.chat.create_many(data=chats)
+        except Exception as e:
+            raise PrismaExecutionError(f"Failed to save chat messages: {str(e)}")
+
     async def get_bot(self, bot_id: str) -> Optional[Bot]:
         try:
-            bot = await self.db.bot.find_unique(
+            bot = await self.reader.bot.find_unique(
                 where={"id": bot_id},
-                include={"model": {"include": {"aiProvider": True}}},
+                include={"model": True},
             )
             return bot
         except Exception as e:
             raise PrismaExecutionError(f"Failed to get bot: {str(e)}")
 
+    async def get_ai_provider(self, model_id: str) -> Optional[Any]:
+        """
+        The AI provider of a model, read on every message: unlike bots and
+        models its row has no change notification, so it is never cached
+        """
+        try:
+            model = await self.reader.model.find_unique(
+                where={"id": model_id},
+                include={"aiProvider": True},
+            )
+            return model.aiProvider if model else None
+        except Exception as e:
+            raise PrismaExecutionError(f"Failed to get AI provider: {str(e)}")
+
     async def delete_chat(self, chat_id: str):
         try:
             await self.db.chat.delete(where={"id": chat_id})
@@ -107,29 +190,77 @@ class ChatRepository:
         chat_request: ChatRequest,
         request: Request,
         response: Response,
-    ):
-        current_conversation = await self.get_conversation(conversation_id)
-        if current_conversation:
-            return current_conversation
-
+    ) -> Optional[Conversation]:
+        """
+        Resolve the conversation in one round-trip: the given id, else the
+        session's latest conversation with this bot, else a new one. Raises
+        400 for a malformed id and 404 for an id taken by another bot's
+        conversation.
+        """
         session_id = await self.get_or_create_session_id(request, response)
-
-        existing_conversation = await self.db.conversation.find_first(
-            where={"botId": bot_id, "sessionId": session_id},
-            order={"createdAt": "desc"},
-            include={"bot": True},
+        valid_id = conversation_id is not None and CuidValidator.validate_cuid(
+            conversation_id
+        )
+        may_create = conversation_id is None or valid_id
+        conversation = await self._resolve_conversation(
+            bot_id,
+            conversation_id,
+            session_id,
+            new_id=conversation_id if valid_id else generate_cuid(),
+            country_code=request.headers.get("CF-IPCountry"),
+            may_create=may_create,
         )
 
-        if existing_conversation:
-            return existing_conversation
+        if conversation is None and not may_create:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid conversation ID format. Must be a valid CUID.",
+            )
+        if conversation is None:
+            # The insert hit an id that belongs to another bot's conversation
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        return conversation
 
-        return await self.create_conversation(
-            bot_id=bot_id,
-            chat_request=chat_request,
-            request=request,
-            response=response,
-            conversation_id=conversation_id,
+    async def get_session_conversation(
+        self, bot_id: str, conversation_id: str, request: Request
+    ) -> Optional[Conversation]:
+        """The conversation only if it belongs to this bot and the caller's session"""
+        session_id = request.cookies.get("headless.session.id")
+        if not session_id or not conversation_id:
+            return None
+        conversation = await self._resolve_conversation(
+            bot_id, conversation_id, session_id, may_create=False
         )
+        if (
+            conversation is None
+            or conversation.id != conversation_id
+            or conversation.sessionId != session_id
+        ):
+            return None
+        return conversation
+
+    async def _resolve_conversation(
+        self,
+        bot_id: str,
+        conversation_id: Optional[str],
+        session_id: str,
+        new_id: Optional[str] = None,
+        country_code: Optional[str] = None,
+        may_create: bool = True,
+    ) -> Optional[Conversation]:
+        try:
+            return await self.db.query_first(
+                self.RESOLVE_CONVERSATION_QUERY,
+                conversation_id,
+                bot_id,
+                session_id,
+                new_id or generate_cuid(),
+                country_code,
+                may_create,
+                model=Conversation,
+            )
+        except Exception as e:
+            raise PrismaExecutionError(f"Failed to resolve conversation: {str(e)}")
 
     async def get_browser_metadata(self, request: Request):
         user_agent = request.headers.get("user-agent", "")
@@ -0,0 +1,42 @@
+from prisma import Prisma
+from typing import Dict, List, Sequence
+from app.domain.errors import PrismaExecutionError
+
+
+class EmbeddingCacheRepository:
+    BATCH_SIZE = 500
+
+    def __init__(self, db: Prisma):
+        self.db = db
+
+    async def get_embeddings(self, hashes: Sequence[str]) -> Dict[str, List[float]]:
+        embeddings: Dict[str, List[float]] = {}
+        try:
+            for start in range(0, len(hashes), self.BATCH_SIZE):
+                rows = await self.db.query_raw(
+                    'SELECT "hash", "embedding" FROM "embedding_cache" WHERE "hash" = ANY($1::text[])',
+                    list(hashes[start : start + self.BATCH_SIZE]),
+                )
+                embeddings.update((row["hash"], row["embedding"]) for row in rows)
+            return embeddings
+        except Exception as e:
+            raise PrismaExecutionError(f"Failed to get cached embeddings: {str(e)}")
+
+    async def save_embeddings(self, model: str, embeddings: Dict[str, Sequence[float]]) -> None:
+        items = list(embeddings.items())
+        try:
+            for start in range(0, len(items), self.BATCH_SIZE):
+                values, params = [], [model]
+                for content_hash, embedding in items[start : start + self.BATCH_SIZE]:
+                    values.append(f"(${len(params) + 1}, $1, ${len(params) + 2}::real[])")
+                    params.extend(
+                        [content_hash, "{" + ",".join(repr(float(v)) for v in embedding) + "}"]
+                    )
+                await self.db.execute_raw(
+                    'INSERT INTO "embedding_cache" ("hash", "model", "embedding") VALUES '
+                    + ", ".join(values)
+                    + ' ON CONFLICT ("hash") DO NOTHING',
+                    *params,
+                )
+        except Exception as e:
+            raise PrismaExecutionError(f"Failed to save cached embeddings: {str(e)}")
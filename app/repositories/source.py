@@ -0,0 +1,97 @@
+from prisma import Prisma
+from typing import Any, Dict, List, Optional
+from app.utils import generate_cuid
+from app.domain.errors import PrismaExecutionError
+
+
+class SourceRepository:
+    def __init__(self, db: Prisma):
+        self.db = db
+
+    async def get_sources(
+        self, workspace_id: str, source_ids: List[str]
+    ) -> List[Dict[str, Any]]:
+        try:
+            return await self.db.query_raw(
+                """
+                SELECT "id", "workspaceId", "url", "title", "status", "contentHash"
+                FROM "sources"
+                WHERE "workspaceId" = $1 AND "id" = ANY($2::text[])
+                """,
+                workspace_id,
+                source_ids,
+            )
+        except Exception as e:
+            raise PrismaExecutionError(f"Failed to get sources: {str(e)}")
+
+    async def set_status(self, source_id: str, status: str) -> None:
+        try:
+            await self.db.execute_raw(
+                'UPDATE "sources" SET "status" = $2, "updatedAt" = now() WHERE "id" = $1',
+                source_id,
+                status,
+            )
+        except Exception as e:
+            raise PrismaExecutionError(f"Failed to update source: {str(e)}")
+
+    async def save_content(
+        self,
+        source_id: str,
+        content_hash: str,
+        content_length: int,
+        sync_time: int,
+        status: str,
+    ) -> None:
+        try:
+            await self.db.execute_raw(
+                """
+                UPDATE "sources"
+                SET "contentHash" = $2, "contentLength" = $3, "syncTime" = $4,
+                    "status" = $5, "updatedAt" = now()
+                WHERE "id" = $1
+                """,
+                source_id,
+                content_hash,
+                content_length,
+                sync_time,
+                status,
+            )
+        except Exception as e:
+            raise PrismaExecutionError(f"Failed to update source: {str(e)}")
+
+    async def start_sync(self, source_id: str) -> str:
+        sync_id = generate_cuid()
+        try:
+            await self.db.execute_raw(
+                """
+                INSERT INTO "syncs" ("id", "sourceId", "status", "startedAt")
+                VALUES ($1, $2, 'RUNNING', now())
+                """,
+                sync_id,
+                source_id,
+            )
+            return sync_id
+        except Exception as e:
+            raise PrismaExecutionError(f"Failed to create sync: {str(e)}")
+
+    async def finish_sync(
+        self, sync_id: str, status: str, message: Optional[str] = None
+    ) -> None:
+        """Close a sync as SUCCEEDED, FAILED or CANCELLED, stamping the matching column"""
+        column = {
+            "SUCCEEDED": "succeedAt",
+            "FAILED": "errorAt",
+            "CANCELLED": "cancelledAt",
+        }[status]
+        try:
+            await self.db.execute_raw(
+                f"""
+                UPDATE "syncs" SET "status" = $2, "message" = $3, "{column}" = now()
+                WHERE "id" = $1
+                """,
+                sync_id,
+                status,
+                message,
+            )
+        except Exception as e:
+            raise PrismaExecutionError(f"Failed to update sync: {str(e)}")
@@ -0,0 +1,228 @@
+import json
+from prisma import Prisma
+from typing import Any, Dict, List, Optional, Sequence
+from app.domain.errors import PrismaExecutionError
+
+
+class VectorRepository:
+    # Reciprocal rank fusion of an ANN pass over the ivfflat index
+    # (vector_cosine_ops) and a full-text pass over vectors_content_idx,
+    # both scoped to the workspace and the bot's sources.
+    # ivfflat reads `probes` when the index scan starts. The query vector is
+    # taken from `probe`, so the planner turns it into an InitPlan that runs
+    # set_config (transaction-local) as the scan keys are evaluated, before
+    # the scan begins: one statement, no BEGIN/SET/COMMIT round-trips.
+    HYBRID_SEARCH_QUERY = """
+        WITH probe AS MATERIALIZED (
+            SELECT $3::vector AS embedding, set_config('ivfflat.probes', $8, true) AS probes
+        ),
+        scoped AS (
+            SELECT "sourceId" FROM "bot_sources" WHERE "botId" = $2
+        ),
+        semantic AS (
+            SELECT v."id",
+                   ROW_NUMBER() OVER (
+                       ORDER BY v."embedding" <=> (SELECT embedding FROM probe)
+                   ) AS rank
+            FROM "vectors" v
+            WHERE v."workspaceId" = $1
+              AND v."sourceId" IN (SELECT "sourceId" FROM scoped)
+            ORDER BY v."embedding" <=> (SELECT embedding FROM probe)
+            LIMIT $5
+        ),
+        keyword AS (
+            SELECT v."id",
+                   ROW_NUMBER() OVER (
+                       ORDER BY ts_rank_cd(to_tsvector('english', v."chunkContent"), q.query) DESC
+                   ) AS rank
+            FROM "vectors" v, (SELECT websearch_to_tsquery('english', $4) AS query) q
+            WHERE v."workspaceId" = $1
+              AND v."sourceId" IN (SELECT "sourceId" FROM scoped)
+              AND to_tsvector('english', v."chunkContent") @@ q.query
+            ORDER BY ts_rank_cd(to_tsvector('english', v."chunkContent"), q.query) DESC
+            LIMIT $5
+        )
+        SELECT v."id", v."sourceId", v."chunkContent", v."metadata",
+               COALESCE(1.0 / ($6 + s.rank), 0) + COALESCE(1.0 / ($6 + k.rank), 0) AS "score"
+        FROM semantic s
+        FULL OUTER JOIN keyword k ON k."id" = s."id"
+        JOIN "vectors" v ON v."id" = COALESCE(s."id", k."id")
+        ORDER BY "score" DESC
+        LIMIT $7
+    """
+
+    # Keyset pagination for loading and incrementally syncing the FAISS hot
+    # index. `updatedAt` is stamped at transaction start, so a sync starts $5
+    # seconds behind its watermark to pick up rows that committed late.
+    VECTORS_SINCE_QUERY = """
+        SELECT "id", "sourceId", "chunkContent", "metadata",
+               "embedding"::text AS "embedding", "updatedAt"
+        FROM "vectors"
+        WHERE "workspaceId" = $1
+          AND "embedding" IS NOT NULL
+          AND ("updatedAt", "id") > ($2::timestamp(3) - make_interval(secs => $5::float8), $3)
+        ORDER BY "updatedAt", "id"
+        LIMIT $4
+    """
+
+    # Every live row of a workspace; mirrored ids missing here were deleted
+    VECTOR_IDS_QUERY = """
+        SELECT "id"
+        FROM "vectors"
+        WHERE "workspaceId" = $1
+          AND "embedding" IS NOT NULL
+    """
+
+    INSERT_BATCH_SIZE = 500
+
+    # Rows whose content, metadata and embedding are unchanged keep their
+    # updatedAt, so the FAISS hot index only re-syncs chunks that changed
+    UPSERT_VECTORS_CONFLICT = """
+        ON CONFLICT ("id") DO UPDATE SET
+            "workspaceId" = EXCLUDED."workspaceId",
+            "embedding" = EXCLUDED."embedding",
+            "chunkContent" = EXCLUDED."chunkContent",
+            "metadata" = EXCLUDED."metadata",
+            "chunkLength" = EXCLUDED."chunkLength",
+            "updatedAt" = EXCLUDED."updatedAt"
+        WHERE ("vectors"."workspaceId", "vectors"."embedding", "vectors"."chunkContent", "vectors"."metadata")
+            IS DISTINCT FROM
+            (EXCLUDED."workspaceId", EXCLUDED."embedding", EXCLUDED."chunkContent", EXCLUDED."metadata")
+    """
+
+    # Everything of the source that isn't one of its current chunk ids: the
+    # trailing chunks of a document that shrank, and rows from older id schemes
+    DELETE_STALE_CHUNKS_QUERY = """
+        DELETE FROM "vectors"
+        WHERE "sourceId" = $1
+          AND "id" NOT IN (
+              SELECT $1 || ':' || i FROM generate_series(0, $2::int - 1) AS i
+          )
+    """
+
+    def __init__(self, db: Prisma):
+        self.db = db
+
+    @staticmethod
+    def chunk_id(source_id: str, index: int) -> str:
+        """Stable id of a source's `index`-th chunk"""
+        return f"{source_id}:{index}"
+
+    @staticmethod
+    def to_vector_literal(embedding: Sequence[float]) -> str:
+        return "[" + ",".join(repr(float(value)) for value in embedding) + "]"
+
+    async def get_bot_source_ids(self, bot_id: str) -> List[str]:
+        try:
+            rows = await self.db.query_raw(
+                'SELECT "sourceId" FROM "bot_sources" WHERE "botId" = $1', bot_id
+            )
+            return [row["sourceId"] for row in rows]
+        except Exception as e:
+            raise PrismaExecutionError(f"Failed to get bot sources: {str(e)}")
+
+    async def get_vectors_since(
+        self,
+        workspace_id: str,
+        updated_at: Optional[str],
+        last_id: str,
+        limit: int,
+        overlap: float = 0,
+    ) -> List[Dict[str, Any]]:
+        """
+        A page of embedded chunks ordered by (updatedAt, id) after the given
+        cursor, moved `overlap` seconds back
+        """
+        try:
+            return await self.db.query_raw(
+                self.VECTORS_SINCE_QUERY,
+                workspace_id,
+                updated_at or "-infinity",
+                last_id,
+                limit,
+                overlap,
+            )
+        except Exception as e:
+            raise PrismaExecutionError(f"Failed to get vectors: {str(e)}")
+
+    async def get_vector_ids(self, workspace_id: str) -> List[str]:
+        """Ids of a workspace's embedded chunks"""
+        try:
+            rows = await self.db.query_raw(self.VECTOR_IDS_QUERY, workspace_id)
+            return [row["id"] for row in rows]
+        except Exception as e:
+            raise PrismaExecutionError(f"Failed to get vector ids: {str(e)}")
+
+    async def hybrid_search(
+        self,
+        workspace_id: str,
+        bot_id: str,
+        embedding: Sequence[float],
+        query: str,
+        limit: int,
+        candidates: int,
+        probes: int,
+        rrf_k: int,
+    ) -> List[Dict[str, Any]]:
+        """Top chunks for a query by fused semantic and keyword rank"""
+        try:
+            return await self.db.query_raw(
+                self.HYBRID_SEARCH_QUERY,
+                workspace_id,
+                bot_id,
+                self.to_vector_literal(embedding),
+                query,
+                candidates,
+                rrf_k,
+                limit,
+                str(int(probes)),
+            )
+        except Exception as e:
+            raise PrismaExecutionError(f"Failed to search vectors: {str(e)}")
+
+    async def replace_source_vectors(
+        self,
+        workspace_id: str,
+        source_id: str,
+        chunks: Sequence[tuple[str, Dict[str, Any], Sequence[float]]],
+    ) -> List[str]:
+        """
+        Atomically replace a source's chunks with (content, metadata, embedding)
+        rows. Chunk ids are stable per position, so rows are upserted in place
+        and only chunks past the new end are deleted.
+        """
+        ids = [self.chunk_id(source_id, index) for index in range(len(chunks))]
+        try:
+            async with self.db.tx() as tx:
+                await tx.execute_raw(self.DELETE_STALE_CHUNKS_QUERY, source_id, len(chunks))
+                for start in range(0, len(chunks), self.INSERT_BATCH_SIZE):
+                    values, params = [], []
+                    for offset, (content, metadata, embedding) in enumerate(
+                        chunks[start : start + self.INSERT_BATCH_SIZE]
+                    ):
+                        n = len(params)
+                        values.append(
+                            f"(${n + 1}, ${n + 2}, ${n + 3}, ${n + 4}::vector, ${n + 5}, "
+                            f"${n + 6}::jsonb, ${n + 7}, now())"
+                        )
+                        params.extend(
+                            [
+                                ids[start + offset],
+                                workspace_id,
+                                source_id,
+                                self.to_vector_literal(embedding),
+                                content,
+                                json.dumps(metadata),
+                                len(content),
+                            ]
+                        )
+                    await tx.execute_raw(
+                        'INSERT INTO "vectors" ("id", "workspaceId", "sourceId", "embedding", '
+                        '"chunkContent", "metadata", "chunkLength", "updatedAt") VALUES '
+                        + ", ".join(values)
+                        + self.UPSERT_VECTORS_CONFLICT,
+                        *params,
+                    )
+            return ids
+        except Exception as e:
+            raise PrismaExecutionError(f"Failed to save vectors: {str(e)}")
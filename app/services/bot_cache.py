@@ -0,0 +1,118 @@
+from prisma.models import Bot
+from app.core.cache import TTLCache
+from app.core.config import Config
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from app.repositories.chat import ChatRepository
+
+BOTS_CHANGED_CHANNEL = "bots_changed"
+
+
+def _as_utc(value: Any) -> Optional[datetime]:
+    """Normalise an `updatedAt` from Prisma or a NOTIFY payload for comparison"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class BotCache:
+    """
+    Caches bots with their model, which change a few times a month but are
+    read on every message. The model's AI provider is left out: its table
+    sends no change notification, so a rotated key or endpoint would be
+    served until the TTL ran out. Invalidations remember the
+    `updatedAt` of the bot or model row that triggered them, and a loaded
+    bot whose own row (or model row) is older than that is served once but
+    not cached: the load raced the change and read the old row. The
+    remembered versions outlive any entry loaded before them by at most
+    BOT_CACHE_TTL, so they expire with it.
+    """
+
+    def __init__(self, chat_repo: ChatRepository, config: Config):
+        self.chat_repo = chat_repo
+        self._bots: TTLCache[str, Optional[Bot]] = TTLCache(
+            maxsize=config.BOT_CACHE_SIZE, ttl=config.BOT_CACHE_TTL
+        )
+        # Lowest version a cached entry may have, from the latest notification
+        self._min_bot_versions: TTLCache[str, datetime] = TTLCache(
+            maxsize=config.BOT_CACHE_SIZE, ttl=config.BOT_CACHE_TTL
+        )
+        self._min_model_versions: TTLCache[str, datetime] = TTLCache(
+            maxsize=config.BOT_CACHE_SIZE, ttl=config.BOT_CACHE_TTL
+        )
+        self.invalidations = 0
+        self.stale_loads = 0
+
+    @staticmethod
+    def _older(stamp: Any, required: Optional[datetime]) -> bool:
+        stamp = _as_utc(stamp)
+        return required is not None and stamp is not None and stamp < required
+
+    def _is_stale(self, bot: Bot) -> bool:
+        # Each row is held to its own notification: a newer bot row says
+        # nothing about whether the model was read before its change
+        if self._older(bot.updatedAt, self._min_bot_versions.get(bot.id)):
+            return True
+        return bool(bot.modelId and bot.model) and self._older(
+            bot.model.updatedAt, self._min_model_versions.get(bot.modelId)
+        )
+
+    async def get_bot(self, bot_id: str) -> Optional[Bot]:
+        bot = await self._bots.get_or_load(
+            bot_id, lambda: self.chat_repo.get_bot(bot_id=bot_id)
+        )
+        # Unknown ids are not kept, so a newly created bot is served at once
+        if bot is None:
+            self._bots.pop(bot_id)
+        elif self._is_stale(bot):
+            self.stale_loads += 1
+            self._bots.pop(bot_id)
+        return bot
+
+    def invalidate(
+        self, bot_id: Optional[str] = None, version: Optional[datetime] = None
+    ) -> None:
+        """Drop one bot, or every bot when no id is given"""
+        self.invalidations += 1
+        if bot_id is None:
+            self._bots.clear()
+            self._min_bot_versions.clear()
+            self._min_model_versions.clear()
+            return
+        if version is not None:
+            self._min_bot_versions.set(bot_id, version)
+        self._bots.pop(bot_id)
+
+    def invalidate_model(
+        self, model_id: str, version: Optional[datetime] = None
+    ) -> None:
+        """Drop the bots using a model; models are shared and rarely change, so all of them"""
+        self.invalidations += 1
+        if version is not None:
+            self._min_model_versions.set(model_id, version)
+        self._bots.clear()
+
+    def handle_notification(self, payload: Dict[str, Any]) -> None:
+        """Handler for the `bots_changed` NOTIFY channel"""
+        row_id = payload.get("id")
+        version = _as_utc(payload.get("updatedAt"))
+        if row_id is None:
+            self.invalidate()
+        elif payload.get("table") == "models":
+            self.invalidate_model(row_id, version)
+        else:
+            self.invalidate(row_id, version)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._bots.stats(),
+            "invalidations": self.invalidations,
+            "stale_loads": self.stale_loads,
+        }
@@ -0,0 +1,117 @@
+import logging
+from prisma.models import Business
+from app.core.cache import TTLCache
+from app.core.config import Config
+from typing import Any, Callable, Dict, List, Optional
+from app.repositories.business import BusinessRepository
+from app.services.business_facts import BusinessFacts
+from app.infrastructure.ai.prompts.seller import SellerPromptGenerator, ModeType
+
+logger = logging.getLogger(__name__)
+
+BUSINESS_CHANGED_CHANNEL = "business_changed"
+
+
+class BusinessCache:
+    """
+    Caches business snapshots (business + configurations + locations +
+    operating hours), seller prompt generators, whose static prefix is
+    rendered once, and the facts served by tool functions, so steady-state
+    chat turns skip the database. Entries expire by TTL and are dropped
+    explicitly via `invalidate`, which is also wired to Postgres NOTIFY
+    when enabled.
+    """
+
+    def __init__(self, business_repo: BusinessRepository, config: Config):
+        self.business_repo = business_repo
+        self._businesses: TTLCache[str, Optional[Business]] = TTLCache(
+            maxsize=config.BUSINESS_CACHE_SIZE, ttl=config.BUSINESS_CACHE_TTL
+        )
+        self._prompts: TTLCache[tuple, SellerPromptGenerator] = TTLCache(
+            maxsize=config.BUSINESS_CACHE_SIZE * 2, ttl=config.BUSINESS_CACHE_TTL
+        )
+        self._facts: TTLCache[str, BusinessFacts] = TTLCache(
+            maxsize=config.BUSINESS_CACHE_SIZE, ttl=config.BUSINESS_CACHE_TTL
+        )
+        self._listeners: List[Callable[[Optional[str]], None]] = []
+
+    async def get_business_data(self, business_id: str) -> Optional[Business]:
+        return await self._businesses.get_or_load(
+            business_id, lambda: self.business_repo.get_business_data(business_id)
+        )
+
+    async def get_prompt_generator(
+        self, business_id: str, mode: ModeType
+    ) -> SellerPromptGenerator:
+        """Return the cached prompt generator; its static prefix renders once"""
+
+        async def build() -> SellerPromptGenerator:
+            business_data = await self.get_business_data(business_id)
+            generator = SellerPromptGenerator(
+                business=business_data,
+                config=business_data.configurations,
+                locations=business_data.locations,
+                operating_hours=business_data.operatingHours,
+                mode=mode,
+            )
+            generator.generate_static_prompt()
+            return generator
+
+        return await self._prompts.get_or_load((business_id, mode), build)
+
+    async def get_prompt(
+        self, business_id: str, mode: ModeType
+    ) -> tuple[str, Optional[Business]]:
+        """Return the full seller prompt and the business snapshot behind it"""
+        generator = await self.get_prompt_generator(business_id, mode)
+        return generator.generate_prompt(), generator.business
+
+    async def get_facts(self, business_id: str) -> BusinessFacts:
+        """Return the materialised policies, delivery terms, categories and locations"""
+
+        async def build() -> BusinessFacts:
+            business_data = await self.get_business_data(business_id)
+            categories = await self.business_repo.get_category_counts(business_id)
+            return BusinessFacts.build(business_data, categories)
+
+        return await self._facts.get_or_load(business_id, build)
+
+    def on_invalidate(self, listener: Callable[[Optional[str]], None]) -> None:
+        """Register a callback run with the business id (None for all) on invalidation"""
+        self._listeners.append(listener)
+
+    def invalidate(self, business_id: Optional[str] = None) -> None:
+        """Drop cached data for one business, or everything when no id is given"""
+        if business_id is None:
+            self._businesses.clear()
+            self._prompts.clear()
+            self._facts.clear()
+        else:
+            self._businesses.pop(business_id)
+            self._prompts.invalidate(lambda key: key[0] == business_id)
+            self._facts.pop(business_id)
+
+        for listener in self._listeners:
+            try:
+                listener(business_id)
+            except Exception as e:
+                logger.error(f"Business invalidation listener failed: {str(e)}")
+
+    def handle_notification(self, payload: Dict[str, Any]) -> None:
+        """Handler for the `business_changed` NOTIFY channel"""
+        self.invalidate(payload.get("businessId"))
+
+    def handle_products_notification(self, payload: Dict[str, Any]) -> None:
+        """Handler for the `products_changed` NOTIFY channel; category counts may move"""
+        business_id = payload.get("businessId")
+        if business_id is None:
+            self._facts.clear()
+        else:
+            self._facts.pop(business_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "businesses": self._businesses.stats(),
+            "prompts": self._prompts.stats(),
+            "facts": self._facts.stats(),
+        }
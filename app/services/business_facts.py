@@ -0,0 +1,89 @@
+from prisma.models import Business
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class BusinessFacts:
+    """
+    Read-only answers for the business tool functions, materialised once per
+    business from the cached snapshot plus an aggregate category query.
+    """
+
+    policies: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    delivery: Dict[str, Any] = field(default_factory=dict)
+    categories: List[Dict[str, Any]] = field(default_factory=list)
+    locations: List[Dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def build(
+        cls, business: Optional[Business], categories: List[Dict[str, Any]]
+    ) -> "BusinessFacts":
+        facts = cls(
+            categories=[
+                {
+                    "id": category["id"],
+                    "name": category["name"],
+                    "description": category["description"],
+                    "product_count": int(category["productCount"]),
+                }
+                for category in categories
+            ]
+        )
+        if business is None:
+            return facts
+
+        config = business.configurations
+        if config:
+            facts.delivery = {
+                "available": bool(config.hasDelivery),
+                "min_amount": config.minDeliveryOrderAmount,
+                "fee": config.deliveryFee,
+                "estimated_delivery_arrival": config.estimatedDeliveryArrival,
+            }
+            facts.policies = {
+                "returns": {
+                    "available": config.acceptsReturns,
+                    "period_days": config.returnPeriod,
+                    "conditions": "Item must be unused and in original packaging",
+                },
+                "warranty": {
+                    "available": config.hasWarranty,
+                    "period_days": config.warrantyPeriod,
+                    "conditions": "Covers manufacturing defects",
+                },
+                "delivery": {
+                    "available": config.hasDelivery,
+                    "min_amount": config.minDeliveryOrderAmount,
+                    "fee": config.deliveryFee,
+                },
+            }
+
+        hours_by_location: Dict[str, List[Dict[str, Any]]] = {}
+        for hour in sorted(
+            business.operatingHours or [], key=lambda x: (x.dayOfWeek, x.openTime, x.id)
+        ):
+            hours_by_location.setdefault(hour.locationId, []).append(
+                {
+                    "day": hour.dayOfWeek,
+                    "open_time": hour.openTime,
+                    "close_time": hour.closeTime,
+                    "is_closed": hour.isClosed,
+                }
+            )
+        facts.locations = [
+            {
+                "id": loc.id,
+                "name": loc.name,
+                "address": loc.address,
+                "city": loc.city,
+                "phone": loc.phone,
+                "email": loc.email,
+                "is_main": loc.isMain,
+                "operating_hours": hours_by_location.get(loc.id, []),
+            }
+            for loc in sorted(
+                business.locations or [], key=lambda loc: (not loc.isMain, loc.name, loc.id)
+            )
+        ]
+        return facts
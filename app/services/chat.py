@@ -1,59 +1,135 @@
-import re
 import json
-from openai import OpenAI
+import time
+import asyncio
 from prisma.models import Bot, Chat
+from dataclasses import dataclass, replace
 from app.domain.requests import ChatRequest
-from typing import Dict, List, Any, AsyncGenerator, Literal, Optional
-from app.infrastructure.ai.prompts.seller import SellerPromptGenerator
+from typing import Dict, List, Any, AsyncGenerator, Literal, Optional, Tuple
 from app.infrastructure.ai.tools.functions.business import BusinessFunctions
+from app.infrastructure.ai.tools.parser import ToolCallStreamParser
+from app.infrastructure.ai.tools.executor import ToolExecutor
 from app.infrastructure.ai.tools.pydantic_tools.business import (
     get_all_business_functions,
 )
 from app.api.dependencies import (
+    get_config,
     get_chat_repository,
     get_business_repository,
+    get_business_cache,
+    get_context_window_manager,
+    get_message_persister,
+    get_suggestion_service,
+    get_llm_client_registry,
+    get_product_search_engine,
+    get_retrieval_service,
+    get_response_cache,
+    get_chat_latency,
     logger,
 )
 from app.infrastructure.ai.providers.cloudflare import CloudflareProvider
 from app.infrastructure.ai.providers.openai import OpenAIProvider
+from app.infrastructure.ai.providers.replay import ReplayProvider
+from app.services.suggestions import SuggestionService
+from app.services.retrieval import RetrievalService, RetrievedChunk
+from app.services.response_cache import ResponseLookup
 from app.domain.errors import ToolExecutionError
-from app.domain.interfaces import MessageRole, ToolCall, Message
+from app.domain.interfaces import MessageRole, ToolCall, Message, StreamResponseType
 from app.utils import generate_cuid
 
 
+@dataclass(frozen=True)
+class ChatTurn:
+    """
+    Per-turn state, passed down the pipeline instead of being stored on the
+    service, so concurrent conversations on one worker never share it.
+    Tool follow-ups derive a new turn with `replace`.
+    """
+
+    bot: Bot
+    conversation_id: str
+    chat_request: ChatRequest
+    system_prompt: str = ""
+    # Hash of the prompt's stable prefix; unlike system_prompt it ignores the time
+    prompt_version: str = ""
+    tool_executor: Optional[ToolExecutor] = None
+    knowledge: Tuple[RetrievedChunk, ...] = ()
+    # `bot.model.aiProvider`, read per message rather than cached with the bot
+    ai_provider: Any = None
+    depth: int = 0
+
+
 class ChatService:
+    """
+    Stateless chat pipeline: everything specific to a conversation lives in
+    a `ChatTurn`, so one instance can serve any number of concurrent streams.
+    """
+
     MAX_RECURSION_DEPTH = 2  # Limit recursive function calls
 
     def __init__(self):
         self.chat_repo = get_chat_repository()
         self.business_repo = get_business_repository()
-        self.client = None
-        self._recursion_count = 0
-        self.chat_request: ChatRequest = None
-        self.business_functions: BusinessFunctions = None
-        self.business_system_prompt = ""
-
-    async def _get_prompt_generator(self, bot: Bot) -> tuple[str, Any]:
-        """Get appropriate prompt generator based on bot type"""
+        self.business_cache = get_business_cache()
+        self.context_window = get_context_window_manager()
+        self.persister = get_message_persister()
+        self.suggestions = get_suggestion_service()
+        self.client_registry = get_llm_client_registry()
+        self.config = get_config()
+        self.product_search = get_product_search_engine()
+        self.retrieval = get_retrieval_service()
+        self.response_cache = get_response_cache()
+        self.latency = get_chat_latency()
+
+    async def _get_system_prompt(
+        self, bot: Bot, chat_mode: Optional[str]
+    ) -> Tuple[str, str]:
+        """Get the system prompt based on bot type, with the version of its stable prefix"""
         if bot.businessId:
-            business_data = await self.business_repo.get_business_data(bot.businessId)
-            generator = SellerPromptGenerator(
-                business=business_data,
-                config=business_data.configurations,
-                locations=business_data.locations,
-                operating_hours=business_data.operatingHours,
-                mode=self.chat_request.chat_mode,
-            )
-            self.business_system_prompt = generator.generate_prompt()
-            return self.business_system_prompt, business_data
+            with self.latency.time("prompt"):
+                generator = await self.business_cache.get_prompt_generator(
+                    bot.businessId, chat_mode
+                )
+                return generator.generate_prompt(), generator.prefix_hash
+        return "", ""
 
-    async def prepare_chat_context(
-        self, bot: Bot, conversation_history: List[Chat]
+    def _create_tool_executor(self, bot: Bot) -> Optional[ToolExecutor]:
+        if not bot.businessId:
+            return None
+        business_functions = BusinessFunctions(
+            bot.businessId,
+            search_engine=self.product_search,
+            business_cache=self.business_cache,
+        )
+        return ToolExecutor(
+            business_functions.tool_functions(),
+            timeout=self.config.TOOL_TIMEOUT,
+            max_result_chars=self.config.TOOL_RESULT_MAX_CHARS,
+        )
+
+    def prepare_chat_context(
+        self,
+        system_prompt: str,
+        conversation_history: List[Chat],
+        history_summary: Optional[str] = None,
+        knowledge: Optional[Tuple[RetrievedChunk, ...]] = None,
     ) -> List[Dict[str, str]]:
         """Prepare chat context with system message and conversation history"""
-        system_content, _ = await self._get_prompt_generator(bot)
-
-        messages = [{"role": MessageRole.SYSTEM.value, "content": system_content}]
+        messages = [{"role": MessageRole.SYSTEM.value, "content": system_prompt}]
+        if history_summary:
+            messages.append(
+                {
+                    "role": MessageRole.SYSTEM.value,
+                    "content": f"Summary of earlier conversation:\n{history_summary}",
+                }
+            )
+        if knowledge:
+            messages.append(
+                {
+                    "role": MessageRole.SYSTEM.value,
+                    "content": "Relevant knowledge base excerpts:\n"
+                    + RetrievalService.format_context(knowledge),
+                }
+            )
         messages.extend(
             [
                 {
@@ -73,102 +149,107 @@ class ChatService:
         )
         return messages
 
-    def _get_tool_function(self, function_name: str):
-        """Get the corresponding tool function based on name"""
-        function_mapping = {
-            "search_products": self.business_functions.search_products,
-        }
-        return function_mapping.get(function_name)
-
-    async def handle_tool_call(self, tool_call: ToolCall, conversation_id: str) -> str:
-        """Execute tool call and return results"""
-        try:
-            function = self._get_tool_function(tool_call.name)
-            if not function:
-                raise ToolExecutionError(f"Unknown function: {tool_call.name}")
-
-            result = await function(**tool_call.arguments)
-
-            if result in ([], None, "", "[]"):
-                result = f"No results found."
-
-            logger().info(f"EXECUTED TOOL: {str(tool_call)}")
-
-            tool_id = generate_cuid()
-            await self._save_message(
-                conversation_id,
-                Message(
-                    role=MessageRole.ASSISTANT.value,
-                    content="",
-                    toolCalls=[
-                        {
-                            "id": tool_id,
-                            "type": "function",
-                            "function": {
-                                "name": tool_call.name,
-                                "arguments": json.dumps(tool_call.arguments),
-                            },
-                        }
-                    ],
-                    toolCallId=tool_id,
-                ),
-            )
+    async def handle_tool_calls(self, turn: ChatTurn, tool_calls: List[ToolCall]) -> None:
+        """Execute a turn's tool calls concurrently and record their results"""
+        if not turn.tool_executor:
+            raise ToolExecutionError("This bot has no tools")
+
+        conversation_id = turn.conversation_id
+        with self.latency.time("tools"):
+            results = await turn.tool_executor.run(tool_calls)
+        tool_ids = [generate_cuid() for _ in results]
+        await self._save_message(
+            conversation_id,
+            Message(
+                role=MessageRole.ASSISTANT.value,
+                content="",
+                toolCalls=[
+                    {
+                        "id": tool_id,
+                        "type": "function",
+                        "function": {
+                            "name": result.tool_call.name,
+                            "arguments": json.dumps(result.tool_call.arguments),
+                        },
+                    }
+                    for tool_id, result in zip(tool_ids, results)
+                ],
+            ),
+        )
+        for tool_id, result in zip(tool_ids, results):
             await self._save_message(
                 conversation_id,
                 Message(
                     role=MessageRole.TOOL.value,
-                    content=result,
+                    content=result.content,
                     toolCallId=tool_id,
                 ),
             )
-        except Exception as e:
-            raise ToolExecutionError(f"Tool execution failed: {str(e)}")
 
     async def _save_message(
         self, conversation_id: str, message: Message
-    ) -> Optional[Chat]:
-        """Save chat message to repository with duplicate check for empty tool results"""
+    ) -> Optional[Message]:
+        """Queue chat message for write-behind persistence"""
         try:
-            return await self.chat_repo.save_chat_message(
-                {"conversationId": conversation_id, **message.to_dict()}
-            )
+            return self.persister.enqueue(conversation_id, message)
 
         except Exception as e:
             logger().error(f"Error saving message: {str(e)}", exc_info=True)
             return None
 
+    async def _load_history(self, conversation_id: str) -> tuple[List[Any], Optional[str]]:
+        """Persisted context window plus messages still waiting to be flushed"""
+        with self.latency.time("history"):
+            window = await self.context_window.get_window(conversation_id)
+        seen = {chat.id for chat in window.messages}
+        pending = [
+            message
+            for message in self.persister.pending(conversation_id)
+            if message.id not in seen
+        ]
+        return window.messages + pending, window.summary
+
+    async def _lookup_cached_answer(
+        self, turn: ChatTurn, prompt: str, history: List[Any]
+    ) -> Optional[ResponseLookup]:
+        """Check the response cache for the opening question of a seller conversation"""
+        bot = turn.bot
+        if not self.response_cache.enabled or not bot.businessId:
+            return None
+        # Later turns depend on the conversation so far, not just the question
+        if sum(1 for chat in history if chat.role == MessageRole.USER.value) > 1:
+            return None
+        chat_mode = turn.chat_request.chat_mode
+        generator = await self.business_cache.get_prompt_generator(bot.businessId, chat_mode)
+        return await self.response_cache.lookup(
+            bot.businessId, chat_mode, generator.prefix_hash, prompt
+        )
+
+    async def _delete_message(self, conversation_id: str, message_id: str) -> None:
+        if not self.persister.discard(conversation_id, message_id):
+            await self.persister.flush(conversation_id)
+            await self.chat_repo.delete_chat(message_id)
+        self.context_window.discard(conversation_id, message_id)
+
     async def _handle_tool_response(
-        self,
-        bot: Bot,
-        conversation_id: str,
-        tool_call: Dict[str, Any],
-    ) -> AsyncGenerator[str, None]:
+        self, turn: ChatTurn, tool_calls: List[ToolCall]
+    ) -> AsyncGenerator[Dict[str, Any], None]:
         """Handle tool execution and subsequent chat responses"""
+        if turn.depth >= self.MAX_RECURSION_DEPTH:
+            yield self._stream_data({"warning": "Maximum tool call recursion depth reached"})
+            return
+        # Each call is another model round-trip; exported as tool_followups_total
+        self.latency.increment("tool_followups")
         try:
-            if self._recursion_count >= self.MAX_RECURSION_DEPTH:
-                yield self._stream_data(
-                    {"warning": "Maximum tool call recursion depth reached"}
-                )
-                return
-
-            self._recursion_count += 1
-            await self.handle_tool_call(ToolCall.from_dict(tool_call), conversation_id)
-            async for response in self.handle_chat(
-                bot,
-                conversation_id,
-                prompt="",
-                chat_request=self.chat_request,
-                inside=True,
-            ):
-                yield response
-
+            await self.handle_tool_calls(turn, tool_calls)
         except ToolExecutionError as e:
             yield self._stream_data({"error": str(e)})
-        finally:
-            self._recursion_count -= 1
+            return
+        async for response in self._run_turn(replace(turn, depth=turn.depth + 1), prompt=""):
+            yield response
 
-    def _stream_data(self, data: Dict[str, Any]) -> str:
-        """Format data for streaming"""
+    def _stream_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a stream event; it is serialized once, at the HTTP edge"""
         if "error" in data:
             try:
                 logger().error(
@@ -177,9 +258,9 @@ class ChatService:
             except:
                 logger().error(f"Error formatting stream data: {str(data)}", exc_info=True)
                 pass
-        return f"data: {json.dumps(data)}\n\n"
+        return data
 
-    def send_action(self, action: str):
+    def send_action(self, action: str) -> Dict[str, Any]:
         return self._stream_data({"action": action})
 
     async def handle_chat(
@@ -187,12 +268,30 @@ class ChatService:
         bot: Bot,
         conversation_id: str,
         prompt: str,
-        chat_request: ChatRequest = None,
-        inside: bool = False,
-    ) -> AsyncGenerator[str, None]:
+        chat_request: ChatRequest,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
         """Main chat handling method"""
+        turn = ChatTurn(
+            bot=bot,
+            conversation_id=conversation_id,
+            chat_request=chat_request,
+            tool_executor=self._create_tool_executor(bot),
+        )
+        try:
+            async for event in self._run_turn(turn, prompt):
+                yield event
+        finally:
+            # Turn is over: write the buffered messages in one batch
+            self.persister.schedule_flush(conversation_id)
+
+    async def _run_turn(
+        self, turn: ChatTurn, prompt: str
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """One completion of a turn; tool calls recurse with a deeper turn"""
+        bot = turn.bot
+        conversation_id = turn.conversation_id
         user_message = None
-        self.chat_request = chat_request
+        cache_lookup = None
         try:
             if prompt:
                 user_message = await self._save_message(
@@ -202,12 +301,45 @@ class ChatService:
                         content=prompt,
                     ),
                 )
-            history = await self.chat_repo.get_chats(conversation_id)
-            messages = await self.prepare_chat_context(bot, history)
+
+                async def load_history_and_cache():
+                    history, summary = await self._load_history(conversation_id)
+                    # A summary means the conversation has earlier turns
+                    lookup = (
+                        None
+                        if summary
+                        else await self._lookup_cached_answer(turn, prompt, history)
+                    )
+                    return history, summary, lookup
+
+                # Retrieval, history, prompt and provider loads are independent round-trips
+                with self.latency.time("context"):
+                    (history, history_summary, cache_lookup), knowledge, (
+                        system_prompt,
+                        prompt_version,
+                    ), ai_provider = (
+                        await asyncio.gather(
+                            load_history_and_cache(),
+                            self.retrieval.retrieve(bot, prompt),
+                            self._get_system_prompt(bot, turn.chat_request.chat_mode),
+                            self.chat_repo.get_ai_provider(bot.modelId),
+                        )
+                    )
+                turn = replace(
+                    turn,
+                    knowledge=tuple(knowledge),
+                    system_prompt=system_prompt,
+                    prompt_version=prompt_version,
+                    ai_provider=ai_provider,
+                )
+            else:
+                history, history_summary = await self._load_history(conversation_id)
+            messages = self.prepare_chat_context(
+                turn.system_prompt, history, history_summary, turn.knowledge
+            )
 
             chat_params = {}
-            if bot.businessId:
-                self.business_functions = BusinessFunctions(bot.businessId)
+            if turn.tool_executor:
                 chat_params.update(
                     {
                         "tool_choice": "auto",
@@ -216,62 +348,72 @@ class ChatService:
                     }
                 )
 
+            if turn.ai_provider is None:
+                # An empty prompt skips the context loads above
+                turn = replace(
+                    turn, ai_provider=await self.chat_repo.get_ai_provider(bot.modelId)
+                )
+
             chat_provider = None
-            self.client = OpenAI(
-                base_url=bot.model.aiProvider.endpointUrl,
-                api_key=bot.model.aiProvider.apiKey,
-            )
-            if not inside:
+            client = await self.client_registry.get_provider_client(turn.ai_provider)
+            if turn.depth == 0:
                 yield self.send_action("thinking")
-            if bot.model.aiProvider.provider == "cloudflare":
-                chat_provider = CloudflareProvider(self.client, bot.model.name)
-            elif bot.model.aiProvider.provider == "openai":
-                chat_provider = OpenAIProvider(self.client, bot.model.name)
+            if cache_lookup and cache_lookup.answer is not None:
+                chat_provider = ReplayProvider(cache_lookup.answer)
+            elif turn.ai_provider.provider == "cloudflare":
+                chat_provider = CloudflareProvider(client, bot.model.name)
+            elif turn.ai_provider.provider == "openai":
+                chat_provider = OpenAIProvider(client, bot.model.name)
             else:
                 # :TODO Throw an error
                 pass
 
-            assistant_message = ""
-            is_collecting_tool_call = False
+            parser = ToolCallStreamParser()
+            answer_parts: List[str] = []
+            announced_tool_call = False
+            stream_failed = False
+            requested = time.perf_counter()
+            first_chunk = turn.depth == 0
+            chunks = 0
 
             async for chunk in chat_provider.request(messages, **chat_params):
-                chunk_data = self._parse_chunk(chunk)
-
-                if "error" in chunk_data:
-                    yield self._stream_data({"error": chunk_data["error"]})
+                chunks += 1
+                if first_chunk:
+                    self.latency.record("provider_first_chunk", time.perf_counter() - requested)
+                    first_chunk = False
+                if chunk.type == StreamResponseType.ERROR:
+                    stream_failed = True
+                    yield self._stream_data({"error": chunk.error})
                     continue
 
-                if "token" in chunk_data:
-                    token: str = chunk_data["token"].replace("<|im_end|>", "")
-                    if token.count("tool_call") == 2:
-                        is_collecting_tool_call = True
-                        yield self.send_action("checking-inventory")
-
-                    elif (
-                        token.strip().startswith("<")
-                        and len(assistant_message) < 2
-                        and token.count("tool_call>") != 2
-                    ):
-                        is_collecting_tool_call = True
-                        assistant_message += token
-                        yield self.send_action("checking-inventory")
-                        continue
-
-                    if is_collecting_tool_call:
-                        assistant_message += token
-                        if "</tool_call>" in assistant_message:
-                            is_collecting_tool_call = False
-                            tool_call = self._accumulate_tool_call(assistant_message)
-                            async for response in self._handle_tool_response(
-                                bot, conversation_id, tool_call
-                            ):
-                                yield response
-                        continue
-
-                    assistant_message += token
-                    yield self._stream_data({"token": token})
-
-            if "<tool_call>" not in assistant_message:
+                if chunk.type == StreamResponseType.TOOL_CALL:
+                    parser.add(chunk.tool_call)
+                else:
+                    token = chunk.content.replace("<|im_end|>", "")
+                    for event in parser.feed(token):
+                        if event.type == StreamResponseType.TOKEN:
+                            answer_parts.append(event.content)
+                            yield self._stream_data({"token": event.content})
+
+                if not announced_tool_call and (parser.collecting or parser.tool_calls):
+                    announced_tool_call = True
+                    yield self.send_action("checking-inventory")
+
+            for event in parser.finish():
+                answer_parts.append(event.content)
+                yield self._stream_data({"token": event.content})
+            # Stream throughput is provider_chunks_total / provider_stream seconds
+            self.latency.record("provider_stream", time.perf_counter() - requested)
+            self.latency.increment("provider_chunks", chunks)
+
+            if parser.tool_calls:
+                async for response in self._handle_tool_response(turn, parser.tool_calls):
+                    yield response
+            else:
+                assistant_message = "".join(answer_parts)
+                # Only answers drawn from the seller prompt alone are reusable
+                if cache_lookup and not turn.knowledge and not stream_failed:
+                    self.response_cache.store(cache_lookup, assistant_message)
                 assistant_chat = await self._save_message(
                     conversation_id,
                     Message(
@@ -280,69 +422,70 @@ class ChatService:
                     ),
                 )
                 if assistant_chat:
-                    yield self._stream_data({"complete": True})
-                    suggestions = await self._generate_question_suggestions(
-                        bot, conversation_id
+                    suggestions_task = self._start_question_suggestions(
+                        bot,
+                        conversation_id,
+                        [*history, assistant_chat],
+                        turn.system_prompt,
+                        turn.prompt_version,
                     )
-                    yield self._stream_data({"suggestions": suggestions})
+                    yield self._stream_data({"complete": True})
+                    if not turn.chat_request.defer_suggestions:
+                        suggestions = await suggestions_task if suggestions_task else []
+                        yield self._stream_data({"suggestions": suggestions})
 
         except Exception as e:
             yield self._stream_data({"error": f"Error processing chat: {str(e)}"})
             if user_message:
-                await self.chat_repo.delete_chat(user_message.id)
+                await self._delete_message(conversation_id, user_message.id)
 
-    def _accumulate_tool_call(self, content: str) -> Dict[str, Any]:
-        """Parse accumulated tool call content"""
-        tool_call_match = re.search(r"<tool_call>(.*?)</tool_call>", content, re.DOTALL)
-        tool_calls_str = "{}"
-        try:
-            if tool_call_match:
-                tool_call_params = tool_call_match.group(1)
-                tool_calls_str = (
-                    tool_call_params.replace("None", "null").replace("'", '"').strip()
-                )
-            return json.loads(tool_calls_str)
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid tool call content: {tool_calls_str}") from e
-
-    def _parse_chunk(self, chunk: str) -> Dict[str, Any]:
-        """Parse streaming chunk data"""
-        try:
-            if chunk.startswith("data: "):
-                chunk = chunk[6:]
-            return json.loads(chunk)
-        except json.JSONDecodeError:
-            return {"token": chunk}
-
-    async def _generate_question_suggestions(
-        self, bot: Bot, conversation_id: str
-    ) -> List[str]:
-        """Generate question suggestions based on conversation history"""
-        try:
-            recent_chats = await self.chat_repo.get_recent_chats(conversation_id, 4)
-            if not recent_chats or len(recent_chats) <= 3:
-                return []
-
-            messages = [
-                Message(
-                    role=chat.role,
-                    content=chat.content,
-                    toolCalls=chat.toolCalls,
-                    toolCallId=chat.toolCallId,
-                )
-                for chat in recent_chats
-            ]
+    def _start_question_suggestions(
+        self,
+        bot: Bot,
+        conversation_id: str,
+        history: List[Any],
+        business_system_prompt: str,
+        prompt_version: str,
+    ) -> Optional[asyncio.Future]:
+        """Kick off follow-up question generation without waiting for it"""
+        messages = SuggestionService.recent_messages(history)
+        if len(messages) < SuggestionService.RECENT_MESSAGES:
+            return None
 
+        async def generate(recent_messages: List[Message]) -> List[str]:
             cf_provider = CloudflareProvider(
-                OpenAI(
+                await self.client_registry.get_client(
                     base_url="https://generative.ai.{**}.io",
                     api_key="sk-no-key-requireda",
                 ),
                 "@hf/nousresearch/hermes-2-pro-mistral-7b",
             )
-            suggestions = await cf_provider.generate_suggestions(messages, self.business_system_prompt)
+            with self.latency.time("suggestions"):
+                return await cf_provider.generate_suggestions(
+                    recent_messages, business_system_prompt
+                )
+
+        return self.suggestions.start(
+            conversation_id, messages, generate, scope=bot.id, prompt_version=prompt_version
+        )
 
-            return suggestions
+    async def get_question_suggestions(
+        self, bot: Bot, conversation_id: str, chat_request: ChatRequest
+    ) -> List[str]:
+        """Suggestions for the latest turn, generating them if this worker has none"""
+        try:
+            suggestions = await self.suggestions.get(conversation_id)
+            if suggestions is not None:
+                return suggestions
+
+            system_prompt, prompt_version = await self._get_system_prompt(
+                bot, chat_request.chat_mode
+            )
+            history, _ = await self._load_history(conversation_id)
+            task = self._start_question_suggestions(
+                bot, conversation_id, history, system_prompt, prompt_version
+            )
+            return await task if task else []
 
         except Exception as e:
             logger().error(f"Error generating suggestions: {str(e)}")
@@ -0,0 +1,134 @@
+from app.core.cache import TTLCache
+from app.core.config import Config
+from datetime import datetime, timedelta
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+from app.repositories.chat import ChatRepository
+from app.domain.interfaces import MessageRole
+
+CHATS_DELETED_CHANNEL = "chats_deleted"
+
+
+@dataclass
+class ContextWindow:
+    messages: List[Any]
+    summary: Optional[str] = None
+
+
+@dataclass
+class _ConversationState:
+    messages: List[Any] = field(default_factory=list)
+    cursor: Optional[datetime] = None
+    known_ids: Set[str] = field(default_factory=set)
+    summary_lines: List[str] = field(default_factory=list)
+
+
+class ContextWindowManager:
+    """
+    Per-conversation cache of already-loaded chat messages. Each turn only
+    fetches rows from CONTEXT_RELOAD_OVERLAP before the newest `createdAt`
+    seen and merges the ones it doesn't know yet: another worker's
+    write-behind batch commits after its `createdAt` was stamped, so it can
+    land behind the cursor. The history is then trimmed to
+    CONTEXT_TOKEN_BUDGET using the stored `tokens` column, and trimmed turns
+    are optionally folded into a short extractive summary. Deletions on any
+    worker arrive through the `chats_deleted` NOTIFY channel.
+    """
+
+    MAX_SUMMARY_LINES = 12
+    SUMMARY_LINE_LENGTH = 200
+
+    def __init__(self, chat_repo: ChatRepository, config: Config):
+        self.chat_repo = chat_repo
+        self.token_budget = config.CONTEXT_TOKEN_BUDGET
+        self.summarize = config.CONTEXT_SUMMARIZE
+        self.reload_overlap = timedelta(seconds=config.CONTEXT_RELOAD_OVERLAP)
+        self._conversations: TTLCache[str, _ConversationState] = TTLCache(
+            maxsize=config.CONTEXT_CACHE_SIZE, ttl=config.CONTEXT_CACHE_TTL
+        )
+
+    async def get_window(self, conversation_id: str) -> ContextWindow:
+        """Load new messages since the cursor and return the trimmed window"""
+        state = self._conversations.get(conversation_id)
+        if state is None or state.cursor is None:
+            state = _ConversationState()
+            chats = await self.chat_repo.get_chats(conversation_id)
+        else:
+            chats = await self.chat_repo.get_chats_since(
+                conversation_id, state.cursor - self.reload_overlap
+            )
+        self._merge(state, chats)
+        # Re-set on every turn so active conversations don't expire mid-session
+        self._conversations.set(conversation_id, state)
+
+        self._trim(state)
+        summary = "\n".join(state.summary_lines) if state.summary_lines else None
+        return ContextWindow(messages=list(state.messages), summary=summary)
+
+    def record(self, conversation_id: str, chats: Iterable[Any]) -> None:
+        """Write-through newly persisted messages into an already cached window"""
+        state = self._conversations.get(conversation_id)
+        if state is not None:
+            self._merge(state, chats)
+
+    def discard(self, conversation_id: str, chat_id: str) -> None:
+        """Forget a message that was deleted from the database"""
+        state = self._conversations.get(conversation_id)
+        if state is not None:
+            state.messages = [chat for chat in state.messages if chat.id != chat_id]
+
+    def invalidate(self, conversation_id: Optional[str] = None) -> None:
+        if conversation_id is None:
+            self._conversations.clear()
+        else:
+            self._conversations.pop(conversation_id)
+
+    def handle_notification(self, payload: Dict[str, Any]) -> None:
+        """Handler for the `chats_deleted` NOTIFY channel"""
+        self.invalidate(payload.get("conversationId"))
+
+    def _merge(self, state: _ConversationState, chats: Iterable[Any]) -> None:
+        out_of_order = False
+        for chat in chats:
+            if chat.id in state.known_ids:
+                continue
+            state.known_ids.add(chat.id)
+            if state.cursor is not None and chat.createdAt < state.cursor:
+                out_of_order = True
+            else:
+                state.cursor = chat.createdAt
+            state.messages.append(chat)
+        if out_of_order:
+            state.messages.sort(key=lambda chat: chat.createdAt)
+
+    @staticmethod
+    def _tokens(chat: Any) -> int:
+        return chat.tokens or len(str(chat.content).split())
+
+    def _trim(self, state: _ConversationState) -> None:
+        """Drop the oldest turns until the window fits the token budget"""
+        total = sum(self._tokens(chat) for chat in state.messages)
+        dropped = []
+        while len(state.messages) > 1 and total > self.token_budget:
+            chat = state.messages.pop(0)
+            total -= self._tokens(chat)
+            dropped.append(chat)
+
+        # Never start a trimmed window with an orphaned tool result or tool call
+        while dropped and len(state.messages) > 1 and state.messages[0].role != MessageRole.USER.value:
+            dropped.append(state.messages.pop(0))
+
+        if dropped and self.summarize:
+            self._fold_into_summary(state, dropped)
+
+    def _fold_into_summary(self, state: _ConversationState, dropped: List[Any]) -> None:
+        for chat in dropped:
+            if chat.role not in (MessageRole.USER.value, MessageRole.ASSISTANT.value):
+                continue
+            content = " ".join(str(chat.content).split())
+            if not content:
+                continue
+            if len(content) > self.SUMMARY_LINE_LENGTH:
+                content = content[: self.SUMMARY_LINE_LENGTH] + "..."
+            state.summary_lines.append(f"{chat.role}: {content}")
+        del state.summary_lines[: -self.MAX_SUMMARY_LINES]
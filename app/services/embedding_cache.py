@@ -0,0 +1,86 @@
+import hashlib
+import logging
+from app.core.cache import TTLCache
+from app.core.config import Config
+from typing import Any, Dict, List, Optional, Sequence
+from app.repositories.embedding import EmbeddingCacheRepository
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding store: an in-process LRU in front of the
+    `embedding_cache` table, which every worker shares. Keys hash the model
+    name with the exact text, so re-syncing unchanged chunks or ingesting
+    the same page into several workspaces embeds each chunk once.
+    """
+
+    def __init__(self, repo: EmbeddingCacheRepository, config: Config):
+        self.repo = repo
+        self.model = config.EMBEDDING_MODEL or ""
+        self.persist = config.EMBEDDING_CACHE_PERSIST
+        self._memory: TTLCache[str, List[float]] = TTLCache(
+            maxsize=config.EMBEDDING_CACHE_SIZE, ttl=None
+        )
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode()).hexdigest()
+
+    def get_cached(self, key: str) -> Optional[List[float]]:
+        """In-memory lookup only, for latency-sensitive single embeddings"""
+        embedding = self._memory.get(key)
+        if embedding is None:
+            self.misses += 1
+        else:
+            self.memory_hits += 1
+        return embedding
+
+    async def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """Embeddings for whichever keys are cached in memory or in the shared table"""
+        found: Dict[str, List[float]] = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            embedding = self._memory.get(key)
+            if embedding is None:
+                missing.append(key)
+            else:
+                found[key] = embedding
+        self.memory_hits += len(found)
+
+        stored: Dict[str, List[float]] = {}
+        if missing and self.persist:
+            try:
+                stored = await self.repo.get_embeddings(missing)
+            except Exception as e:
+                logger.error(f"Embedding cache lookup failed: {str(e)}")
+            for key, embedding in stored.items():
+                self._memory.set(key, embedding)
+        self.store_hits += len(stored)
+        self.misses += len(missing) - len(stored)
+        return {**found, **stored}
+
+    def put(self, key: str, embedding: List[float]) -> None:
+        self._memory.set(key, embedding)
+
+    async def put_many(self, embeddings: Dict[str, List[float]]) -> None:
+        for key, embedding in embeddings.items():
+            self._memory.set(key, embedding)
+        if embeddings and self.persist:
+            try:
+                await self.repo.save_embeddings(self.model, embeddings)
+            except Exception as e:
+                logger.error(f"Embedding cache write failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.store_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.store_hits) / lookups if lookups else 0.0,
+            "memory": self._memory.stats(),
+        }
@@ -0,0 +1,320 @@
+import time
+import socket
+import asyncio
+import hashlib
+import logging
+import ipaddress
+import httpx
+import html2text
+from pathlib import Path
+from abc import ABC, abstractmethod
+from urllib.parse import urlsplit, unquote
+from dataclasses import dataclass, field
+from app.core.config import Config
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.repositories.source import SourceRepository
+from app.repositories.vector import VectorRepository
+from app.infrastructure.ai.embeddings import EmbeddingClient
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class DocumentFetcher(ABC):
+    """Retrieves raw source content; returns (text, content type)"""
+
+    @abstractmethod
+    async def fetch(self, url: str) -> tuple[str, str]:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class UnsafeUrlError(ValueError):
+    pass
+
+
+class HttpFetcher(DocumentFetcher):
+    """
+    Fetches public http(s) URLs. Source URLs are user-supplied, so every hop,
+    redirects included, must resolve only to public addresses, and the
+    request is pinned to the address that was checked (the Host header and
+    TLS SNI keep the original name) so DNS can't be re-pointed in between.
+    """
+
+    MAX_REDIRECTS = 5
+
+    def __init__(self, timeout: float = 30):
+        self._client = httpx.AsyncClient(follow_redirects=False, timeout=timeout)
+
+    async def fetch(self, url: str) -> tuple[str, str]:
+        for _ in range(self.MAX_REDIRECTS + 1):
+            target = httpx.URL(url)
+            address = await self._resolve(target)
+            response = await self._client.get(
+                target.copy_with(host=address),
+                headers={"Host": target.netloc.decode("ascii")},
+                extensions={"sni_hostname": target.host},
+            )
+            if response.is_redirect:
+                url = str(target.join(response.headers["location"]))
+                continue
+            response.raise_for_status()
+            content_type = response.headers.get("content-type", "text/html")
+            return response.text, content_type.split(";")[0].strip()
+        raise UnsafeUrlError(f"Too many redirects fetching {url}")
+
+    async def _resolve(self, url: httpx.URL) -> str:
+        """An address for the URL's host; raises unless every address is public"""
+        if url.scheme not in ("http", "https") or not url.host:
+            raise UnsafeUrlError(f"Unsupported URL: {url}")
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(
+                url.host,
+                url.port or (443 if url.scheme == "https" else 80),
+                type=socket.SOCK_STREAM,
+            )
+        except socket.gaierror as e:
+            raise UnsafeUrlError(f"Cannot resolve {url.host}: {str(e)}")
+        addresses = []
+        for info in infos:
+            address = ipaddress.ip_address(info[4][0].split("%")[0])
+            if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+                address = address.ipv4_mapped
+            # is_global excludes private, loopback, link-local and reserved ranges
+            if not address.is_global or address.is_multicast:
+                raise UnsafeUrlError(f"{url.host} resolves to non-public address {address}")
+            addresses.append(str(address))
+        if not addresses:
+            raise UnsafeUrlError(f"Cannot resolve {url.host}")
+        return addresses[0]
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class FileFetcher(DocumentFetcher):
+    """Reads `file://` URLs or paths from disk, e.g. to ingest fixtures offline"""
+
+    CONTENT_TYPES = {
+        ".html": "text/html",
+        ".htm": "text/html",
+        ".md": "text/markdown",
+    }
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root) if root else None
+
+    def _path(self, url: str) -> Path:
+        parts = urlsplit(url)
+        path = Path(unquote(parts.path) if parts.scheme == "file" else url)
+        return self.root / path if self.root and not path.is_absolute() else path
+
+    async def fetch(self, url: str) -> tuple[str, str]:
+        path = self._path(url)
+        text = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: path.read_text(encoding="utf-8")
+        )
+        return text, self.CONTENT_TYPES.get(path.suffix.lower(), "text/plain")
+
+
+def chunk_markdown(text: str, size: int, overlap: int) -> List[str]:
+    """Pack paragraphs into chunks of at most `size` characters, repeating a tail overlap"""
+    # Leave room for the overlap so no chunk grows past `size`
+    limit = max(size - overlap - 2, 1)
+    pieces: List[str] = []
+    for paragraph in (part.strip() for part in text.split("\n\n")):
+        while len(paragraph) > limit:
+            cut = paragraph.rfind(" ", 0, limit)
+            cut = cut if cut > 0 else limit
+            pieces.append(paragraph[:cut])
+            paragraph = paragraph[cut:].strip()
+        if paragraph:
+            pieces.append(paragraph)
+
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 2 > size:
+            chunks.append(current)
+            tail = current[-overlap:] if overlap else ""
+            # Start the overlap on a word boundary
+            current = tail[tail.find(" ") + 1 :] if " " in tail else ""
+        current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+@dataclass
+class _Document:
+    source: Dict[str, Any]
+    sync_id: str
+    started: float
+    content: str = ""
+    content_type: str = ""
+    content_hash: str = ""
+    content_length: int = 0
+    chunks: List[str] = field(default_factory=list)
+    embeddings: List[List[float]] = field(default_factory=list)
+
+
+class IngestionPipeline:
+    """
+    Syncs `sources` into `vectors` as a stream: fetch -> markdown -> chunk ->
+    batch-embed -> bulk insert. Stages run concurrently and are joined by
+    bounded queues, so at most a few documents per stage are held in memory
+    and a slow embedding endpoint applies back-pressure to fetching. Sources
+    whose content hash is unchanged are skipped; every source gets a `syncs`
+    row that is closed as SUCCEEDED or FAILED.
+    """
+
+    def __init__(
+        self,
+        source_repo: SourceRepository,
+        vector_repo: VectorRepository,
+        embeddings: EmbeddingClient,
+        fetcher: DocumentFetcher,
+        config: Config,
+    ):
+        self.source_repo = source_repo
+        self.vector_repo = vector_repo
+        self.embeddings = embeddings
+        self.fetcher = fetcher
+        self.queue_size = config.INGEST_QUEUE_SIZE
+        self.fetch_concurrency = config.INGEST_FETCH_CONCURRENCY
+        self.chunk_size = config.INGEST_CHUNK_SIZE
+        self.chunk_overlap = config.INGEST_CHUNK_OVERLAP
+        self.results: Dict[str, str] = {}
+
+    async def run(self, workspace_id: str, source_ids: List[str]) -> Dict[str, str]:
+        """Sync the given sources; returns the final status of each one"""
+        self.results = {}
+        sources = await self.source_repo.get_sources(workspace_id, source_ids)
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(4)]
+
+        async def produce():
+            for source in sources:
+                await queues[0].put(source)
+            await queues[0].put(_DONE)
+
+        await asyncio.gather(
+            produce(),
+            self._stage(queues[0], queues[1], self._fetch, self.fetch_concurrency),
+            self._stage(queues[1], queues[2], self._convert, 1),
+            self._stage(queues[2], queues[3], self._embed, 1),
+            self._stage(queues[3], None, self._store, 1),
+        )
+        return self.results
+
+    async def _stage(
+        self,
+        inbox: asyncio.Queue,
+        outbox: Optional[asyncio.Queue],
+        handler: Callable[[Any], Awaitable[Optional[_Document]]],
+        workers: int,
+    ) -> None:
+        async def work():
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    # Let sibling workers see the end of the stream too
+                    await inbox.put(_DONE)
+                    return
+                result = await self._guard(item, handler)
+                if result is not None and outbox is not None:
+                    await outbox.put(result)
+
+        await asyncio.gather(*(work() for _ in range(workers)))
+        if outbox is not None:
+            await outbox.put(_DONE)
+
+    async def _guard(
+        self, item: Any, handler: Callable[[Any], Awaitable[Optional[_Document]]]
+    ) -> Optional[_Document]:
+        try:
+            return await handler(item)
+        except Exception as e:
+            if isinstance(item, _Document):
+                await self._fail(item.source["id"], item.sync_id, e)
+            else:
+                await self._fail(item["id"], None, e)
+            return None
+
+    async def _fail(self, source_id: str, sync_id: Optional[str], error: Exception) -> None:
+        logger.error(f"Ingestion of source {source_id} failed: {str(error)}")
+        self.results[source_id] = "FAILED"
+        try:
+            await self.source_repo.set_status(source_id, "FAILED")
+            if sync_id:
+                await self.source_repo.finish_sync(sync_id, "FAILED", str(error)[:500])
+        except Exception as e:
+            logger.error(f"Could not record failed sync for {source_id}: {str(e)}")
+
+    async def _fetch(self, source: Dict[str, Any]) -> Optional[_Document]:
+        await self.source_repo.set_status(source["id"], "SYNCING")
+        document = _Document(
+            source=source,
+            sync_id=await self.source_repo.start_sync(source["id"]),
+            started=time.monotonic(),
+        )
+        try:
+            document.content, document.content_type = await self.fetcher.fetch(source["url"])
+        except Exception as e:
+            await self._fail(source["id"], document.sync_id, e)
+            return None
+        document.content_length = len(document.content)
+        document.content_hash = hashlib.sha256(document.content.encode()).hexdigest()
+        if document.content_hash == source["contentHash"] and source["status"] == "SYNCED":
+            await self.source_repo.set_status(source["id"], "SYNCED")
+            await self.source_repo.finish_sync(document.sync_id, "SUCCEEDED", "Content unchanged")
+            self.results[source["id"]] = "UNCHANGED"
+            return None
+        return document
+
+    def _to_chunks(self, content: str, content_type: str) -> List[str]:
+        if content_type == "text/html":
+            converter = html2text.HTML2Text()
+            converter.body_width = 0
+            converter.ignore_images = True
+            content = converter.handle(content)
+        return chunk_markdown(content, self.chunk_size, self.chunk_overlap)
+
+    async def _convert(self, document: _Document) -> _Document:
+        # Parsing large pages is CPU-bound; keep it off the event loop
+        document.chunks = await asyncio.get_running_loop().run_in_executor(
+            None, self._to_chunks, document.content, document.content_type
+        )
+        document.content = ""
+        return document
+
+    async def _embed(self, document: _Document) -> _Document:
+        document.embeddings = await self.embeddings.embed_many(document.chunks)
+        return document
+
+    async def _store(self, document: _Document) -> None:
+        source = document.source
+        await self.vector_repo.replace_source_vectors(
+            source["workspaceId"],
+            source["id"],
+            [
+                (chunk, {"url": source["url"], "title": source["title"], "chunk": index}, embedding)
+                for index, (chunk, embedding) in enumerate(
+                    zip(document.chunks, document.embeddings)
+                )
+            ],
+        )
+        sync_time = int((time.monotonic() - document.started) * 1000)
+        await self.source_repo.save_content(
+            source["id"],
+            document.content_hash,
+            document.content_length,
+            sync_time,
+            "SYNCED",
+        )
+        await self.source_repo.finish_sync(
+            document.sync_id, "SUCCEEDED", f"{len(document.chunks)} chunks"
+        )
+        self.results[source["id"]] = "SYNCED"
@@ -0,0 +1,212 @@
+import json
+import time
+import asyncio
+import logging
+from datetime import timedelta
+from app.core.cache import TTLCache
+from app.core.config import Config
+from app.core.metrics import LatencyRecorder
+from typing import Dict, List, Optional
+from app.domain.interfaces import Message
+from app.utils import generate_cuid, now
+from app.repositories.chat import ChatRepository
+from app.services.context_window import ContextWindowManager
+
+logger = logging.getLogger(__name__)
+
+
+class MessagePersister:
+    """
+    Write-behind persistence for chat messages. Messages are buffered per
+    conversation with client-side ids and strictly increasing millisecond
+    `createdAt` stamps, then written with a single `create_many` at turn
+    end, when a buffer reaches MESSAGE_FLUSH_SIZE, or after
+    MESSAGE_FLUSH_INTERVAL.
+    A batch that fails is retried with exponential backoff; after
+    MESSAGE_FLUSH_MAX_RETRIES failures it is logged in full and dropped so
+    it can't block the conversation's later writes forever.
+    `close()` drains every buffer and is awaited from the app lifespan.
+    """
+
+    def __init__(
+        self,
+        chat_repo: ChatRepository,
+        context_window: ContextWindowManager,
+        config: Config,
+        latency: Optional[LatencyRecorder] = None,
+    ):
+        self.chat_repo = chat_repo
+        self.latency = latency or LatencyRecorder(enabled=False)
+        self.context_window = context_window
+        self.flush_size = config.MESSAGE_FLUSH_SIZE
+        self.flush_interval = config.MESSAGE_FLUSH_INTERVAL
+        self.max_retries = config.MESSAGE_FLUSH_MAX_RETRIES
+        self.max_backoff = config.MESSAGE_FLUSH_MAX_BACKOFF
+        self._failures: Dict[str, int] = {}
+        self._retry_at: Dict[str, float] = {}
+        self.dropped = 0
+        self._buffers: Dict[str, List[Message]] = {}
+        self._flushing: Dict[str, List[Message]] = {}
+        self._first_buffered: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # Coroutines holding or waiting for each lock; it is dropped at zero
+        self._lock_users: Dict[str, int] = {}
+        self._last_created = TTLCache(maxsize=10000, ttl=60)
+        self._tasks: set[asyncio.Task] = set()
+        self._loop_task: Optional[asyncio.Task] = None
+
+    def enqueue(self, conversation_id: str, message: Message) -> Message:
+        """Buffer a message and return it with its id and createdAt assigned"""
+        # createdAt is stored as TIMESTAMP(3) and drives ordering, so stamps are
+        # whole milliseconds and at least 1ms apart within a conversation
+        created_at = now()
+        created_at = created_at.replace(microsecond=created_at.microsecond // 1000 * 1000)
+        last_created = self._last_created.get(conversation_id)
+        if last_created and created_at < last_created + timedelta(milliseconds=1):
+            created_at = last_created + timedelta(milliseconds=1)
+        self._last_created.set(conversation_id, created_at)
+
+        message.id = message.id or generate_cuid()
+        message.createdAt = created_at
+
+        buffer = self._buffers.setdefault(conversation_id, [])
+        if not buffer:
+            self._first_buffered[conversation_id] = time.monotonic()
+        buffer.append(message)
+
+        if len(buffer) >= self.flush_size:
+            self.schedule_flush(conversation_id)
+        return message
+
+    def pending(self, conversation_id: str) -> List[Message]:
+        """Messages accepted for a conversation but not yet visible in the database"""
+        return [
+            *self._flushing.get(conversation_id, []),
+            *self._buffers.get(conversation_id, []),
+        ]
+
+    def discard(self, conversation_id: str, message_id: str) -> bool:
+        """Drop a buffered message before it is written; False if already flushing"""
+        buffer = self._buffers.get(conversation_id, [])
+        for index, message in enumerate(buffer):
+            if message.id == message_id:
+                del buffer[index]
+                return True
+        return False
+
+    def discard_latest(self, conversation_id: str, role: Optional[str] = None) -> bool:
+        buffer = self._buffers.get(conversation_id, [])
+        for index in range(len(buffer) - 1, -1, -1):
+            if role is None or buffer[index].role == role:
+                del buffer[index]
+                return True
+        return False
+
+    def schedule_flush(self, conversation_id: str) -> None:
+        task = asyncio.create_task(self._flush_quietly(conversation_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush_quietly(self, conversation_id: str, wait_backoff: bool = True) -> None:
+        if wait_backoff and self._retry_at.get(conversation_id, 0) > time.monotonic():
+            return
+        try:
+            await self.flush(conversation_id)
+        except Exception as e:
+            logger.error(f"Error flushing messages for {conversation_id}: {str(e)}")
+
+    async def flush(self, conversation_id: str) -> None:
+        """Write every buffered message of a conversation, preserving order"""
+        lock = self._locks.setdefault(conversation_id, asyncio.Lock())
+        self._lock_users[conversation_id] = self._lock_users.get(conversation_id, 0) + 1
+        try:
+            async with lock:
+                await self._flush_locked(conversation_id)
+        finally:
+            users = self._lock_users[conversation_id] - 1
+            if users:
+                self._lock_users[conversation_id] = users
+            else:
+                # Nobody holds or awaits the lock, so no flush can end up on a second one
+                del self._lock_users[conversation_id]
+                self._locks.pop(conversation_id, None)
+
+    async def _flush_locked(self, conversation_id: str) -> None:
+        messages = self._buffers.pop(conversation_id, [])
+        self._first_buffered.pop(conversation_id, None)
+        if not messages:
+            return
+
+        self._flushing[conversation_id] = messages
+        try:
+            with self.latency.time("message_flush"):
+                await self.chat_repo.save_chat_messages(
+                    [{"conversationId": conversation_id, **m.to_dict()} for m in messages]
+                )
+        except Exception as e:
+            self._failed(conversation_id, messages, e)
+            raise
+        finally:
+            self._flushing.pop(conversation_id, None)
+
+        self._failures.pop(conversation_id, None)
+        self._retry_at.pop(conversation_id, None)
+        self.context_window.record(conversation_id, messages)
+
+    def _failed(self, conversation_id: str, messages: List[Message], error: Exception) -> None:
+        failures = self._failures.get(conversation_id, 0) + 1
+        if failures >= self.max_retries:
+            # Give up on this batch; keep it in the log so it can be replayed by hand
+            self._failures.pop(conversation_id, None)
+            self._retry_at.pop(conversation_id, None)
+            self.dropped += len(messages)
+            logger.error(
+                f"Dropping {len(messages)} chat messages for {conversation_id} after "
+                f"{failures} failed writes ({str(error)}): "
+                + json.dumps(
+                    [{"conversationId": conversation_id, **m.to_dict()} for m in messages],
+                    default=str,
+                )
+            )
+            return
+
+        self._failures[conversation_id] = failures
+        self._retry_at[conversation_id] = time.monotonic() + min(
+            self.flush_interval * 2 ** (failures - 1), self.max_backoff
+        )
+        # Put the batch back in front of anything buffered meanwhile
+        self._buffers[conversation_id] = messages + self._buffers.get(conversation_id, [])
+        self._first_buffered.setdefault(conversation_id, time.monotonic())
+
+    async def flush_all(self) -> None:
+        for conversation_id in list(self._buffers):
+            await self._flush_quietly(conversation_id, wait_backoff=False)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            deadline = time.monotonic() - self.flush_interval
+            for conversation_id, first in list(self._first_buffered.items()):
+                if first <= deadline:
+                    await self._flush_quietly(conversation_id)
+
+    def start(self) -> None:
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the background flusher and drain all buffers"""
+        if self._loop_task:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush_all()
+
+        lost = sum(len(messages) for messages in self._buffers.values())
+        if lost:
+            logger.error(f"{lost} chat messages could not be persisted on shutdown")
@@ -0,0 +1,368 @@
+import math
+import heapq
+import bisect
+import logging
+import Levenshtein
+from operator import itemgetter
+from collections import Counter, defaultdict
+from pathlib import Path
+from functools import lru_cache
+from app.core.cache import TTLCache
+from app.core.config import Config
+from prisma.models import BusinessProduct
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set
+from app.repositories.business import BusinessRepository
+
+logger = logging.getLogger(__name__)
+
+PRODUCTS_CHANGED_CHANNEL = "products_changed"
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+
+
+@lru_cache()
+def load_word_list(name: str) -> FrozenSet[str]:
+    """Read one entry per line from a file in the `data` directory"""
+    with open(DATA_DIR / name, encoding="utf-8") as file:
+        return frozenset(line.strip() for line in file if line.strip())
+
+
+class ProductTokenizer:
+    """Lowercases, replaces symbols with spaces and drops stopwords"""
+
+    def __init__(self, stopwords: Iterable[str], symbols: Iterable[str]):
+        self.stopwords = frozenset(stopwords)
+        self._table = str.maketrans({symbol: " " for symbol in symbols if len(symbol) == 1})
+
+    @classmethod
+    def from_data_files(cls) -> "ProductTokenizer":
+        return cls(load_word_list("stopwords.txt"), load_word_list("symbols.txt"))
+
+    def tokenize(self, text: Optional[str]) -> List[str]:
+        if not text:
+            return []
+        words = text.lower().translate(self._table).split()
+        return [word for word in words if word not in self.stopwords]
+
+
+class TrigramMatcher:
+    """
+    Typo-tolerant term lookup: candidates sharing the most trigrams with the
+    query term are re-ranked by Levenshtein distance. Short terms allow one
+    edit and every match must keep MIN_SIMILARITY, so different words of
+    similar shape ("phones" / "shoes") don't match.
+    """
+
+    MIN_TERM_LENGTH = 4
+    MAX_CANDIDATES = 50
+    MIN_SIMILARITY = 0.75
+
+    def __init__(self):
+        self._terms: Dict[str, int] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def trigrams(term: str) -> Set[str]:
+        padded = f"  {term} "
+        return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+    @staticmethod
+    def max_edits(term: str) -> int:
+        return 1 if len(term) <= 7 else 2
+
+    def add(self, term: str) -> None:
+        count = self._terms.get(term, 0)
+        self._terms[term] = count + 1
+        if count == 0:
+            for trigram in self.trigrams(term):
+                self._trigrams.setdefault(trigram, set()).add(term)
+
+    def discard(self, term: str) -> None:
+        count = self._terms.get(term, 0)
+        if count > 1:
+            self._terms[term] = count - 1
+            return
+        if count == 0:
+            return
+        del self._terms[term]
+        for trigram in self.trigrams(term):
+            terms = self._trigrams[trigram]
+            terms.discard(term)
+            if not terms:
+                del self._trigrams[trigram]
+
+    def match(self, term: str, limit: int = 3) -> List[tuple[str, float]]:
+        """Known terms within the edit budget of `term` with their similarity"""
+        if len(term) < self.MIN_TERM_LENGTH:
+            return []
+
+        shared = Counter()
+        for trigram in self.trigrams(term):
+            shared.update(self._trigrams.get(trigram, ()))
+
+        max_edits = self.max_edits(term)
+        matches = []
+        for candidate, _ in shared.most_common(self.MAX_CANDIDATES):
+            if abs(len(candidate) - len(term)) > max_edits:
+                continue
+            distance = Levenshtein.distance(term, candidate, score_cutoff=max_edits)
+            similarity = 1 - distance / max(len(term), len(candidate))
+            if distance <= max_edits and similarity >= self.MIN_SIMILARITY:
+                matches.append((candidate, similarity))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches[:limit]
+
+
+class ProductSearchIndex:
+    """
+    Inverted index over one business's active products, ranked with BM25.
+    Name, category and description terms are weighted into a single bag of
+    words per product. Query terms also match indexed terms they prefix,
+    like the `word:*` tsquery used by the database path; terms that match
+    nothing fall back to misspelling-tolerant matches against product and
+    category names.
+    """
+
+    FIELD_WEIGHTS = {"name": 3.0, "category": 2.0, "description": 1.0}
+    K1 = 1.2
+    B = 0.75
+    MIN_PREFIX_LENGTH = 3
+    MAX_PREFIX_EXPANSIONS = 50
+    PREFIX_WEIGHT = 0.5
+    FUZZY_FIELDS = ("name", "category")
+    NORM_DRIFT = 0.05
+
+    def __init__(self, tokenizer: ProductTokenizer):
+        self.tokenizer = tokenizer
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        self._document_terms: Dict[str, Dict[str, float]] = {}
+        self._document_lengths: Dict[str, float] = {}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        # Sorted once after a bulk build, kept sorted by incremental updates
+        self._vocabulary: Optional[List[str]] = []
+        self._total_length = 0.0
+        self._norms: Optional[Dict[str, float]] = None
+        self._norms_average = 0.0
+        self._names: Dict[str, Set[str]] = {}
+        self.fuzzy = TrigramMatcher()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    @staticmethod
+    def to_document(product: BusinessProduct) -> Dict[str, Any]:
+        return {
+            "id": product.id,
+            "name": product.name,
+            "description": product.description,
+            "price": product.price,
+            "stock": product.stock,
+            "category": product.category.name if product.category else None,
+            "images": product.images,
+        }
+
+    def build(self, products: Iterable[BusinessProduct]) -> None:
+        """Bulk-load products, deferring vocabulary sorting and norms to the end"""
+        self._vocabulary = None
+        for product in products:
+            self.upsert(product)
+        self._vocabulary = sorted(self._postings)
+        if self._documents:
+            self._length_norms()
+
+    def upsert(self, product: BusinessProduct) -> None:
+        """Index a product, replacing any previous version of it"""
+        self.remove(product.id)
+        if not product.isActive:
+            return
+
+        document = self.to_document(product)
+        terms: Dict[str, float] = {}
+        for field, weight in self.FIELD_WEIGHTS.items():
+            for token in self.tokenizer.tokenize(document[field]):
+                terms[token] = terms.get(token, 0.0) + weight
+
+        names = {
+            token
+            for field in self.FUZZY_FIELDS
+            for token in self.tokenizer.tokenize(document[field])
+        }
+        for name in names:
+            self.fuzzy.add(name)
+
+        self._documents[product.id] = document
+        self._document_terms[product.id] = terms
+        self._names[product.id] = names
+        self._document_lengths[product.id] = sum(terms.values())
+        self._total_length += self._document_lengths[product.id]
+        if self._norms is not None:
+            self._norms[product.id] = self._length_norm(self._document_lengths[product.id])
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                if self._vocabulary is not None:
+                    bisect.insort(self._vocabulary, term)
+            postings[product.id] = frequency
+
+    def remove(self, product_id: str) -> None:
+        terms = self._document_terms.pop(product_id, None)
+        if terms is None:
+            return
+        del self._documents[product_id]
+        for name in self._names.pop(product_id):
+            self.fuzzy.discard(name)
+        self._total_length -= self._document_lengths.pop(product_id)
+        if self._norms is not None:
+            del self._norms[product_id]
+        for term in terms:
+            postings = self._postings[term]
+            del postings[product_id]
+            if not postings:
+                del self._postings[term]
+                if self._vocabulary is not None:
+                    position = bisect.bisect_left(self._vocabulary, term)
+                    del self._vocabulary[position]
+
+    def _expand(self, term: str) -> List[tuple[str, float]]:
+        """The term itself plus indexed terms it is a prefix of, else its fuzzy matches"""
+        expansions = [(term, 1.0)] if term in self._postings else []
+        if len(term) >= self.MIN_PREFIX_LENGTH:
+            expansions.extend(self._expand_prefix(term))
+        if not expansions:
+            expansions = self.fuzzy.match(term)
+        return expansions
+
+    def _expand_prefix(self, term: str) -> List[tuple[str, float]]:
+        expansions = []
+        position = bisect.bisect_right(self._vocabulary, term)
+        for candidate in self._vocabulary[position : position + self.MAX_PREFIX_EXPANSIONS]:
+            if not candidate.startswith(term):
+                break
+            expansions.append((candidate, self.PREFIX_WEIGHT))
+        return expansions
+
+    def _length_norms(self) -> Dict[str, float]:
+        """BM25 length normalisation per product, recomputed as the average drifts"""
+        average_length = self._total_length / len(self._documents) or 1.0
+        if (
+            self._norms is None
+            or abs(average_length - self._norms_average) > average_length * self.NORM_DRIFT
+        ):
+            self._norms_average = average_length
+            self._norms = {
+                product_id: self._length_norm(length)
+                for product_id, length in self._document_lengths.items()
+            }
+        return self._norms
+
+    def _length_norm(self, length: float) -> float:
+        return self.K1 * (1 - self.B + self.B * length / self._norms_average)
+
+    def search(self, query: str, limit: int = 15) -> List[Dict[str, Any]]:
+        terms = self.tokenizer.tokenize(query)
+        if not terms or not self._documents:
+            return []
+
+        count = len(self._documents)
+        norms = self._length_norms()
+        k1_plus_one = self.K1 + 1
+        scores: Dict[str, float] = defaultdict(float)
+        for term in dict.fromkeys(terms):
+            for indexed_term, weight in self._expand(term):
+                postings = self._postings[indexed_term]
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                factor = weight * idf * k1_plus_one
+                for product_id, frequency in postings.items():
+                    scores[product_id] += factor * frequency / (frequency + norms[product_id])
+
+        best = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+        best.sort(key=lambda item: (-item[1], self._documents[item[0]]["name"]))
+        return [dict(self._documents[product_id]) for product_id, _ in best]
+
+
+class ProductSearchEngine:
+    """
+    Per-business `ProductSearchIndex` cache backing `search_products`. An
+    index is built on the first search for a business and expires by TTL;
+    product changes published on the `products_changed` NOTIFY channel are
+    applied to a live index one row at a time, category changes rebuild it.
+    With the index disabled it still serves typo-tolerant fallback searches.
+    """
+
+    def __init__(self, business_repo: BusinessRepository, config: Config):
+        self.business_repo = business_repo
+        # Without NOTIFY an index would only be refreshed by its TTL, serving
+        # stale prices, stock and active flags until then
+        self.enabled = config.PRODUCT_SEARCH_INDEX and config.DB_NOTIFY_ENABLED
+        self.fuzzy_fallback = config.PRODUCT_FUZZY_SEARCH and config.DB_NOTIFY_ENABLED
+        for setting in ("PRODUCT_SEARCH_INDEX", "PRODUCT_FUZZY_SEARCH"):
+            if getattr(config, setting) and not config.DB_NOTIFY_ENABLED:
+                logger.warning(f"{setting} ignored: it requires DB_NOTIFY_ENABLED")
+        self.tokenizer = ProductTokenizer.from_data_files()
+        self._indexes: TTLCache[str, ProductSearchIndex] = TTLCache(
+            maxsize=config.PRODUCT_INDEX_CACHE_SIZE, ttl=config.PRODUCT_INDEX_TTL
+        )
+
+    async def get_index(self, business_id: str) -> ProductSearchIndex:
+        return await self._indexes.get_or_load(
+            business_id, lambda: self._build(business_id)
+        )
+
+    async def _build(self, business_id: str) -> ProductSearchIndex:
+        products = await self.business_repo.get_active_products(business_id)
+        index = ProductSearchIndex(self.tokenizer)
+        index.build(products)
+        logger.info(f"Built product index for business {business_id}: {len(index)} products")
+        return index
+
+    async def search(
+        self, business_id: str, query: str, limit: int = 15
+    ) -> List[Dict[str, Any]]:
+        index = await self.get_index(business_id)
+        return index.search(query, limit)
+
+    async def refresh_product(self, business_id: str, product_id: str) -> None:
+        """Re-read one product into the business index if it is loaded"""
+        index = self._indexes.get(business_id)
+        if index is None:
+            # A build in flight may have read the row before this change
+            self._indexes.pop(business_id)
+            return
+        product = await self.business_repo.get_product(product_id)
+        if product is None or product.businessId != business_id:
+            index.remove(product_id)
+        else:
+            index.upsert(product)
+
+    def invalidate(self, business_id: Optional[str] = None) -> None:
+        """Drop the index of one business, or every index when no id is given"""
+        if business_id is None:
+            self._indexes.clear()
+        else:
+            self._indexes.pop(business_id)
+
+    async def handle_notification(self, payload: Dict[str, Any]) -> None:
+        """Handler for the `products_changed` NOTIFY channel"""
+        business_id = payload.get("businessId")
+        product_id = payload.get("id")
+        if payload.get("table") != "products" or not business_id or not product_id:
+            self.invalidate(business_id)
+            return
+
+        if payload.get("op") == "DELETE":
+            index = self._indexes.get(business_id)
+            if index is not None:
+                index.remove(product_id)
+            else:
+                self._indexes.pop(business_id)
+            return
+
+        try:
+            await self.refresh_product(business_id, product_id)
+        except Exception as e:
+            logger.error(f"Product index refresh failed: {str(e)}")
+            self.invalidate(business_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._indexes.stats()
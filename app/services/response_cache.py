@@ -0,0 +1,188 @@
+import re
+import math
+import time
+import asyncio
+import logging
+from operator import mul
+from dataclasses import dataclass
+from app.core.cache import TTLCache
+from app.core.config import Config
+from app.core.metrics import LatencyRecorder
+from typing import Any, Dict, List, Optional
+from app.infrastructure.ai.embeddings import EmbeddingClient
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _CachedAnswer:
+    prompt: str
+    embedding: Optional[List[float]]
+    answer: str
+    created: float
+
+
+@dataclass
+class ResponseLookup:
+    """Outcome of a cache lookup; `answer` is set on a hit, otherwise pass it to `store`"""
+
+    key: tuple
+    prompt: str
+    embedding: Optional[List[float]] = None
+    answer: Optional[str] = None
+
+
+class ResponseCache:
+    """
+    Semantic cache of seller-bot answers. Answers are bucketed by
+    (businessId, chat mode, business-data version), where the version is the
+    seller prompt's prefix hash, so any change to the rendered business data
+    starts a fresh bucket. Within a bucket a prompt matches an earlier one
+    when their normalized text is equal or their embeddings' cosine
+    similarity reaches RESPONSE_CACHE_THRESHOLD.
+
+    The seller prompt ends with the current time, which the version leaves
+    out, so prompts and answers relative to it ("are you open now?", "we
+    close in an hour today") are never cached. Static schedules are cached
+    like any other answer; editing them invalidates the business.
+    """
+
+    RELATIVE_TIME = re.compile(
+        r"\b(now|today|tonight|tomorrow|yesterday|currently|at the moment|"
+        r"this (morning|afternoon|evening|week|weekend)|still open|open yet)\b"
+    )
+
+    def __init__(
+        self,
+        embeddings: EmbeddingClient,
+        config: Config,
+        latency: Optional[LatencyRecorder] = None,
+    ):
+        self.embeddings = embeddings
+        self.enabled = config.RESPONSE_CACHE_ENABLED
+        self.threshold = config.RESPONSE_CACHE_THRESHOLD
+        self.ttl = config.RESPONSE_CACHE_TTL
+        self.max_entries = config.RESPONSE_CACHE_ENTRIES
+        self._buckets: TTLCache[tuple, List[_CachedAnswer]] = TTLCache(
+            maxsize=config.RESPONSE_CACHE_SIZE, ttl=config.RESPONSE_CACHE_TTL
+        )
+        self._tasks: set[asyncio.Task] = set()
+        self.latency = latency or LatencyRecorder(enabled=False)
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.uncacheable = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def normalize(prompt: str) -> str:
+        return " ".join(re.sub(r"[^\w\s]", " ", prompt.lower()).split())
+
+    @staticmethod
+    def _unit(vector: List[float]) -> List[float]:
+        norm = math.sqrt(sum(map(mul, vector, vector))) or 1.0
+        return [value / norm for value in vector]
+
+    def _live_entries(self, key: tuple) -> List[_CachedAnswer]:
+        entries = self._buckets.get(key) or []
+        expires_before = time.monotonic() - self.ttl
+        return [entry for entry in entries if entry.created >= expires_before]
+
+    async def lookup(
+        self, business_id: str, mode: Optional[str], version: str, prompt: str
+    ) -> Optional[ResponseLookup]:
+        """Find a cached answer for `prompt`; None when the prompt can't be cached"""
+        normalized = self.normalize(prompt)
+        if not self.enabled or not normalized:
+            return None
+        if self.RELATIVE_TIME.search(normalized):
+            self._count("uncacheable")
+            return None
+
+        lookup = ResponseLookup(key=(business_id, mode, version), prompt=normalized)
+        with self.latency.time("response_cache_lookup"):
+            entries = self._live_entries(lookup.key)
+            for entry in entries:
+                if entry.prompt == normalized:
+                    self._count("exact_hits")
+                    lookup.answer = entry.answer
+                    return lookup
+
+            # Only pay for an embedding when there is something to compare with
+            if entries and self.embeddings.configured:
+                try:
+                    lookup.embedding = self._unit(await self.embeddings.embed(normalized))
+                except Exception as e:
+                    logger.error(f"Response cache embedding failed: {str(e)}")
+                    self._count("misses")
+                    return lookup
+
+                best, best_score = None, self.threshold
+                for entry in entries:
+                    if entry.embedding is None:
+                        continue
+                    score = sum(map(mul, lookup.embedding, entry.embedding))
+                    if score >= best_score:
+                        best, best_score = entry, score
+                if best is not None:
+                    self._count("semantic_hits")
+                    lookup.answer = best.answer
+                    return lookup
+
+        self._count("misses")
+        return lookup
+
+    def store(self, lookup: ResponseLookup, answer: str) -> None:
+        """Remember the answer generated for a missed lookup, embedding it in the background"""
+        if not self.enabled or lookup.answer is not None or not answer.strip():
+            return
+        if self.RELATIVE_TIME.search(self.normalize(answer)):
+            # e.g. "we're open until 6pm today", derived from the current time
+            self._count("uncacheable")
+            return
+        task = asyncio.create_task(self._store(lookup, answer))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _store(self, lookup: ResponseLookup, answer: str) -> None:
+        embedding = lookup.embedding
+        if embedding is None and self.embeddings.configured:
+            try:
+                embedding = self._unit(await self.embeddings.embed(lookup.prompt))
+            except Exception as e:
+                logger.error(f"Response cache embedding failed: {str(e)}")
+
+        entries = [
+            entry for entry in self._live_entries(lookup.key) if entry.prompt != lookup.prompt
+        ]
+        entries.append(_CachedAnswer(lookup.prompt, embedding, answer, time.monotonic()))
+        self._buckets.set(lookup.key, entries[-self.max_entries :])
+        self._count("stores")
+
+    def _count(self, outcome: str) -> None:
+        setattr(self, outcome, getattr(self, outcome) + 1)
+        # Shared recorder: exported on /metrics as chat_response_cache_<outcome>_total
+        self.latency.increment(f"response_cache_{outcome}")
+
+    def invalidate(self, business_id: Optional[str] = None) -> None:
+        """Drop cached answers for one business, or all of them when no id is given"""
+        self.invalidations += 1
+        if business_id is None:
+            self._buckets.clear()
+        else:
+            self._buckets.invalidate(lambda key: key[0] == business_id)
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses
+        return {
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "uncacheable": self.uncacheable,
+            "invalidations": self.invalidations,
+            "buckets": self._buckets.stats(),
+        }
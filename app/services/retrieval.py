@@ -0,0 +1,133 @@
+import logging
+from prisma.models import Bot
+from dataclasses import dataclass
+from app.core.cache import TTLCache
+from app.core.config import Config
+from app.core.metrics import LatencyRecorder
+from typing import Any, Dict, FrozenSet, List, Optional
+from app.repositories.vector import VectorRepository
+from app.services.vector_index import VectorIndexManager
+from app.infrastructure.ai.embeddings import EmbeddingClient
+
+logger = logging.getLogger(__name__)
+
+BOT_SOURCES_CHANGED_CHANNEL = "bot_sources_changed"
+
+
+@dataclass
+class RetrievedChunk:
+    id: str
+    source_id: str
+    content: str
+    metadata: Dict[str, Any]
+    score: float
+
+
+class RetrievalService:
+    """
+    Hybrid retrieval over the pgvector `vectors` table: the user prompt is
+    embedded, matched against the bot's sources by ANN and full-text search,
+    and the fused top chunks are returned for the chat context. Workspaces
+    mirrored by the FAISS hot index are searched in-process by similarity
+    alone. Bots without sources are remembered so they skip the embedding
+    call entirely; attaching or detaching a source arrives through the
+    `bot_sources_changed` NOTIFY channel.
+    """
+
+    def __init__(
+        self,
+        vector_repo: VectorRepository,
+        embeddings: EmbeddingClient,
+        vector_index: VectorIndexManager,
+        config: Config,
+    ):
+        self.vector_repo = vector_repo
+        self.embeddings = embeddings
+        self.vector_index = vector_index
+        self.enabled = config.RETRIEVAL_ENABLED and embeddings.configured
+        self.top_k = config.RETRIEVAL_TOP_K
+        self.candidates = config.RETRIEVAL_CANDIDATES
+        self.probes = config.RETRIEVAL_PROBES
+        self.rrf_k = config.RETRIEVAL_RRF_K
+        self._bot_sources: TTLCache[str, FrozenSet[str]] = TTLCache(
+            maxsize=4096, ttl=config.RETRIEVAL_SOURCES_TTL
+        )
+        self.latency = LatencyRecorder()
+
+    async def retrieve(self, bot: Bot, query: str) -> List[RetrievedChunk]:
+        """Top chunks from the bot's sources for `query`; empty on any failure"""
+        if not self.enabled or not query or not query.strip():
+            return []
+        try:
+            with self.latency.time("total"):
+                source_ids = await self._bot_sources.get_or_load(
+                    bot.id, lambda: self._load_bot_sources(bot.id)
+                )
+                if not source_ids:
+                    return []
+
+                with self.latency.time("embed"):
+                    embedding = await self.embeddings.embed(query)
+                rows = None
+                if self.vector_index.serves(bot.workspaceId):
+                    try:
+                        with self.latency.time("hot_search"):
+                            rows = await self.vector_index.search(
+                                bot.workspaceId, embedding, source_ids, self.top_k
+                            )
+                    except Exception as e:
+                        logger.error(f"FAISS search failed, using pgvector: {str(e)}")
+                if rows is None:
+                    with self.latency.time("search"):
+                        rows = await self.vector_repo.hybrid_search(
+                            bot.workspaceId,
+                            bot.id,
+                            embedding,
+                            query,
+                            limit=self.top_k,
+                            candidates=self.candidates,
+                            probes=self.probes,
+                            rrf_k=self.rrf_k,
+                        )
+        except Exception as e:
+            logger.error(f"Retrieval failed: {str(e)}")
+            return []
+
+        return [
+            RetrievedChunk(
+                id=row["id"],
+                source_id=row["sourceId"],
+                content=row["chunkContent"],
+                metadata=row["metadata"] or {},
+                score=float(row["score"]),
+            )
+            for row in rows
+        ]
+
+    async def _load_bot_sources(self, bot_id: str) -> FrozenSet[str]:
+        return frozenset(await self.vector_repo.get_bot_source_ids(bot_id))
+
+    def invalidate(self, bot_id: Optional[str] = None) -> None:
+        """Forget a bot's cached source ids, e.g. after a source is attached"""
+        if bot_id is None:
+            self._bot_sources.clear()
+        else:
+            self._bot_sources.pop(bot_id)
+
+    def handle_notification(self, payload: Dict[str, Any]) -> None:
+        """Handler for the `bot_sources_changed` NOTIFY channel"""
+        self.invalidate(payload.get("botId"))
+
+    @staticmethod
+    def format_context(chunks: List[RetrievedChunk]) -> str:
+        return "\n\n".join(
+            f"[{index}] {' '.join(chunk.content.split())}"
+            for index, chunk in enumerate(chunks, start=1)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "latency": self.latency.stats(),
+            "bot_sources": self._bot_sources.stats(),
+            "hot_index": self.vector_index.stats(),
+        }
@@ -0,0 +1,111 @@
+import asyncio
+import hashlib
+import logging
+from app.core.cache import TTLCache
+from app.domain.interfaces import Message, MessageRole
+from typing import Awaitable, Callable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+SuggestionGenerator = Callable[[List[Message]], Awaitable[List[str]]]
+
+
+class SuggestionService:
+    """
+    Runs follow-up question generation in the background as soon as the
+    assistant's answer is known. Results are cached per conversation state
+    (a hash of the bot, the version of its prompt's stable prefix and the
+    recent turns), so the chat stream and the suggestions endpoint share one
+    generation and can await it independently, while bots never reuse each
+    other's suggestions. The prompt's per-turn tail, which carries the current
+    time, is left out of the key or it could never hit.
+    """
+
+    RECENT_MESSAGES = 4
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 10 * 60):
+        self._tasks: TTLCache[str, tuple[str, asyncio.Task]] = TTLCache(
+            maxsize=maxsize, ttl=ttl
+        )
+        self._results: TTLCache[str, List[str]] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @classmethod
+    def recent_messages(cls, history: Sequence) -> List[Message]:
+        """Last user/assistant turns with content, oldest first"""
+        messages = [
+            Message(role=chat.role, content=chat.content)
+            for chat in history
+            if chat.role in (MessageRole.USER.value, MessageRole.ASSISTANT.value)
+            and chat.content
+        ]
+        return messages[-cls.RECENT_MESSAGES:]
+
+    @staticmethod
+    def _state_key(scope: str, prompt_version: str, messages: List[Message]) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{scope}\x00{prompt_version}\x02".encode("utf-8"))
+        for message in messages:
+            digest.update(f"{message.role}\x00{message.content}\x01".encode("utf-8"))
+        return digest.hexdigest()
+
+    def start(
+        self,
+        conversation_id: str,
+        messages: List[Message],
+        generate: SuggestionGenerator,
+        scope: str,
+        prompt_version: str = "",
+    ) -> asyncio.Future:
+        """
+        Start (or reuse) suggestion generation for the conversation's current
+        state. `scope` is the bot the suggestions are generated for and
+        `prompt_version` the prefix hash of its system prompt.
+        """
+        state_key = self._state_key(scope, prompt_version, messages)
+        cached = self._results.get(state_key)
+        if cached is not None:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(cached)
+            return future
+
+        current = self._tasks.get(conversation_id)
+        if current is not None:
+            current_key, task = current
+            if current_key == state_key:
+                return task
+            # The conversation moved on; the old suggestions are stale
+            task.cancel()
+
+        task = asyncio.create_task(self._generate(state_key, messages, generate))
+        self._tasks.set(conversation_id, (state_key, task))
+        return task
+
+    async def _generate(
+        self, state_key: str, messages: List[Message], generate: SuggestionGenerator
+    ) -> List[str]:
+        try:
+            suggestions = await generate(messages)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error generating suggestions: {str(e)}")
+            return []
+        self._results.set(state_key, suggestions)
+        return suggestions
+
+    async def get(self, conversation_id: str) -> Optional[List[str]]:
+        """Await the latest generation for a conversation, if this worker has one"""
+        current = self._tasks.get(conversation_id)
+        if current is None:
+            return None
+        try:
+            return await asyncio.shield(current[1])
+        except asyncio.CancelledError:
+            if current[1].cancelled():
+                return []
+            raise
+
+    def cancel(self, conversation_id: str) -> None:
+        current = self._tasks.pop(conversation_id)
+        if current is not None:
+            current[1].cancel()
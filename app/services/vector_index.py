@@ -0,0 +1,512 @@
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+from app.core.cache import TTLCache
+from app.core.config import Config
+from dataclasses import dataclass, field
+from app.repositories.vector import VectorRepository
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Chunks:
+    """Chunk rows aligned with the labels of a snapshot index (label == position)"""
+
+    ids: List[str] = field(default_factory=list)
+    source_ids: List[str] = field(default_factory=list)
+    contents: List[str] = field(default_factory=list)
+    metadata: List[Any] = field(default_factory=list)
+    updated_at: List[str] = field(default_factory=list)
+
+    def append(self, row: Dict[str, Any]) -> None:
+        self.ids.append(row["id"])
+        self.source_ids.append(row["sourceId"])
+        self.contents.append(row["chunkContent"])
+        self.metadata.append(row["metadata"])
+        self.updated_at.append(row["updatedAt"])
+
+    def row(self, position: int) -> Dict[str, Any]:
+        return {
+            "id": self.ids[position],
+            "sourceId": self.source_ids[position],
+            "chunkContent": self.contents[position],
+            "metadata": self.metadata[position],
+        }
+
+
+class WorkspaceVectorIndex:
+    """
+    A workspace's FAISS snapshot plus an exact in-memory delta of rows
+    updated since the snapshot was built. Rows replaced by the delta or
+    deleted from Postgres are tombstoned and filtered out of results.
+
+    Searches run in worker threads while syncs update the index on the
+    event loop, so updates swap in new `tombstones` and `delta` containers
+    instead of mutating the ones a running search holds.
+    """
+
+    OVERSAMPLE = 4
+
+    def __init__(
+        self,
+        faiss: Any,
+        np: Any,
+        base: Any,
+        chunks: _Chunks,
+        watermark: tuple[Optional[str], str],
+        version: str,
+        built_at: float,
+    ):
+        self.faiss = faiss
+        self.np = np
+        self.base = base
+        self.chunks = chunks
+        self.positions = {chunk_id: position for position, chunk_id in enumerate(chunks.ids)}
+        self.watermark = watermark
+        self.version = version
+        self.built_at = built_at
+        self.synced_at = time.monotonic()
+        self.tombstones: Set[int] = set()
+        self.delta: Dict[str, Dict[str, Any]] = {}
+        # (delta it was built from, flat index, rows aligned with its labels)
+        self._delta_cache: Optional[tuple[Dict[str, Dict[str, Any]], Any, List[Dict[str, Any]]]] = None
+        self._selectors: Dict[FrozenSet[str], Any] = {}
+
+    def __len__(self) -> int:
+        return self.base.ntotal - len(self.tombstones) + len(self.delta)
+
+    def apply(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Overlay rows (with a parsed `vector`) updated after the snapshot.
+        Rows already mirrored at the same `updatedAt` are skipped, so
+        re-reading an overlap behind the watermark is idempotent.
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        tombstones, delta = set(self.tombstones), dict(self.delta)
+        for row in rows:
+            if self._mirrored_at(row["id"]) == row["updatedAt"]:
+                continue
+            position = self.positions.get(row["id"])
+            if position is not None:
+                tombstones.add(position)
+            delta[row["id"]] = row
+        self.tombstones, self.delta = tombstones, delta
+        newest = (rows[-1]["updatedAt"], rows[-1]["id"])
+        if self.watermark[0] is None or newest > self.watermark:
+            self.watermark = newest
+
+    def _mirrored_at(self, chunk_id: str) -> Optional[str]:
+        """`updatedAt` of the version of a row this index returns, if any"""
+        if chunk_id in self.delta:
+            return self.delta[chunk_id]["updatedAt"]
+        position = self.positions.get(chunk_id)
+        if position is None or position in self.tombstones:
+            return None
+        return self.chunks.updated_at[position]
+
+    def ids(self) -> Set[str]:
+        """Ids of the rows this index currently returns"""
+        tombstones = self.tombstones
+        live = {
+            chunk_id
+            for position, chunk_id in enumerate(self.chunks.ids)
+            if position not in tombstones
+        }
+        live.update(self.delta)
+        return live
+
+    def retain(self, live_ids: Set[str]) -> int:
+        """Tombstone every row whose id is not in `live_ids`; returns how many"""
+        tombstones, delta = set(self.tombstones), dict(self.delta)
+        removed = 0
+        for chunk_id in self.ids() - live_ids:
+            position = self.positions.get(chunk_id)
+            if position is not None:
+                tombstones.add(position)
+            delta.pop(chunk_id, None)
+            removed += 1
+        if removed:
+            self.tombstones, self.delta = tombstones, delta
+        return removed
+
+    def _selector(self, source_ids: FrozenSet[str]) -> Optional[Any]:
+        """Label filter for a bot's sources; None when it would keep every label"""
+        if source_ids not in self._selectors:
+            labels = [
+                position
+                for position, source_id in enumerate(self.chunks.source_ids)
+                if source_id in source_ids
+            ]
+            if len(labels) == len(self.chunks.source_ids):
+                self._selectors[source_ids] = None
+            else:
+                self._selectors[source_ids] = self.faiss.IDSelectorBatch(
+                    self.np.array(labels, dtype="int64")
+                )
+        return self._selectors[source_ids]
+
+    def _search_base(
+        self, query: Any, k: int, source_ids: FrozenSet[str], tombstones: Set[int]
+    ) -> List[tuple[float, Dict[str, Any]]]:
+        if not self.base.ntotal:
+            return []
+        selector = self._selector(source_ids)
+        params = None
+        if selector is not None:
+            if hasattr(self.base, "nprobe"):
+                params = self.faiss.SearchParametersIVF(sel=selector, nprobe=self.base.nprobe)
+            else:
+                params = self.faiss.SearchParameters(sel=selector)
+        fetch = min(self.base.ntotal, k * self.OVERSAMPLE + len(tombstones))
+        scores, labels = self.base.search(query, fetch, params=params)
+
+        results = []
+        for score, label in zip(scores[0], labels[0]):
+            label = int(label)
+            if label < 0 or label in tombstones:
+                continue
+            results.append((float(score), self.chunks.row(label)))
+            if len(results) == k:
+                break
+        return results
+
+    def _search_delta(
+        self, query: Any, k: int, source_ids: FrozenSet[str], delta: Dict[str, Dict[str, Any]]
+    ) -> List[tuple[float, Dict[str, Any]]]:
+        if not delta:
+            return []
+        cache = self._delta_cache
+        if cache is None or cache[0] is not delta:
+            rows = list(delta.values())
+            vectors = self.np.vstack([row["vector"] for row in rows])
+            flat = self.faiss.IndexFlatIP(vectors.shape[1])
+            flat.add(vectors)
+            cache = self._delta_cache = (delta, flat, rows)
+        _, flat, rows = cache
+        scores, labels = flat.search(query, len(rows))
+        results = []
+        for score, label in zip(scores[0], labels[0]):
+            if label < 0:
+                continue
+            row = rows[int(label)]
+            if row["sourceId"] in source_ids:
+                results.append((float(score), row))
+                if len(results) == k:
+                    break
+        return results
+
+    def search(
+        self, query: Any, k: int, source_ids: FrozenSet[str]
+    ) -> List[Dict[str, Any]]:
+        """Top `k` chunks from `source_ids` by cosine similarity to a normalized query"""
+        tombstones, delta = self.tombstones, self.delta
+        results = self._search_base(query, k, source_ids, tombstones) + self._search_delta(
+            query, k, source_ids, delta
+        )
+        results.sort(key=lambda result: -result[0])
+        return [
+            {
+                "id": row["id"],
+                "sourceId": row["sourceId"],
+                "chunkContent": row["chunkContent"],
+                "metadata": row["metadata"],
+                "score": score,
+            }
+            for score, row in results[:k]
+        ]
+
+
+class VectorIndexManager:
+    """
+    Optional in-process FAISS mirror of the `vectors` table, one index per
+    workspace, so hot bots skip the pgvector round-trip. An index is built
+    on first use from keyset pages of the table, quantized to float16 (IVF
+    above FAISS_IVF_MIN_ROWS rows), and saved under FAISS_INDEX_DIR, where
+    other workers memory-map it instead of rebuilding. Rows updated since
+    the snapshot are pulled by `updatedAt` in the background and searched
+    exactly. `updatedAt` is stamped when the writing transaction starts, so
+    a row can commit behind the watermark; each sync re-reads
+    FAISS_SYNC_OVERLAP seconds behind it and skips rows it already mirrors.
+    Deletions are found by comparing the mirrored ids with the workspace's
+    live ids, and the missing ones are tombstoned.
+    The snapshot is rebuilt once the delta and tombstones exceed
+    FAISS_DELTA_LIMIT or it is older than FAISS_REBUILD_INTERVAL. Parsing,
+    building and searching run in the default executor, off the event loop.
+    faiss-cpu and numpy are optional; without them every search falls back
+    to pgvector.
+    """
+
+    PAGE_SIZE = 5000
+
+    def __init__(self, vector_repo: VectorRepository, config: Config):
+        self.vector_repo = vector_repo
+        self.faiss = self.np = None
+        if config.FAISS_ENABLED:
+            try:
+                import faiss
+                import numpy
+
+                self.faiss, self.np = faiss, numpy
+            except ImportError:
+                logger.warning("FAISS hot index disabled: faiss-cpu or numpy is not installed")
+        self.enabled = self.faiss is not None
+        self.workspaces = {
+            workspace.strip()
+            for workspace in config.FAISS_WORKSPACES.split(",")
+            if workspace.strip()
+        }
+        self.directory = config.FAISS_INDEX_DIR
+        self.ivf_min_rows = config.FAISS_IVF_MIN_ROWS
+        self.dimensions = config.EMBEDDING_DIMENSIONS
+        self.nprobe = config.RETRIEVAL_PROBES
+        self.sync_interval = config.FAISS_SYNC_INTERVAL
+        self.sync_overlap = config.FAISS_SYNC_OVERLAP
+        self.delta_limit = config.FAISS_DELTA_LIMIT
+        self.rebuild_interval = config.FAISS_REBUILD_INTERVAL
+        self._indexes: TTLCache[str, WorkspaceVectorIndex] = TTLCache(
+            maxsize=config.FAISS_CACHE_SIZE, ttl=None
+        )
+        self._syncing: Dict[str, asyncio.Task] = {}
+
+    def serves(self, workspace_id: str) -> bool:
+        return self.enabled and (not self.workspaces or workspace_id in self.workspaces)
+
+    async def search(
+        self,
+        workspace_id: str,
+        embedding: Sequence[float],
+        source_ids: FrozenSet[str],
+        k: int,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Top chunks from the hot index, or None when the workspace isn't mirrored"""
+        if not self.serves(workspace_id):
+            return None
+        index = await self._indexes.get_or_load(
+            workspace_id, lambda: self._load(workspace_id)
+        )
+        self._schedule_sync(workspace_id, index)
+
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._search, index, embedding, source_ids, k
+        )
+
+    def _search(
+        self,
+        index: WorkspaceVectorIndex,
+        embedding: Sequence[float],
+        source_ids: FrozenSet[str],
+        k: int,
+    ) -> List[Dict[str, Any]]:
+        query = self.np.array([embedding], dtype="float32")
+        self.faiss.normalize_L2(query)
+        return index.search(query, k, source_ids)
+
+    def _schedule_sync(self, workspace_id: str, index: WorkspaceVectorIndex) -> None:
+        if workspace_id in self._syncing:
+            return
+        if time.monotonic() - index.synced_at < self.sync_interval:
+            return
+        task = asyncio.create_task(self._sync(workspace_id, index))
+        self._syncing[workspace_id] = task
+        task.add_done_callback(lambda _: self._syncing.pop(workspace_id, None))
+
+    # Snapshot files
+
+    def _name(self, workspace_id: str) -> str:
+        return re.sub(r"[^\w-]", "_", workspace_id)
+
+    def _pointer_path(self, workspace_id: str) -> str:
+        return os.path.join(self.directory, f"{self._name(workspace_id)}.json")
+
+    def _read_pointer(self, workspace_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._pointer_path(workspace_id), encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _read_snapshot(self, workspace_id: str) -> Optional[WorkspaceVectorIndex]:
+        pointer = self._read_pointer(workspace_id)
+        if pointer is None:
+            return None
+        prefix = os.path.join(self.directory, f"{self._name(workspace_id)}-{pointer['version']}")
+        try:
+            flags = getattr(self.faiss, "IO_FLAG_MMAP", 0) | getattr(self.faiss, "IO_FLAG_READ_ONLY", 0)
+            base = self.faiss.read_index(f"{prefix}.faiss", flags)
+            with open(f"{prefix}.chunks.json", encoding="utf-8") as file:
+                chunks = _Chunks(**json.load(file))
+        except (OSError, RuntimeError, TypeError, ValueError) as e:
+            logger.warning(f"Unreadable FAISS snapshot for {workspace_id}: {str(e)}")
+            return None
+        if len(chunks.updated_at) != len(chunks.ids):
+            # Saved before rows carried their updatedAt; rebuild
+            return None
+        if hasattr(base, "nprobe"):
+            base.nprobe = self.nprobe
+        return WorkspaceVectorIndex(
+            self.faiss,
+            self.np,
+            base,
+            chunks,
+            tuple(pointer["watermark"]),
+            pointer["version"],
+            pointer["built_at"],
+        )
+
+    def _write_snapshot(self, workspace_id: str, index: WorkspaceVectorIndex) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        name = self._name(workspace_id)
+        prefix = os.path.join(self.directory, f"{name}-{index.version}")
+        self.faiss.write_index(index.base, f"{prefix}.faiss")
+        with open(f"{prefix}.chunks.json", "w", encoding="utf-8") as file:
+            json.dump(index.chunks.__dict__, file)
+
+        pointer = self._pointer_path(workspace_id)
+        with open(f"{pointer}.{os.getpid()}.tmp", "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "version": index.version,
+                    "watermark": list(index.watermark),
+                    "built_at": index.built_at,
+                },
+                file,
+            )
+        # Readers only ever see a pointer to a complete snapshot
+        os.replace(f"{pointer}.{os.getpid()}.tmp", pointer)
+
+        # Workers still mapping an older snapshot keep it until they reload
+        for filename in os.listdir(self.directory):
+            if filename.startswith(f"{name}-") and not filename.startswith(
+                f"{name}-{index.version}."
+            ):
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
+
+    # Loading and syncing
+
+    def _parse(self, page: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not page:
+            return []
+        vectors = self.np.array([json.loads(row["embedding"]) for row in page], dtype="float32")
+        self.faiss.normalize_L2(vectors)
+        return [{**row, "vector": vector} for row, vector in zip(page, vectors)]
+
+    async def _fetch_since(
+        self, workspace_id: str, watermark: tuple[Optional[str], str], overlap: float = 0
+    ) -> List[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        rows: List[Dict[str, Any]] = []
+        updated_at, last_id = watermark
+        while True:
+            page = await self.vector_repo.get_vectors_since(
+                workspace_id, updated_at, last_id, self.PAGE_SIZE, overlap
+            )
+            rows.extend(await loop.run_in_executor(None, self._parse, page))
+            if len(page) < self.PAGE_SIZE:
+                return rows
+            # Only the first page starts behind the watermark
+            updated_at, last_id, overlap = page[-1]["updatedAt"], page[-1]["id"], 0
+
+    def _build(self, rows: List[Dict[str, Any]]) -> WorkspaceVectorIndex:
+        chunks = _Chunks()
+        for row in rows:
+            chunks.append(row)
+        vectors = self.np.vstack([row["vector"] for row in rows]) if rows else None
+        dimensions = vectors.shape[1] if rows else self.dimensions
+
+        if len(rows) >= self.ivf_min_rows:
+            nlist = int(4 * len(rows) ** 0.5)
+            base = self.faiss.index_factory(
+                dimensions, f"IVF{nlist},SQfp16", self.faiss.METRIC_INNER_PRODUCT
+            )
+            base.nprobe = self.nprobe
+        else:
+            base = self.faiss.index_factory(
+                dimensions, "SQfp16", self.faiss.METRIC_INNER_PRODUCT
+            )
+        if vectors is not None:
+            if not base.is_trained:
+                base.train(vectors)
+            base.add(vectors)
+
+        watermark = (rows[-1]["updatedAt"], rows[-1]["id"]) if rows else (None, "")
+        return WorkspaceVectorIndex(
+            self.faiss,
+            self.np,
+            base,
+            chunks,
+            watermark,
+            version=f"{int(time.time() * 1000)}-{os.getpid()}",
+            built_at=time.time(),
+        )
+
+    async def _rebuild(self, workspace_id: str) -> WorkspaceVectorIndex:
+        rows = await self._fetch_since(workspace_id, (None, ""))
+        loop = asyncio.get_running_loop()
+        index = await loop.run_in_executor(None, self._build, rows)
+        try:
+            await loop.run_in_executor(None, self._write_snapshot, workspace_id, index)
+        except OSError as e:
+            logger.warning(f"Could not save FAISS snapshot for {workspace_id}: {str(e)}")
+        logger.info(f"Built FAISS index for workspace {workspace_id}: {len(rows)} chunks")
+        return index
+
+    async def _load(self, workspace_id: str) -> WorkspaceVectorIndex:
+        loop = asyncio.get_running_loop()
+        index = await loop.run_in_executor(None, self._read_snapshot, workspace_id)
+        if index is None or time.time() - index.built_at > self.rebuild_interval:
+            return await self._rebuild(workspace_id)
+        index.apply(await self._fetch_since(workspace_id, index.watermark, self.sync_overlap))
+        await self._remove_deleted(workspace_id, index)
+        return index
+
+    async def _remove_deleted(self, workspace_id: str, index: WorkspaceVectorIndex) -> None:
+        """Tombstone mirrored rows that were deleted (or lost their embedding)"""
+        live_ids = set(await self.vector_repo.get_vector_ids(workspace_id))
+        removed = await asyncio.get_running_loop().run_in_executor(
+            None, index.retain, live_ids
+        )
+        if removed:
+            logger.info(f"Removed {removed} deleted chunks from FAISS index of {workspace_id}")
+
+    async def _sync(self, workspace_id: str, index: WorkspaceVectorIndex) -> None:
+        try:
+            pointer = await asyncio.get_running_loop().run_in_executor(
+                None, self._read_pointer, workspace_id
+            )
+            if pointer and pointer["version"] != index.version:
+                # Another worker rebuilt the snapshot; map it instead of our own
+                index = await self._load(workspace_id)
+            else:
+                index.apply(
+                    await self._fetch_since(workspace_id, index.watermark, self.sync_overlap)
+                )
+                await self._remove_deleted(workspace_id, index)
+                if (
+                    len(index.delta) + len(index.tombstones) > self.delta_limit
+                    or time.time() - index.built_at > self.rebuild_interval
+                ):
+                    index = await self._rebuild(workspace_id)
+            index.synced_at = time.monotonic()
+            self._indexes.set(workspace_id, index)
+        except Exception as e:
+            logger.error(f"FAISS index sync failed for {workspace_id}: {str(e)}")
+            index.synced_at = time.monotonic()
+
+    def invalidate(self, workspace_id: Optional[str] = None) -> None:
+        if workspace_id is None:
+            self._indexes.clear()
+        else:
+            self._indexes.pop(workspace_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "indexes": self._indexes.stats()}
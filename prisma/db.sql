@@ -14,6 +14,8 @@ CREATE TABLE "vectors" (
 CREATE INDEX ON vectors USING ivfflat (embedding);
 CREATE INDEX vectors_embedding_idx ON vectors USING ivfflat (embedding vector_cosine_ops);
 CREATE INDEX vectors_content_idx ON vectors USING gin (to_tsvector('english', "chunkContent"));
+-- Keyset pagination for the FAISS hot index load and incremental sync
+CREATE INDEX vectors_workspace_updated_idx ON vectors ("workspaceId", "updatedAt", "id");
 
 -- Install pgvector
 -- sudo apt install postgresql-16-pgvector
@@ -0,0 +1,46 @@
+-- CreateFunction
+-- Publishes a JSON payload on the "business_changed" channel so API workers can
+-- drop cached business snapshots and prompts. TG_ARGV[0] names the column that
+-- holds the business id for the table the trigger is attached to.
+CREATE OR REPLACE FUNCTION "notify_business_changed"() RETURNS trigger AS $$
+DECLARE
+    row_data JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_data := to_jsonb(OLD);
+    ELSE
+        row_data := to_jsonb(NEW);
+    END IF;
+
+    PERFORM pg_notify(
+        'business_changed',
+        json_build_object(
+            'table', TG_TABLE_NAME,
+            'op', TG_OP,
+            'id', row_data ->> 'id',
+            'businessId', row_data ->> TG_ARGV[0]
+        )::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- CreateTrigger
+CREATE TRIGGER "businesses_notify_changed"
+AFTER INSERT OR UPDATE OR DELETE ON "businesses"
+FOR EACH ROW EXECUTE FUNCTION "notify_business_changed"('id');
+
+-- CreateTrigger
+CREATE TRIGGER "business_configs_notify_changed"
+AFTER INSERT OR UPDATE OR DELETE ON "business_configs"
+FOR EACH ROW EXECUTE FUNCTION "notify_business_changed"('businessId');
+
+-- CreateTrigger
+CREATE TRIGGER "locations_notify_changed"
+AFTER INSERT OR UPDATE OR DELETE ON "locations"
+FOR EACH ROW EXECUTE FUNCTION "notify_business_changed"('businessId');
+
+-- CreateTrigger
+CREATE TRIGGER "operating_hours_notify_changed"
+AFTER INSERT OR UPDATE OR DELETE ON "operating_hours"
+FOR EACH ROW EXECUTE FUNCTION "notify_business_changed"('businessId');
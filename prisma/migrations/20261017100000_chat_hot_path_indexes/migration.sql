@@ -0,0 +1,21 @@
+-- CreateIndex
+-- get_chats, get_chats_since, get_recent_chats and delete_latest_message
+CREATE INDEX "chats_conversationId_createdAt_idx" ON "chats"("conversationId", "createdAt");
+
+-- CreateIndex
+-- get_or_create_conversation lookup of the latest conversation for a session
+CREATE INDEX "conversations_botId_sessionId_createdAt_idx" ON "conversations"("botId", "sessionId", "createdAt" DESC);
+
+-- CreateIndex
+-- search_products "*LATEST*" listing
+CREATE INDEX "products_businessId_isActive_name_idx" ON "products"("businessId", "isActive", "name");
+
+-- CreateIndex
+CREATE INDEX "categories_businessId_idx" ON "categories"("businessId");
+
+-- CreateIndex
+-- Full-text search; expressions must match BusinessFunctions.search_products
+CREATE INDEX "products_search_idx" ON "products" USING GIN (to_tsvector('english', coalesce("name", '') || ' ' || coalesce("description", '')));
+
+-- CreateIndex
+CREATE INDEX "categories_name_search_idx" ON "categories" USING GIN (to_tsvector('english', "name"));
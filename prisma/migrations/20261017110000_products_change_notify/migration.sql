@@ -0,0 +1,36 @@
+-- CreateFunction
+-- Publishes a JSON payload on the "products_changed" channel so API workers can
+-- patch their in-process product search indexes. Product rows are re-read one at
+-- a time; a category change makes the worker rebuild that business's index.
+CREATE OR REPLACE FUNCTION "notify_products_changed"() RETURNS trigger AS $$
+DECLARE
+    row_data JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_data := to_jsonb(OLD);
+    ELSE
+        row_data := to_jsonb(NEW);
+    END IF;
+
+    PERFORM pg_notify(
+        'products_changed',
+        json_build_object(
+            'table', TG_TABLE_NAME,
+            'op', TG_OP,
+            'id', row_data ->> 'id',
+            'businessId', row_data ->> 'businessId'
+        )::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- CreateTrigger
+CREATE TRIGGER "products_notify_changed"
+AFTER INSERT OR UPDATE OR DELETE ON "products"
+FOR EACH ROW EXECUTE FUNCTION "notify_products_changed"();
+
+-- CreateTrigger
+CREATE TRIGGER "categories_notify_changed"
+AFTER INSERT OR UPDATE OR DELETE ON "categories"
+FOR EACH ROW EXECUTE FUNCTION "notify_products_changed"();
@@ -0,0 +1,12 @@
+-- CreateTable
+-- Content-addressed embeddings shared by every worker. "hash" is the sha256 of
+-- the embedding model name and the chunk text, so a model change never reuses
+-- stale vectors.
+CREATE TABLE "embedding_cache" (
+    "hash" TEXT NOT NULL,
+    "model" TEXT NOT NULL,
+    "embedding" REAL[] NOT NULL,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "embedding_cache_pkey" PRIMARY KEY ("hash")
+);
@@ -0,0 +1,36 @@
+-- CreateFunction
+-- Publishes a JSON payload on the "bots_changed" channel so API workers can
+-- drop cached bots. The row's updatedAt travels along as its version, so a
+-- worker never keeps a bot it loaded before the change committed.
+CREATE OR REPLACE FUNCTION "notify_bots_changed"() RETURNS trigger AS $$
+DECLARE
+    row_data JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_data := to_jsonb(OLD);
+    ELSE
+        row_data := to_jsonb(NEW);
+    END IF;
+
+    PERFORM pg_notify(
+        'bots_changed',
+        json_build_object(
+            'table', TG_TABLE_NAME,
+            'op', TG_OP,
+            'id', row_data ->> 'id',
+            'updatedAt', row_data ->> 'updatedAt'
+        )::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- CreateTrigger
+CREATE TRIGGER "bots_notify_changed"
+AFTER INSERT OR UPDATE OR DELETE ON "bots"
+FOR EACH ROW EXECUTE FUNCTION "notify_bots_changed"();
+
+-- CreateTrigger
+CREATE TRIGGER "models_notify_changed"
+AFTER INSERT OR UPDATE OR DELETE ON "models"
+FOR EACH ROW EXECUTE FUNCTION "notify_bots_changed"();
@@ -0,0 +1,27 @@
+-- CreateFunction
+-- Publishes one JSON payload per affected conversation on the "chats_deleted"
+-- channel so API workers drop their cached context windows. Statement-level,
+-- so deleting a whole conversation sends a single notification.
+CREATE OR REPLACE FUNCTION "notify_chats_deleted"() RETURNS trigger AS $$
+DECLARE
+    conversation_id TEXT;
+BEGIN
+    FOR conversation_id IN SELECT DISTINCT "conversationId" FROM deleted_chats LOOP
+        PERFORM pg_notify(
+            'chats_deleted',
+            json_build_object(
+                'table', TG_TABLE_NAME,
+                'op', TG_OP,
+                'conversationId', conversation_id
+            )::text
+        );
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- CreateTrigger
+CREATE TRIGGER "chats_notify_deleted"
+AFTER DELETE ON "chats"
+REFERENCING OLD TABLE AS deleted_chats
+FOR EACH STATEMENT EXECUTE FUNCTION "notify_chats_deleted"();
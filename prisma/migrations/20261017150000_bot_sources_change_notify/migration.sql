@@ -0,0 +1,26 @@
+-- CreateFunction
+-- Publishes a JSON payload on the "bot_sources_changed" channel when a source
+-- is attached to or detached from a bot, so API workers drop the bot's cached
+-- source ids and retrieval searches the new set.
+CREATE OR REPLACE FUNCTION "notify_bot_sources_changed"() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM pg_notify(
+            'bot_sources_changed',
+            json_build_object('table', TG_TABLE_NAME, 'op', TG_OP, 'botId', OLD."botId")::text
+        );
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW."botId" IS DISTINCT FROM OLD."botId") THEN
+        PERFORM pg_notify(
+            'bot_sources_changed',
+            json_build_object('table', TG_TABLE_NAME, 'op', TG_OP, 'botId', NEW."botId")::text
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- CreateTrigger
+CREATE TRIGGER "bot_sources_notify_changed"
+AFTER INSERT OR UPDATE OR DELETE ON "bot_sources"
+FOR EACH ROW EXECUTE FUNCTION "notify_bot_sources_changed"();
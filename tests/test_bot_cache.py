@@ -0,0 +1,122 @@
+"""
+Versioned invalidation in BotCache: a bot loaded while a change to its row
+or its model's row was committing must be served once but not cached, and
+the remembered versions must not outlive the cache TTL. The AI provider,
+whose table sends no notification, must not be cached with the bot.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.repositories.chat import ChatRepository
+from app.services.bot_cache import BotCache
+
+T0 = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def at(minutes: int) -> datetime:
+    return T0 + timedelta(minutes=minutes)
+
+
+class FakeChatRepository:
+    def __init__(self, bot):
+        self.bot = bot
+        self.loads = 0
+
+    async def get_bot(self, bot_id: str):
+        self.loads += 1
+        return self.bot
+
+
+def bot_row(bot_updated: datetime, model_updated: datetime):
+    return SimpleNamespace(
+        id="bot",
+        updatedAt=bot_updated,
+        modelId="model",
+        model=SimpleNamespace(id="model", updatedAt=model_updated),
+    )
+
+
+def cache_for(repo: FakeChatRepository, ttl: float = 60) -> BotCache:
+    return BotCache(repo, SimpleNamespace(BOT_CACHE_SIZE=16, BOT_CACHE_TTL=ttl))
+
+
+def loads_after_two_reads(cache: BotCache, repo: FakeChatRepository) -> int:
+    async def run():
+        await cache.get_bot("bot")
+        await cache.get_bot("bot")
+
+    asyncio.run(run())
+    return repo.loads
+
+
+def test_old_model_row_is_not_cached_behind_a_newer_bot_row():
+    # The bot row was edited after the model, but the model change that
+    # was just announced had not committed when this row was read
+    repo = FakeChatRepository(bot_row(bot_updated=at(10), model_updated=at(1)))
+    cache = cache_for(repo)
+    cache.handle_notification({"table": "models", "id": "model", "updatedAt": at(5).isoformat()})
+
+    assert loads_after_two_reads(cache, repo) == 2
+    assert cache.stale_loads == 2
+
+    repo.bot = bot_row(bot_updated=at(10), model_updated=at(5))
+    assert loads_after_two_reads(cache, repo) == 3
+
+
+def test_old_bot_row_is_not_cached_behind_a_newer_model_row():
+    repo = FakeChatRepository(bot_row(bot_updated=at(1), model_updated=at(10)))
+    cache = cache_for(repo)
+    cache.handle_notification({"table": "bots", "id": "bot", "updatedAt": at(5).isoformat()})
+
+    assert loads_after_two_reads(cache, repo) == 2
+
+    repo.bot = bot_row(bot_updated=at(5), model_updated=at(10))
+    assert loads_after_two_reads(cache, repo) == 3
+
+
+def test_remembered_versions_expire_with_the_cache():
+    repo = FakeChatRepository(bot_row(bot_updated=at(1), model_updated=at(1)))
+    cache = cache_for(repo, ttl=0.01)
+    for index in range(100):
+        cache.handle_notification(
+            {"table": "bots", "id": f"bot-{index}", "updatedAt": at(5).isoformat()}
+        )
+
+    assert len(cache._min_bot_versions) == 16
+    asyncio.run(asyncio.sleep(0.02))
+    assert cache._min_bot_versions.get("bot-99") is None
+
+
+class FakeTable:
+    """`find_unique` over rows by id, recording the relations asked for"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.includes = []
+
+    async def find_unique(self, where, include):
+        self.includes.append(include)
+        return self.rows.get(where["id"])
+
+
+def test_the_ai_provider_is_read_per_message_not_cached_with_the_bot():
+    model = SimpleNamespace(id="model", aiProvider=SimpleNamespace(apiKey="key-1"))
+    bots = FakeTable({"bot": bot_row(bot_updated=at(1), model_updated=at(1))})
+    models = FakeTable({"model": model})
+    repo = ChatRepository(SimpleNamespace(bot=bots, model=models))
+    cache = cache_for(repo)
+
+    async def run():
+        bot = await cache.get_bot("bot")
+        first = await repo.get_ai_provider(bot.modelId)
+        # The key is rotated; nothing invalidates the bot
+        model.aiProvider = SimpleNamespace(apiKey="key-2")
+        bot = await cache.get_bot("bot")
+        return first, await repo.get_ai_provider(bot.modelId)
+
+    first, second = asyncio.run(run())
+
+    assert (first.apiKey, second.apiKey) == ("key-1", "key-2")
+    assert bots.includes == [{"model": True}]
+    assert asyncio.run(repo.get_ai_provider("missing-model")) is None
@@ -0,0 +1,216 @@
+"""
+Checks for the facts behind the business tool functions: BusinessFacts.build
+must shape a cached business snapshot deterministically, and lookups must
+stay inside the bot's business.
+
+The get_category_counts check runs its aggregate against Postgres; set
+DATABASE_URL to run it.
+"""
+import os
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from app.infrastructure.ai.tools.functions import business as business_module
+from app.services.business_facts import BusinessFacts
+
+CATEGORIES = [
+    {"id": "cat-1", "name": "Hoodies", "description": "Warm tops", "productCount": 3},
+    {"id": "cat-2", "name": "Socks", "description": None, "productCount": 0},
+]
+
+
+def business() -> Any:
+    locations = [
+        SimpleNamespace(
+            id=f"loc-{i}",
+            name=name,
+            address=f"{i} Allen Avenue",
+            city="Lagos",
+            phone=None,
+            email=f"store{i}@example.com",
+            isMain=i == 2,
+        )
+        for i, name in enumerate(["Yaba", "Ikeja", "Lekki"])
+    ]
+    hours = [
+        SimpleNamespace(
+            id=f"hours-{day}-{location.id}",
+            locationId=location.id,
+            dayOfWeek=day,
+            openTime="09:00",
+            closeTime="18:00",
+            isClosed=day == 0,
+        )
+        for location in locations
+        for day in (6, 0, 1)
+    ]
+    return SimpleNamespace(
+        configurations=SimpleNamespace(
+            hasDelivery=True,
+            minDeliveryOrderAmount=5000,
+            deliveryFee=1500,
+            estimatedDeliveryArrival="2-3 days",
+            acceptsReturns=True,
+            returnPeriod=14,
+            hasWarranty=False,
+            warrantyPeriod=None,
+        ),
+        locations=locations,
+        operatingHours=hours[::-1],
+    )
+
+
+def test_build_shapes_the_snapshot_for_the_tools():
+    facts = BusinessFacts.build(business(), CATEGORIES)
+
+    assert facts.categories == [
+        {"id": "cat-1", "name": "Hoodies", "description": "Warm tops", "product_count": 3},
+        {"id": "cat-2", "name": "Socks", "description": None, "product_count": 0},
+    ]
+    assert facts.delivery == {
+        "available": True,
+        "min_amount": 5000,
+        "fee": 1500,
+        "estimated_delivery_arrival": "2-3 days",
+    }
+    assert facts.policies["returns"]["period_days"] == 14
+    assert facts.policies["warranty"]["available"] is False
+    assert facts.policies["delivery"] == {"available": True, "min_amount": 5000, "fee": 1500}
+    # Main location first, then by name; hours by day whatever the row order
+    assert [location["name"] for location in facts.locations] == ["Lekki", "Ikeja", "Yaba"]
+    lekki = facts.locations[0]
+    assert lekki == {
+        "id": "loc-2",
+        "name": "Lekki",
+        "address": "2 Allen Avenue",
+        "city": "Lagos",
+        "phone": None,
+        "email": "store2@example.com",
+        "is_main": True,
+        "operating_hours": [
+            {"day": 0, "open_time": "09:00", "close_time": "18:00", "is_closed": True},
+            {"day": 1, "open_time": "09:00", "close_time": "18:00", "is_closed": False},
+            {"day": 6, "open_time": "09:00", "close_time": "18:00", "is_closed": False},
+        ],
+    }
+
+
+def test_build_without_a_business_or_configuration():
+    facts = BusinessFacts.build(None, CATEGORIES[:1])
+
+    assert [category["product_count"] for category in facts.categories] == [3]
+    assert (facts.delivery, facts.policies, facts.locations) == ({}, {}, [])
+
+    unconfigured = SimpleNamespace(configurations=None, locations=None, operatingHours=None)
+    facts = BusinessFacts.build(unconfigured, [])
+    assert (facts.delivery, facts.policies, facts.locations) == ({}, {}, [])
+
+
+class FakeProductTable:
+    """`businessproduct.find_first` over rows matching every `where` key"""
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = rows
+
+    async def find_first(self, where: Dict[str, Any]) -> Optional[Any]:
+        for row in self.rows:
+            if all(row[key] == value for key, value in where.items()):
+                return SimpleNamespace(**row)
+        return None
+
+
+def test_check_product_availability_is_scoped_to_the_business(monkeypatch):
+    products = FakeProductTable(
+        [
+            {"id": "hoodie", "businessId": "biz", "name": "Red hoodie", "stock": 2},
+            {"id": "socks", "businessId": "biz", "name": "Socks", "stock": 0},
+            {"id": "lamp", "businessId": "other-biz", "name": "Desk lamp", "stock": 9},
+        ]
+    )
+    client = SimpleNamespace(businessproduct=products)
+    monkeypatch.setattr(business_module, "db", SimpleNamespace(prisma=client, reader=client))
+    functions = business_module.BusinessFunctions("biz")
+
+    async def run():
+        return [
+            await functions.check_product_availability("hoodie", location_id="loc-1"),
+            await functions.check_product_availability("socks"),
+            await functions.check_product_availability("lamp"),
+        ]
+
+    hoodie, socks, lamp = asyncio.run(run())
+
+    assert hoodie == {
+        "product_name": "Red hoodie",
+        "in_stock": "Yes",
+        "stock_count": 2,
+        "location": "loc-1",
+    }
+    assert (socks["in_stock"], socks["location"]) == ("No", "all")
+    # Another business's product id is answered as unknown
+    assert lamp == {}
+
+
+class _Rollback(Exception):
+    pass
+
+
+async def _category_counts() -> Dict[str, List[Dict[str, Any]]]:
+    from prisma import Prisma
+    from app.repositories.business import BusinessRepository
+
+    counts: Dict[str, List[Dict[str, Any]]] = {}
+    client = Prisma()
+    await client.connect()
+    try:
+        async with client.tx() as tx:
+            # Seed without satisfying the foreign keys to businesses
+            await tx.execute_raw("SET LOCAL session_replication_role = replica")
+            await tx.execute_raw(
+                """
+                INSERT INTO "categories" ("id", "businessId", "name", "description") VALUES
+                    ('facts-cat-1', 'facts-biz', 'Socks', NULL),
+                    ('facts-cat-2', 'facts-biz', 'Hoodies', 'Warm tops'),
+                    ('facts-cat-3', 'facts-other-biz', 'Hoodies', NULL)
+                """
+            )
+            await tx.execute_raw(
+                """
+                INSERT INTO "products" ("id", "businessId", "categoryId", "name", "price",
+                                        "isActive", "updatedAt") VALUES
+                    ('facts-prod-1', 'facts-biz', 'facts-cat-2', 'Red hoodie', 10, true, now()),
+                    ('facts-prod-2', 'facts-biz', 'facts-cat-2', 'Blue hoodie', 10, true, now()),
+                    ('facts-prod-3', 'facts-biz', 'facts-cat-2', 'Old hoodie', 10, false, now()),
+                    ('facts-prod-4', 'facts-other-biz', 'facts-cat-3', 'Hoodie', 10, true, now())
+                """
+            )
+            repo = BusinessRepository(tx)
+            for business_id in ("facts-biz", "facts-other-biz", "facts-missing-biz"):
+                counts[business_id] = await repo.get_category_counts(business_id)
+            raise _Rollback()
+    except _Rollback:
+        pass
+    finally:
+        await client.disconnect()
+    return counts
+
+
+@pytest.mark.skipif(not os.environ.get("DATABASE_URL"), reason="DATABASE_URL is not set")
+def test_category_counts_are_scoped_and_count_active_products_only():
+    counts = asyncio.run(_category_counts())
+
+    def summary(business_id: str):
+        return [
+            (row["id"], row["name"], int(row["productCount"])) for row in counts[business_id]
+        ]
+
+    # Ordered by name; empty categories are kept with a zero count
+    assert summary("facts-biz") == [("facts-cat-2", "Hoodies", 2), ("facts-cat-1", "Socks", 0)]
+    assert summary("facts-other-biz") == [("facts-cat-3", "Hoodies", 1)]
+    assert counts["facts-missing-biz"] == []
+
+    facts = BusinessFacts.build(None, counts["facts-biz"])
+    assert [category["product_count"] for category in facts.categories] == [2, 0]
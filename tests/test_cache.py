@@ -0,0 +1,74 @@
+import asyncio
+from typing import Callable, List
+
+import pytest
+
+from app.core.cache import TTLCache
+
+INVALIDATIONS = {
+    "pop": lambda cache: cache.pop("bot"),
+    "invalidate": lambda cache: cache.invalidate(lambda key: key == "bot"),
+    "clear": lambda cache: cache.clear(),
+}
+
+
+class VersionedLoader:
+    """Loads the current version of a row, pausing until `release` is set"""
+
+    def __init__(self):
+        self.version = 1
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        version = self.version
+        await self.release.wait()
+        return f"v{version}"
+
+
+@pytest.mark.parametrize("invalidation", list(INVALIDATIONS))
+def test_invalidating_during_a_load_makes_the_next_lookup_reload(invalidation: str):
+    invalidate: Callable[[TTLCache], object] = INVALIDATIONS[invalidation]
+
+    async def run() -> List[str]:
+        cache: TTLCache[str, str] = TTLCache(maxsize=8, ttl=60)
+        loader = VersionedLoader()
+        first = asyncio.create_task(cache.get_or_load("bot", loader))
+        await asyncio.sleep(0)
+        # Joins the load in flight instead of starting a second one
+        joined = asyncio.create_task(cache.get_or_load("bot", loader))
+        await asyncio.sleep(0)
+
+        # The row changes and its NOTIFY lands while v1 is still being read
+        loader.version = 2
+        invalidate(cache)
+        loader.release.set()
+        results = list(await asyncio.gather(first, joined))
+        assert loader.calls == 1
+        assert "bot" not in cache
+
+        results.append(await cache.get_or_load("bot", loader))
+        assert loader.calls == 2
+        # Stored this time: nothing invalidated the second load
+        results.append(await cache.get_or_load("bot", loader))
+        assert loader.calls == 2
+        return results
+
+    assert asyncio.run(run()) == ["v1", "v1", "v2", "v2"]
+
+
+def test_invalidating_another_key_keeps_the_load():
+    async def run() -> int:
+        cache: TTLCache[str, str] = TTLCache(maxsize=8, ttl=60)
+        loader = VersionedLoader()
+        task = asyncio.create_task(cache.get_or_load("bot", loader))
+        await asyncio.sleep(0)
+        cache.pop("other-bot")
+        cache.invalidate(lambda key: key == "other-bot")
+        loader.release.set()
+        assert await task == "v1"
+        assert await cache.get_or_load("bot", loader) == "v1"
+        return loader.calls
+
+    assert asyncio.run(run()) == 1
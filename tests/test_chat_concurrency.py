@@ -0,0 +1,226 @@
+"""
+Isolation stress test for the stateless ChatService: thousands of
+conversations run two turns each on one event loop, with fake providers,
+tools and storage that yield between every step so the turns interleave.
+Every message a provider sees, every tool result and every persisted row
+must belong to its own conversation.
+"""
+import re
+import json
+import random
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from app.core.metrics import LatencyRecorder
+from app.domain.requests import ChatRequest
+from app.domain.interfaces import StreamResponse, StreamResponseType
+from app.infrastructure.ai.tools.executor import ToolExecutor
+from app.services import chat as chat_module
+from app.services.chat import ChatService
+from app.services.context_window import ContextWindowManager
+from app.services.message_persister import MessagePersister
+
+CONVERSATIONS = 2000
+TAG_PATTERN = re.compile(r"\[conv-\d+\]")
+
+CONFIG = SimpleNamespace(
+    CONTEXT_TOKEN_BUDGET=3000,
+    CONTEXT_CACHE_SIZE=CONVERSATIONS * 2,
+    CONTEXT_CACHE_TTL=60,
+    CONTEXT_SUMMARIZE=False,
+    CONTEXT_RELOAD_OVERLAP=60,
+    MESSAGE_FLUSH_SIZE=50,
+    MESSAGE_FLUSH_INTERVAL=0.05,
+    MESSAGE_FLUSH_MAX_RETRIES=5,
+    MESSAGE_FLUSH_MAX_BACKOFF=1,
+    TOOL_TIMEOUT=5,
+    TOOL_RESULT_MAX_CHARS=1000,
+)
+
+
+def tag(conversation_id: str) -> str:
+    return f"[{conversation_id}]"
+
+
+async def jitter(rng: random.Random) -> None:
+    # Zero-length sleeps still hand control to the other turns
+    await asyncio.sleep(rng.choice([0, 0, 0.0005, 0.001]))
+
+
+class InMemoryChatRepository:
+    """The slice of ChatRepository used by the chat pipeline"""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.rows: Dict[str, List[Any]] = {}
+
+    async def save_chat_messages(self, chats: List[dict]) -> int:
+        await jitter(self.rng)
+        for data in chats:
+            row = SimpleNamespace(**{**data, "toolCalls": json.loads(data["toolCalls"])})
+            self.rows.setdefault(data["conversationId"], []).append(row)
+        return len(chats)
+
+    async def get_chats(self, conversation_id: str) -> List[Any]:
+        await jitter(self.rng)
+        return list(self.rows.get(conversation_id, []))
+
+    async def get_chats_since(self, conversation_id: str, since) -> List[Any]:
+        await jitter(self.rng)
+        return [row for row in self.rows.get(conversation_id, []) if row.createdAt >= since]
+
+    async def get_ai_provider(self, model_id: str) -> Any:
+        await jitter(self.rng)
+        return SimpleNamespace(provider="openai")
+
+    async def delete_chat(self, chat_id: str) -> None:
+        for rows in self.rows.values():
+            rows[:] = [row for row in rows if row.id != chat_id]
+
+
+class Leaks:
+    """Every message seen by a provider that names another conversation"""
+
+    def __init__(self):
+        self.found: List[str] = []
+
+    def check(self, conversation_id: str, messages: List[Dict[str, Any]]) -> None:
+        for message in messages:
+            if message["role"] == "system":
+                continue
+            text = message["content"] + json.dumps(message.get("tool_calls") or [])
+            if set(TAG_PATTERN.findall(text)) - {tag(conversation_id)}:
+                self.found.append(f"{conversation_id} saw {text!r}")
+
+
+def fake_provider_class(leaks: Leaks, rng: random.Random):
+    class FakeProvider:
+        """
+        Turn 1 asks for a tool call, split across tokens; the follow-up and
+        turn 2 answer in text. The conversation is read from the user prompt.
+        """
+
+        def __init__(self, client: Any, model: str):
+            pass
+
+        async def request(self, messages: List[Dict[str, Any]], **kwargs: Any):
+            prompt = next(m["content"] for m in reversed(messages) if m["role"] == "user")
+            conversation_id = prompt.split("[", 1)[1].split("]", 1)[0]
+            leaks.check(conversation_id, messages)
+
+            last = messages[-1]
+            if last["role"] == "user" and prompt.startswith("question 1"):
+                call = json.dumps(
+                    {"name": "lookup_order", "arguments": {"conversation_id": conversation_id}}
+                )
+                text = f"Checking <tool_call>{call}</tool_call>"
+            elif last["role"] == "tool":
+                if last["content"] != f"order of {tag(conversation_id)}":
+                    leaks.found.append(f"{conversation_id} got tool result {last['content']!r}")
+                text = f"answer 1 for {tag(conversation_id)}"
+            else:
+                text = f"answer 2 for {tag(conversation_id)}"
+
+            for start in range(0, len(text), 5):
+                await jitter(rng)
+                yield StreamResponse(type=StreamResponseType.TOKEN, content=text[start : start + 5])
+
+    return FakeProvider
+
+
+def test_concurrent_conversations_stay_isolated(monkeypatch):
+    rng = random.Random(0)
+    leaks = Leaks()
+    repo = InMemoryChatRepository(rng)
+    context_window = ContextWindowManager(repo, CONFIG)
+    persister = MessagePersister(repo, context_window, CONFIG)
+
+    async def get_provider_client(ai_provider):
+        return None
+
+    async def retrieve(bot, prompt):
+        return []
+
+    async def lookup_order(conversation_id: str) -> str:
+        await jitter(rng)
+        return f"order of {tag(conversation_id)}"
+
+    latency = LatencyRecorder()
+    for name, value in {
+        "get_config": CONFIG,
+        "get_chat_repository": repo,
+        "get_business_repository": None,
+        "get_business_cache": None,
+        "get_context_window_manager": context_window,
+        "get_message_persister": persister,
+        "get_suggestion_service": SimpleNamespace(start=lambda *args, **kwargs: None),
+        "get_llm_client_registry": SimpleNamespace(get_provider_client=get_provider_client),
+        "get_product_search_engine": None,
+        "get_retrieval_service": SimpleNamespace(retrieve=retrieve),
+        "get_response_cache": SimpleNamespace(enabled=False),
+        "get_chat_latency": latency,
+        "get_all_business_functions": [],
+    }.items():
+        monkeypatch.setattr(chat_module, name, lambda value=value: value)
+    monkeypatch.setattr(chat_module, "OpenAIProvider", fake_provider_class(leaks, rng))
+
+    service = ChatService()
+    service._create_tool_executor = lambda bot: ToolExecutor(
+        {"lookup_order": lookup_order},
+        timeout=CONFIG.TOOL_TIMEOUT,
+        max_result_chars=CONFIG.TOOL_RESULT_MAX_CHARS,
+    )
+    bot = SimpleNamespace(
+        id="bot",
+        businessId=None,
+        modelId="model",
+        model=SimpleNamespace(name="model"),
+    )
+
+    async def conversation(index: int) -> List[List[Dict[str, Any]]]:
+        conversation_id = f"conv-{index}"
+        turns = []
+        for number in (1, 2):
+            prompt = f"question {number} from {tag(conversation_id)}"
+            events = [
+                event
+                async for event in service.handle_chat(
+                    bot=bot,
+                    conversation_id=conversation_id,
+                    prompt=prompt,
+                    chat_request=ChatRequest(prompt=prompt, defer_suggestions=True),
+                )
+            ]
+            turns.append(events)
+        return turns
+
+    async def run() -> List[List[List[Dict[str, Any]]]]:
+        results = await asyncio.gather(*(conversation(i) for i in range(CONVERSATIONS)))
+        await persister.close()
+        return results
+
+    results = asyncio.run(asyncio.wait_for(run(), timeout=300))
+
+    assert leaks.found == []
+    for index, turns in enumerate(results):
+        conversation_id = f"conv-{index}"
+        for number, events in enumerate(turns, start=1):
+            assert not [event for event in events if "error" in event], events
+            text = "".join(event["token"] for event in events if "token" in event)
+            assert text.endswith(f"answer {number} for {tag(conversation_id)}"), text
+            assert {"complete": True} in events
+
+        rows = repo.rows[conversation_id]
+        assert [row.role for row in rows] == [
+            "user", "assistant", "tool", "assistant", "user", "assistant",
+        ]
+        for row in rows:
+            assert row.conversationId == conversation_id
+            text = row.content + json.dumps(row.toolCalls)
+            assert set(TAG_PATTERN.findall(text)) <= {tag(conversation_id)}, text
+        # The assistant's tool call and the tool result are linked by id
+        assert rows[2].toolCallId == rows[1].toolCalls[0]["id"]
+    assert persister.dropped == 0
+    # Only the first turn of each conversation called a tool
+    assert latency.snapshot()["counters"]["tool_followups"] == CONVERSATIONS
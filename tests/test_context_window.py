@@ -0,0 +1,113 @@
+import asyncio
+from types import SimpleNamespace
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from app.repositories.chat import ChatRepository
+from app.services.context_window import ContextWindowManager
+
+CONFIG = SimpleNamespace(
+    CONTEXT_TOKEN_BUDGET=3000,
+    CONTEXT_CACHE_SIZE=100,
+    CONTEXT_CACHE_TTL=60,
+    CONTEXT_SUMMARIZE=False,
+    CONTEXT_RELOAD_OVERLAP=60,
+)
+
+START = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+
+
+def chat(chat_id: str, seconds: float) -> Any:
+    return SimpleNamespace(
+        id=chat_id,
+        role="user",
+        content=f"message {chat_id}",
+        tokens=2,
+        createdAt=START + timedelta(seconds=seconds),
+    )
+
+
+class InMemoryChatRepository:
+    def __init__(self):
+        self.rows: Dict[str, List[Any]] = {}
+
+    async def get_chats(self, conversation_id: str) -> List[Any]:
+        return sorted(self.rows.get(conversation_id, []), key=lambda row: row.createdAt)
+
+    async def get_chats_since(self, conversation_id: str, since: datetime) -> List[Any]:
+        rows = await self.get_chats(conversation_id)
+        return [row for row in rows if row.createdAt >= since]
+
+
+def window_ids(manager: ContextWindowManager, conversation_id: str) -> List[str]:
+    window = asyncio.run(manager.get_window(conversation_id))
+    return [message.id for message in window.messages]
+
+
+def test_late_committed_rows_behind_the_cursor_are_loaded():
+    repo = InMemoryChatRepository()
+    manager = ContextWindowManager(repo, CONFIG)
+    repo.rows["conv"] = [chat("a", 0), chat("c", 20)]
+    assert window_ids(manager, "conv") == ["a", "c"]
+
+    # Another worker's batch, stamped before "c", commits after this worker read "c"
+    repo.rows["conv"].append(chat("b", 10))
+    repo.rows["conv"].append(chat("d", 30))
+
+    assert window_ids(manager, "conv") == ["a", "b", "c", "d"]
+    assert window_ids(manager, "conv") == ["a", "b", "c", "d"]
+
+
+def test_local_write_through_keeps_order():
+    repo = InMemoryChatRepository()
+    manager = ContextWindowManager(repo, CONFIG)
+    repo.rows["conv"] = [chat("a", 0), chat("c", 20)]
+    window_ids(manager, "conv")
+
+    manager.record("conv", [chat("b", 10)])
+
+    assert window_ids(manager, "conv") == ["a", "b", "c"]
+
+
+def test_deletion_notification_drops_the_cached_window():
+    repo = InMemoryChatRepository()
+    manager = ContextWindowManager(repo, CONFIG)
+    repo.rows["conv"] = [chat("a", 0), chat("b", 10)]
+    repo.rows["other"] = [chat("x", 0)]
+    window_ids(manager, "conv")
+    window_ids(manager, "other")
+
+    # Deleted on another worker: only the NOTIFY tells this one
+    repo.rows["conv"] = [chat("a", 0)]
+    manager.handle_notification({"table": "chats", "op": "DELETE", "conversationId": "conv"})
+
+    assert window_ids(manager, "conv") == ["a"]
+    repo.rows["other"] = []
+    manager.handle_notification({"op": "RESYNC"})
+    assert window_ids(manager, "other") == []
+
+
+
+class FakeChatTable:
+    """`chat.find_many` of one Prisma client over a single conversation"""
+
+    def __init__(self, rows: List[Any]):
+        self.rows = rows
+
+    async def find_many(self, where: Dict[str, Any], order: Dict[str, str]) -> List[Any]:
+        since = where.get("createdAt", {}).get("gte", START - timedelta(days=1))
+        rows = sorted(self.rows, key=lambda row: row.createdAt)
+        return [row for row in rows if row.createdAt >= since]
+
+
+def test_windows_are_read_from_the_primary_not_the_replica():
+    committed = [chat("a", 0), chat("b", 10), chat("c", 20)]
+    # The replica hasn't replayed the latest turn yet
+    primary = SimpleNamespace(chat=FakeChatTable(committed))
+    replica = SimpleNamespace(chat=FakeChatTable(committed[:2]))
+    manager = ContextWindowManager(ChatRepository(primary, SimpleNamespace(reader=replica)), CONFIG)
+
+    assert window_ids(manager, "conv") == ["a", "b", "c"]
+
+    committed.append(chat("d", 30))
+    assert window_ids(manager, "conv") == ["a", "b", "c", "d"]
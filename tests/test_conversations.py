@@ -0,0 +1,176 @@
+"""
+ChatRepository.get_or_create_conversation: which conversation a request
+lands in for an existing id, another bot's id, a malformed id, the session
+fallback, and two requests racing to create the same client-supplied id.
+
+The database tests run RESOLVE_CONVERSATION_QUERY against Postgres with
+foreign keys to bots disabled; set DATABASE_URL to run them.
+"""
+import os
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import pytest
+from fastapi.exceptions import HTTPException
+
+from app.repositories.chat import ChatRepository
+from app.utils import generate_cuid
+
+requires_database = pytest.mark.skipif(
+    not os.environ.get("DATABASE_URL"), reason="DATABASE_URL is not set"
+)
+
+
+class FakeResponse:
+    def __init__(self):
+        self.cookies: Dict[str, str] = {}
+
+    def set_cookie(self, key: str, value: str, **kwargs: Any) -> None:
+        self.cookies[key] = value
+
+
+def request_for(session_id: Optional[str] = None) -> Any:
+    cookies = {"headless.session.id": session_id} if session_id else {}
+    return SimpleNamespace(cookies=cookies, headers={})
+
+
+async def resolve(
+    repo: ChatRepository, bot_id: str, conversation_id: Optional[str], session_id: str
+) -> Any:
+    return await repo.get_or_create_conversation(
+        bot_id=bot_id,
+        conversation_id=conversation_id,
+        chat_request=None,
+        request=request_for(session_id),
+        response=FakeResponse(),
+    )
+
+
+class _Rollback(Exception):
+    pass
+
+
+def in_rolled_back_transaction(test: Callable[[ChatRepository], Awaitable[None]]) -> None:
+    async def run():
+        from prisma import Prisma
+
+        client = Prisma()
+        await client.connect()
+        try:
+            async with client.tx() as tx:
+                await tx.execute_raw("SET LOCAL session_replication_role = replica")
+                await test(ChatRepository(tx))
+                raise _Rollback()
+        except _Rollback:
+            pass
+        finally:
+            await client.disconnect()
+
+    asyncio.run(run())
+
+
+class NoRowDatabase:
+    """RESOLVE_CONVERSATION_QUERY found no row and inserted none"""
+
+    async def query_first(self, query: str, *params: Any, model: Any = None) -> None:
+        return None
+
+
+@pytest.mark.parametrize(
+    "conversation_id, status",
+    [
+        # Taken by another bot's conversation: the insert's conflict update is skipped
+        ("cotherbotsconversation001", 404),
+        ("not-a-cuid", 400),
+    ],
+)
+def test_an_unresolved_conversation_is_a_client_error(conversation_id: str, status: int):
+    repo = ChatRepository(NoRowDatabase())
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(resolve(repo, "bot", conversation_id, "session"))
+
+    assert error.value.status_code == status
+
+
+@requires_database
+def test_an_existing_id_and_the_session_fallback():
+    async def test(repo: ChatRepository):
+        created = await resolve(repo, "conv-bot-a", None, "session-1")
+        assert created.botId == "conv-bot-a" and created.sessionId == "session-1"
+
+        # By id, from any session
+        assert (await resolve(repo, "conv-bot-a", created.id, "session-2")).id == created.id
+        # Without an id, or with a malformed one, the session's latest conversation
+        assert (await resolve(repo, "conv-bot-a", None, "session-1")).id == created.id
+        assert (await resolve(repo, "conv-bot-a", "not-a-cuid", "session-1")).id == created.id
+        # A new client-supplied id is created as given
+        chosen = generate_cuid()
+        assert (await resolve(repo, "conv-bot-a", chosen, "session-3")).id == chosen
+
+    in_rolled_back_transaction(test)
+
+
+@requires_database
+def test_another_bots_id_is_never_returned():
+    async def test(repo: ChatRepository):
+        foreign = await resolve(repo, "conv-bot-a", None, "session-1")
+
+        with pytest.raises(HTTPException) as error:
+            await resolve(repo, "conv-bot-b", foreign.id, "session-2")
+        assert error.value.status_code == 404
+
+        # With a conversation of its own in the session, that one is used instead
+        own = await resolve(repo, "conv-bot-b", None, "session-1")
+        assert (await resolve(repo, "conv-bot-b", foreign.id, "session-1")).id == own.id
+
+        with pytest.raises(HTTPException) as error:
+            await resolve(repo, "conv-bot-b", "not-a-cuid", "session-2")
+        assert error.value.status_code == 400
+
+    in_rolled_back_transaction(test)
+
+
+@requires_database
+def test_concurrent_creation_of_the_same_id_returns_one_conversation():
+    from prisma import Prisma
+
+    conversation_id = generate_cuid()
+
+    async def run() -> List[Any]:
+        first, second = Prisma(), Prisma()
+        await first.connect()
+        await second.connect()
+        try:
+            async with first.tx() as winner:
+                await winner.execute_raw("SET LOCAL session_replication_role = replica")
+                won = await resolve(ChatRepository(winner), "conv-bot-a", conversation_id, "s-1")
+
+                async def lose() -> Any:
+                    async with second.tx() as loser:
+                        await loser.execute_raw("SET LOCAL session_replication_role = replica")
+                        return await resolve(
+                            ChatRepository(loser), "conv-bot-a", conversation_id, "s-2"
+                        )
+
+                # Blocks on the unique id until the winner commits
+                racing = asyncio.create_task(lose())
+                await asyncio.sleep(0.5)
+                assert not racing.done()
+            lost = await racing
+            rows = await first.query_raw(
+                'SELECT "id", "sessionId" FROM "conversations" WHERE "id" = $1', conversation_id
+            )
+            return [won, lost, rows]
+        finally:
+            await first.execute_raw('DELETE FROM "conversations" WHERE "id" = $1', conversation_id)
+            await first.disconnect()
+            await second.disconnect()
+
+    won, lost, rows = asyncio.run(run())
+
+    assert won.id == lost.id == conversation_id
+    # The loser gets the winner's row, not a second conversation
+    assert lost.sessionId == "s-1"
+    assert rows == [{"id": conversation_id, "sessionId": "s-1"}]
@@ -0,0 +1,102 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, List, Sequence
+
+from app.infrastructure.ai.embeddings import EmbeddingClient
+from app.services.embedding_cache import EmbeddingCache
+
+CONFIG = SimpleNamespace(
+    EMBEDDING_MODEL="embedder",
+    EMBEDDING_BASE_URL="http://embeddings.test/v1",
+    EMBEDDING_API_KEY="key",
+    EMBEDDING_BATCH_SIZE=2,
+    EMBEDDING_BATCH_WINDOW=0.001,
+    EMBEDDING_CACHE_SIZE=100,
+    EMBEDDING_CACHE_PERSIST=True,
+)
+
+CHUNKS = [f"chunk {i} of the shipping guide" for i in range(5)]
+
+
+class FakeEmbeddingCacheRepository:
+    """The shared `embedding_cache` table"""
+
+    def __init__(self):
+        self.rows: Dict[str, List[float]] = {}
+
+    async def get_embeddings(self, hashes: Sequence[str]) -> Dict[str, List[float]]:
+        return {key: self.rows[key] for key in hashes if key in self.rows}
+
+    async def save_embeddings(self, model: str, embeddings: Dict[str, Sequence[float]]) -> None:
+        for key, embedding in embeddings.items():
+            self.rows.setdefault(key, list(embedding))
+
+
+class FakeEmbeddingServer:
+    def __init__(self):
+        self.requests: List[List[str]] = []
+        self.embeddings = SimpleNamespace(create=self.create)
+
+    async def create(self, model: str, input: List[str]):
+        self.requests.append(input)
+        data = [
+            SimpleNamespace(index=index, embedding=[float(len(text)), float(index)])
+            for index, text in enumerate(input)
+        ]
+        # Results may come back in any order; the client sorts them by index
+        return SimpleNamespace(data=data[::-1])
+
+
+def worker(repo: FakeEmbeddingCacheRepository, server: FakeEmbeddingServer) -> EmbeddingClient:
+    async def get_client(base_url: str, api_key: str):
+        return server
+
+    registry = SimpleNamespace(get_client=get_client)
+    return EmbeddingClient(registry, CONFIG, cache=EmbeddingCache(repo, CONFIG))
+
+
+def test_unchanged_chunks_are_embedded_once_across_resyncs_and_workers():
+    repo, server = FakeEmbeddingCacheRepository(), FakeEmbeddingServer()
+    first, second = worker(repo, server), worker(repo, server)
+
+    async def run():
+        embedded = await first.embed_many(CHUNKS)
+        assert server.requests == [CHUNKS[0:2], CHUNKS[2:4], CHUNKS[4:5]]
+        assert embedded == [[float(len(text)), float(index % 2)] for index, text in enumerate(CHUNKS)]
+        assert len(repo.rows) == len(CHUNKS)
+
+        # Re-sync of unchanged chunks on the same worker: served from memory
+        server.requests.clear()
+        assert await first.embed_many(CHUNKS) == embedded
+        assert server.requests == []
+
+        # Another worker reads the shared table; only the new chunk is requested
+        edited = [*CHUNKS, "chunk 5 added to the guide", CHUNKS[0]]
+        assert (await second.embed_many(edited))[: len(CHUNKS)] == embedded
+        assert server.requests == [["chunk 5 added to the guide"]]
+
+    asyncio.run(run())
+
+    assert first.cache.stats()["memory_hits"] == len(CHUNKS)
+    assert first.cache.stats()["misses"] == len(CHUNKS)
+    assert first.cache.stats()["hit_rate"] == 0.5
+    stats = second.cache.stats()
+    assert (stats["memory_hits"], stats["store_hits"], stats["misses"]) == (0, len(CHUNKS), 1)
+    assert stats["hit_rate"] == len(CHUNKS) / (len(CHUNKS) + 1)
+
+
+def test_single_embeddings_hit_memory_after_the_first_call():
+    repo, server = FakeEmbeddingCacheRepository(), FakeEmbeddingServer()
+    client = worker(repo, server)
+
+    async def run():
+        first = await asyncio.gather(*(client.embed(text) for text in CHUNKS[:2]))
+        # Concurrent calls were coalesced into one request
+        assert server.requests == [CHUNKS[:2]]
+        assert await client.embed(CHUNKS[0]) == first[0]
+        assert len(server.requests) == 1
+
+    asyncio.run(run())
+
+    stats = client.cache.stats()
+    assert (stats["memory_hits"], stats["misses"]) == (1, 2)
@@ -0,0 +1,171 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import logging as app_logging
+from app.core.database import Database
+from app.core.health import DatabaseHealthMonitor
+
+CONFIG = SimpleNamespace(
+    DB_URL=None,
+    DB_REPLICA_URL=None,
+    DB_CONNECTION_LIMIT=0,
+    DB_POOL_TIMEOUT=10,
+    DB_TX_TIMEOUT=5,
+    DB_TX_MAX_WAIT=2,
+)
+
+
+class FakeClient:
+    def __init__(self):
+        self.healthy = True
+        self.connected = False
+
+    async def connect(self):
+        if not self.healthy:
+            raise ConnectionError("connection refused")
+        self.connected = True
+
+    async def disconnect(self):
+        self.connected = False
+
+    def is_connected(self):
+        return self.connected
+
+    async def query_raw(self, query, *args):
+        if not self.healthy:
+            raise ConnectionError("server closed the connection")
+        return [{"?column?": 1}]
+
+
+def database_with_replica():
+    database = Database(CONFIG)
+    database._prisma, database._replica = FakeClient(), FakeClient()
+    return database
+
+
+def test_reads_fall_back_to_the_primary_while_the_replica_is_down():
+    database = database_with_replica()
+    monitor = DatabaseHealthMonitor(database, interval=1, timeout=1, failure_threshold=2)
+
+    async def run():
+        await database.connect()
+        assert database.reader is database._replica
+
+        database._replica.healthy = False
+        assert await monitor.check()
+        assert database.reader is database._prisma
+        assert monitor.stats()["replica_available"] is False
+
+        # Still down: the reconnect attempt fails and reads stay on the primary
+        assert await monitor.check()
+        assert database.reader is database._prisma
+
+        database._replica.healthy = True
+        assert await monitor.check()
+        assert database.reader is database._replica
+        assert monitor.stats()["replica_error"] is None
+
+    asyncio.run(run())
+
+
+def test_monitor_without_replica_only_probes_the_primary():
+    database = Database(CONFIG)
+    database._prisma = FakeClient()
+    monitor = DatabaseHealthMonitor(database, interval=1, timeout=1, failure_threshold=1)
+
+    async def run():
+        await database.connect()
+        assert await monitor.check()
+        database._prisma.healthy = False
+        assert not await monitor.check()
+        assert not monitor.available
+        assert monitor.stats()["replica_available"] is None
+
+    asyncio.run(run())
+
+
+class FakeDatabase:
+    """A primary without replica whose probes and reconnects can be made to fail"""
+
+    has_replica = False
+    replica_connected = False
+
+    def __init__(self):
+        self.healthy = True
+        self.hang = False
+        self.reconnects = 0
+
+    async def verify_connection(self) -> bool:
+        if self.hang:
+            await asyncio.sleep(10)
+        return self.healthy
+
+    async def reconnect(self) -> None:
+        self.reconnects += 1
+        if not self.healthy:
+            raise ConnectionError("connection refused")
+
+
+@pytest.fixture
+def main(monkeypatch):
+    # Importing the app sets up file logging under ./logs
+    monkeypatch.setattr(app_logging, "setup_logging", lambda: None)
+    from app import main
+
+    return main
+
+
+def test_circuit_opens_after_the_threshold_and_closes_on_reconnect(main, monkeypatch):
+    database = FakeDatabase()
+    monitor = DatabaseHealthMonitor(database, interval=1, timeout=1, failure_threshold=3)
+    monkeypatch.setattr(main, "get_db_health_monitor", lambda: monitor)
+
+    async def run():
+        database.healthy = False
+        for _ in range(2):
+            assert not await monitor.check()
+        # Below the threshold requests still go through
+        assert monitor.available
+        await main.verify_db()
+
+        assert not await monitor.check()
+        assert not monitor.available
+        assert monitor.stats()["trips"] == 1 and monitor.stats()["opened_at"]
+        with pytest.raises(HTTPException) as error:
+            await main.verify_db()
+        assert error.value.status_code == 503
+
+        # While open, every probe reconnects first; a failed reconnect keeps it open
+        assert not await monitor.check()
+        assert database.reconnects == 1
+        assert not monitor.available
+        assert monitor.last_error == "connection refused"
+
+        database.healthy = True
+        assert await monitor.check()
+        assert database.reconnects == 2
+        assert monitor.available
+        assert monitor.stats()["consecutive_failures"] == 0
+        assert monitor.stats()["opened_at"] is None
+        await main.verify_db()
+
+        # A healthy closed circuit never reconnects
+        assert await monitor.check()
+        assert database.reconnects == 2
+
+    asyncio.run(run())
+
+    assert monitor.trips == 1
+
+
+def test_a_hanging_probe_counts_as_a_failure():
+    database = FakeDatabase()
+    database.hang = True
+    monitor = DatabaseHealthMonitor(database, interval=1, timeout=0.05, failure_threshold=1)
+
+    assert not asyncio.run(monitor.check())
+    assert not monitor.available
+    assert monitor.last_error == "probe timed out after 0.05s"
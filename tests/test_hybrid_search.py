@@ -0,0 +1,143 @@
+"""
+VectorRepository.hybrid_search against Postgres: seeds a workspace's chunks
+inside a transaction that is rolled back and checks the reciprocal rank
+fusion order, the scoping to the workspace and the bot's sources, and that
+the `probe` CTE applies ivfflat.probes for the statement's transaction.
+Index scans are disabled so the ANN pass is exact on the tiny seed.
+
+Needs a migrated database: set DATABASE_URL to run it.
+"""
+import os
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("DATABASE_URL"), reason="DATABASE_URL is not set"
+)
+
+RRF_K = 60
+
+# (id, workspace, source, direction of the embedding, content)
+CHUNKS = [
+    # Nearest to the query vector, no keyword match
+    (
+        "rrf-hours",
+        "rrf-workspace",
+        "rrf-source-1",
+        (1.0, 0.0),
+        "Opening hours are posted at the door",
+    ),
+    # Second by similarity and the best keyword match
+    (
+        "rrf-refunds",
+        "rrf-workspace",
+        "rrf-source-2",
+        (0.8, 0.6),
+        "Refunds are issued within 30 days. Refunds go back to the original card.",
+    ),
+    # Keyword match only
+    (
+        "rrf-damaged",
+        "rrf-workspace",
+        "rrf-source-1",
+        (0.0, 1.0),
+        "Damaged items can be sent back with a prepaid label for a refund or an exchange.",
+    ),
+    # Best on both passes, but the source isn't attached to the bot
+    ("rrf-unattached", "rrf-workspace", "rrf-source-3", (1.0, 0.0), "Refunds take 30 days"),
+    # Attached source, other workspace
+    ("rrf-foreign", "rrf-other-workspace", "rrf-source-1", (1.0, 0.0), "Refunds take 30 days"),
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+def embedding(direction: tuple, dims: int) -> List[float]:
+    return [*direction, *([0.0] * (dims - len(direction)))]
+
+
+async def _search() -> Dict[str, Any]:
+    from prisma import Prisma
+    from app.repositories.vector import VectorRepository
+
+    result: Dict[str, Any] = {}
+    client = Prisma()
+    await client.connect()
+    try:
+        async with client.tx() as tx:
+            # Seed without satisfying foreign keys to workspaces, bots and sources
+            await tx.execute_raw("SET LOCAL session_replication_role = replica")
+            await tx.execute_raw("SET LOCAL enable_indexscan = off")
+            await tx.execute_raw("SET LOCAL enable_bitmapscan = off")
+            rows = await tx.query_raw(
+                "SELECT atttypmod AS dims FROM pg_attribute "
+                "WHERE attrelid = '\"vectors\"'::regclass AND attname = 'embedding'"
+            )
+            dims = int(rows[0]["dims"])
+            for index, source_id in enumerate(["rrf-source-1", "rrf-source-2"]):
+                await tx.execute_raw(
+                    'INSERT INTO "bot_sources" ("id", "botId", "sourceId") VALUES ($1, $2, $3)',
+                    f"rrf-bot-source-{index}",
+                    "rrf-bot",
+                    source_id,
+                )
+            for chunk_id, workspace_id, source_id, direction, content in CHUNKS:
+                await tx.execute_raw(
+                    'INSERT INTO "vectors" ("id", "workspaceId", "sourceId", "embedding", '
+                    '"chunkContent", "metadata", "chunkLength", "updatedAt") '
+                    "VALUES ($1, $2, $3, $4::vector, $5, '{}'::jsonb, $6, now())",
+                    chunk_id,
+                    workspace_id,
+                    source_id,
+                    VectorRepository.to_vector_literal(embedding(direction, dims)),
+                    content,
+                    len(content),
+                )
+
+            # Two candidates per pass: the ANN pass keeps hours and refunds,
+            # the keyword pass keeps refunds and damaged
+            result["rows"] = await VectorRepository(tx).hybrid_search(
+                "rrf-workspace",
+                "rrf-bot",
+                embedding((1.0, 0.0), dims),
+                "refunds",
+                limit=10,
+                candidates=2,
+                probes=7,
+                rrf_k=RRF_K,
+            )
+            rows = await tx.query_raw("SELECT current_setting('ivfflat.probes') AS probes")
+            result["probes"] = rows[0]["probes"]
+            raise _Rollback()
+    except _Rollback:
+        pass
+    finally:
+        await client.disconnect()
+    return result
+
+
+@pytest.fixture(scope="module")
+def search() -> Dict[str, Any]:
+    return asyncio.run(_search())
+
+
+def test_fused_order_and_scores(search: Dict[str, Any]):
+    scores = {row["id"]: float(row["score"]) for row in search["rows"]}
+
+    assert [row["id"] for row in search["rows"]] == ["rrf-refunds", "rrf-hours", "rrf-damaged"]
+    assert scores["rrf-refunds"] == pytest.approx(1 / (RRF_K + 2) + 1 / (RRF_K + 1))
+    assert scores["rrf-hours"] == pytest.approx(1 / (RRF_K + 1))
+    assert scores["rrf-damaged"] == pytest.approx(1 / (RRF_K + 2))
+
+
+def test_results_are_scoped_to_the_workspace_and_the_bots_sources(search: Dict[str, Any]):
+    assert {row["sourceId"] for row in search["rows"]} <= {"rrf-source-1", "rrf-source-2"}
+    assert not {"rrf-unattached", "rrf-foreign"} & {row["id"] for row in search["rows"]}
+
+
+def test_probe_cte_sets_ivfflat_probes(search: Dict[str, Any]):
+    assert search["probes"] == "7"
@@ -0,0 +1,193 @@
+"""
+Offline runs of the IngestionPipeline: fixture HTML and markdown are read
+through FileFetcher, embedded by a fake client and stored through the real
+VectorRepository on an in-memory stand-in for its transaction. Checks
+chunking, the contentHash skip, stable chunk ids across re-syncs and the
+`sources`/`syncs` status transitions.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from app.repositories.vector import VectorRepository
+from app.services.ingestion import FileFetcher, IngestionPipeline
+
+CONFIG = SimpleNamespace(
+    INGEST_QUEUE_SIZE=2,
+    INGEST_FETCH_CONCURRENCY=2,
+    INGEST_CHUNK_SIZE=300,
+    INGEST_CHUNK_OVERLAP=60,
+)
+
+PARAGRAPHS = [
+    f"Paragraph {i} explains how order {i} is packed, shipped and tracked until it arrives."
+    for i in range(12)
+]
+
+HTML = """
+<html><body>
+  <h1>Returns policy</h1>
+  <p>Items can be returned within <b>30 days</b> of delivery.</p>
+  <img src="label.png">
+  <p>Refunds are issued to the original payment method.</p>
+</body></html>
+"""
+
+
+class FakeSourceRepository:
+    def __init__(self, sources: List[Dict[str, Any]]):
+        self.sources = {source["id"]: source for source in sources}
+        self.statuses: Dict[str, List[str]] = {source_id: [] for source_id in self.sources}
+        self.syncs: Dict[str, Dict[str, Any]] = {}
+
+    async def get_sources(self, workspace_id: str, source_ids: List[str]) -> List[Dict[str, Any]]:
+        return [dict(self.sources[source_id]) for source_id in source_ids]
+
+    async def set_status(self, source_id: str, status: str) -> None:
+        self.sources[source_id]["status"] = status
+        self.statuses[source_id].append(status)
+
+    async def save_content(
+        self, source_id: str, content_hash: str, content_length: int, sync_time: int, status: str
+    ) -> None:
+        self.sources[source_id].update(contentHash=content_hash, contentLength=content_length)
+        await self.set_status(source_id, status)
+
+    async def start_sync(self, source_id: str) -> str:
+        sync_id = f"sync-{len(self.syncs)}"
+        self.syncs[sync_id] = {"sourceId": source_id, "status": "RUNNING", "message": None}
+        return sync_id
+
+    async def finish_sync(self, sync_id: str, status: str, message: Optional[str] = None) -> None:
+        assert self.syncs[sync_id]["status"] == "RUNNING"
+        self.syncs[sync_id].update(status=status, message=message)
+
+    def syncs_of(self, source_id: str) -> List[Dict[str, Any]]:
+        return [sync for sync in self.syncs.values() if sync["sourceId"] == source_id]
+
+
+class InMemoryVectorTransaction:
+    """Applies VectorRepository's DELETE and upsert statements to a dict"""
+
+    def __init__(self, rows: Dict[str, Dict[str, Any]]):
+        self.rows = rows
+
+    async def execute_raw(self, query: str, *params: Any) -> int:
+        if query == VectorRepository.DELETE_STALE_CHUNKS_QUERY:
+            source_id, count = params
+            keep = {VectorRepository.chunk_id(source_id, index) for index in range(count)}
+            for chunk_id in [key for key, row in self.rows.items() if row["sourceId"] == source_id]:
+                if chunk_id not in keep:
+                    del self.rows[chunk_id]
+            return 0
+        assert query.startswith('INSERT INTO "vectors"')
+        for start in range(0, len(params), 7):
+            chunk_id, workspace_id, source_id, embedding, content = params[start : start + 5]
+            self.rows[chunk_id] = {
+                "workspaceId": workspace_id,
+                "sourceId": source_id,
+                "embedding": embedding,
+                "chunkContent": content,
+            }
+        return len(params) // 7
+
+
+class InMemoryVectorDatabase:
+    def __init__(self):
+        self.rows: Dict[str, Dict[str, Any]] = {}
+
+    @asynccontextmanager
+    async def tx(self):
+        yield InMemoryVectorTransaction(self.rows)
+
+
+class FakeEmbeddingClient:
+    def __init__(self):
+        self.embedded: List[str] = []
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        self.embedded.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def source(source_id: str, url: str) -> Dict[str, Any]:
+    return {
+        "id": source_id,
+        "workspaceId": "workspace",
+        "url": url,
+        "title": source_id,
+        "status": "CREATED",
+        "contentHash": None,
+    }
+
+
+def test_local_files_sync_then_skip_then_resync_in_place(tmp_path):
+    (tmp_path / "guide.md").write_text("\n\n".join(PARAGRAPHS), encoding="utf-8")
+    (tmp_path / "returns.html").write_text(HTML, encoding="utf-8")
+    sources = FakeSourceRepository(
+        [
+            source("guide", "guide.md"),
+            source("returns", (tmp_path / "returns.html").as_uri()),
+            source("missing", "missing.md"),
+        ]
+    )
+    database = InMemoryVectorDatabase()
+    embeddings = FakeEmbeddingClient()
+    pipeline = IngestionPipeline(
+        sources, VectorRepository(database), embeddings, FileFetcher(str(tmp_path)), CONFIG
+    )
+
+    def contents(source_id: str) -> Dict[str, str]:
+        return {
+            chunk_id: row["chunkContent"]
+            for chunk_id, row in database.rows.items()
+            if row["sourceId"] == source_id
+        }
+
+    def run() -> Dict[str, str]:
+        return asyncio.run(pipeline.run("workspace", ["guide", "returns", "missing"]))
+
+    assert run() == {"guide": "SYNCED", "returns": "SYNCED", "missing": "FAILED"}
+
+    guide = contents("guide")
+    assert len(guide) > 1
+    assert list(guide) == [f"guide:{index}" for index in range(len(guide))]
+    assert all(len(chunk) <= CONFIG.INGEST_CHUNK_SIZE for chunk in guide.values())
+    assert all(paragraph in "\n\n".join(guide.values()) for paragraph in PARAGRAPHS)
+    # Consecutive chunks share an overlap
+    first, second = guide["guide:0"], guide["guide:1"]
+    assert second.split("\n\n")[0] in first
+
+    (returns,) = contents("returns").values()
+    assert returns.startswith("# Returns policy")
+    assert "**30 days**" in returns and "<" not in returns and "label.png" not in returns
+
+    assert sources.statuses["guide"] == ["SYNCING", "SYNCED"]
+    assert sources.statuses["missing"] == ["SYNCING", "FAILED"]
+    (sync,) = sources.syncs_of("guide")
+    assert sync == {"sourceId": "guide", "status": "SUCCEEDED", "message": f"{len(guide)} chunks"}
+    (sync,) = sources.syncs_of("missing")
+    assert sync["status"] == "FAILED" and sync["message"]
+
+    # Unchanged content: nothing is embedded or written again
+    embedded = len(embeddings.embedded)
+    rows = {chunk_id: dict(row) for chunk_id, row in database.rows.items()}
+    assert run() == {"guide": "UNCHANGED", "returns": "UNCHANGED", "missing": "FAILED"}
+    assert len(embeddings.embedded) == embedded
+    assert database.rows == rows
+    assert sources.statuses["guide"][-2:] == ["SYNCING", "SYNCED"]
+    assert sources.syncs_of("guide")[-1] == {
+        "sourceId": "guide",
+        "status": "SUCCEEDED",
+        "message": "Content unchanged",
+    }
+
+    # A shorter page keeps the ids of its leading chunks and drops the rest
+    (tmp_path / "guide.md").write_text("\n\n".join(PARAGRAPHS[:5]), encoding="utf-8")
+    assert run()["guide"] == "SYNCED"
+    resynced = contents("guide")
+    assert 0 < len(resynced) < len(guide)
+    assert list(resynced) == list(guide)[: len(resynced)]
+    assert resynced["guide:0"] == guide["guide:0"]
+    assert contents("returns") == {"returns:0": returns}
@@ -0,0 +1,227 @@
+"""
+Load check for LLMClientRegistry against a fake completion server: many
+concurrent streamed completions go through one pooled AsyncOpenAI client,
+must all finish intact and must share a bounded set of keep-alive
+connections instead of opening one per turn. With a slow server, a
+hundred streams on one event loop must overlap and finish in about the
+time of one.
+
+The timing comparison with a fresh client per turn is a benchmark; set
+RUN_BENCHMARKS to run it.
+"""
+import os
+import json
+import time
+import asyncio
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+from app.domain.interfaces import StreamResponseType
+from app.infrastructure.ai.providers.openai import OpenAIProvider
+from app.infrastructure.ai.providers.registry import LLMClientRegistry
+
+TOKENS = ["Hello", ", ", "how ", "can ", "I ", "help", "?"]
+MAX_CONNECTIONS = 10
+
+CONFIG = SimpleNamespace(
+    LLM_HTTP2=False,
+    LLM_POOL_MAX_CONNECTIONS=MAX_CONNECTIONS,
+    LLM_POOL_MAX_KEEPALIVE=MAX_CONNECTIONS,
+    LLM_POOL_KEEPALIVE_EXPIRY=30,
+    LLM_CLIENT_IDLE_TTL=60,
+)
+
+
+def sse_chunk(data: str) -> bytes:
+    event = f"data: {data}\n\n".encode()
+    return b"%x\r\n%s\r\n" % (len(event), event)
+
+
+def completion_chunk(delta: dict, finish_reason=None) -> str:
+    return json.dumps(
+        {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "fake-model",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+    )
+
+
+class FakeCompletionServer:
+    """HTTP/1.1 keep-alive server that streams a fixed completion as SSE"""
+
+    def __init__(self, token_delay: float = 0.001):
+        self.token_delay = token_delay
+        self.connections = 0
+        self.requests = 0
+        # Completions being streamed right now, and the most at any one time
+        self.streaming = 0
+        self.peak_streaming = 0
+        self.server = None
+
+    @property
+    def base_url(self) -> str:
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/v1"
+
+    async def __aenter__(self) -> "FakeCompletionServer":
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode().split("\r\n")[1:]:
+                    name, _, value = line.partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                json.loads(await reader.readexactly(length))
+                self.requests += 1
+                self.streaming += 1
+                self.peak_streaming = max(self.peak_streaming, self.streaming)
+
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"content-type: text/event-stream\r\n"
+                    b"transfer-encoding: chunked\r\n\r\n"
+                )
+                for token in TOKENS:
+                    await asyncio.sleep(self.token_delay)
+                    writer.write(sse_chunk(completion_chunk({"content": token})))
+                    await writer.drain()
+                writer.write(sse_chunk(completion_chunk({}, finish_reason="stop")))
+                writer.write(sse_chunk("[DONE]") + b"0\r\n\r\n")
+                self.streaming -= 1
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def complete(client) -> str:
+    provider = OpenAIProvider(client=client, model="fake-model")
+    responses = [
+        response
+        async for response in provider.request([{"role": "user", "content": "hi"}])
+    ]
+    return "".join(
+        response.content for response in responses if response.type == StreamResponseType.TOKEN
+    )
+
+
+async def pooled_turns(registry: LLMClientRegistry, base_url: str, turns: int) -> List[str]:
+    async def turn() -> str:
+        return await complete(await registry.get_client(base_url, "test-key"))
+
+    return await asyncio.gather(*(turn() for _ in range(turns)))
+
+
+def test_concurrent_streams_share_pooled_connections():
+    registry = LLMClientRegistry(CONFIG)
+
+    async def run():
+        async with FakeCompletionServer() as server:
+            first = await pooled_turns(registry, server.base_url, 200)
+            connections = server.connections
+            second = await pooled_turns(registry, server.base_url, 200)
+            metrics = registry.metrics()
+            await registry.close()
+            return server, connections, first + second, metrics
+
+    server, first_wave_connections, texts, metrics = asyncio.run(
+        asyncio.wait_for(run(), timeout=60)
+    )
+
+    assert texts == ["".join(TOKENS)] * 400
+    assert server.requests == 400
+    assert first_wave_connections <= MAX_CONNECTIONS
+    # The second wave rides the keep-alive connections of the first
+    assert server.connections == first_wave_connections
+    assert metrics["clients_created"] == 1
+    assert metrics["client_reuses"] == 399
+    assert metrics["clients"][0]["requests"] == 400
+
+
+def test_concurrent_streams_overlap_instead_of_queueing():
+    streams = 100
+    registry = LLMClientRegistry(
+        SimpleNamespace(
+            **{
+                **vars(CONFIG),
+                "LLM_POOL_MAX_CONNECTIONS": streams,
+                "LLM_POOL_MAX_KEEPALIVE": streams,
+            }
+        )
+    )
+
+    async def timed(base_url: str, turns: int) -> float:
+        started = time.perf_counter()
+        texts = await pooled_turns(registry, base_url, turns)
+        assert texts == ["".join(TOKENS)] * turns
+        return time.perf_counter() - started
+
+    async def run():
+        # Each stream spends ~0.35s waiting on the server, none of it on the loop
+        async with FakeCompletionServer(token_delay=0.05) as server:
+            await timed(server.base_url, 1)  # creates the pooled client
+            one = await timed(server.base_url, 1)
+            many = await timed(server.base_url, streams)
+            await registry.close()
+            return server, one, many
+
+    server, one, many = asyncio.run(asyncio.wait_for(run(), timeout=60))
+
+    # One event loop carries the streams at once: about one stream's time, not N times it.
+    # Connection setup staggers the starts, so not all of them overlap exactly.
+    assert server.peak_streaming >= streams // 2
+    assert many < one * 5, f"{streams} streams took {many:.2f}s, one took {one:.2f}s"
+
+
+@pytest.mark.skipif(not os.environ.get("RUN_BENCHMARKS"), reason="RUN_BENCHMARKS is not set")
+def test_pooled_client_benchmark():
+    turns = 500
+
+    async def fresh_turns(base_url: str) -> List[str]:
+        async def turn() -> str:
+            registry = LLMClientRegistry(CONFIG)
+            try:
+                return await complete(await registry.get_client(base_url, "test-key"))
+            finally:
+                await registry.close()
+
+        return await asyncio.gather(*(turn() for _ in range(turns)))
+
+    async def run():
+        results = {}
+        for name in ("fresh", "pooled"):
+            async with FakeCompletionServer(token_delay=0) as server:
+                registry = LLMClientRegistry(CONFIG)
+                started = time.perf_counter()
+                if name == "pooled":
+                    texts = await pooled_turns(registry, server.base_url, turns)
+                else:
+                    texts = await fresh_turns(server.base_url)
+                elapsed = time.perf_counter() - started
+                await registry.close()
+                assert texts == ["".join(TOKENS)] * turns
+                results[name] = (elapsed, server.connections)
+        return results
+
+    results = asyncio.run(run())
+
+    for name, (elapsed, connections) in results.items():
+        print(f"{name}: {turns / elapsed:.0f} turns/s over {connections} connections")
+    assert results["pooled"][1] <= MAX_CONNECTIONS
+    assert results["fresh"][1] == turns
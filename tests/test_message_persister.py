@@ -0,0 +1,105 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any, List
+
+from app.domain.interfaces import Message
+from app.services.message_persister import MessagePersister
+from app.utils import generate_cuid
+
+CONFIG = SimpleNamespace(
+    MESSAGE_FLUSH_SIZE=50,
+    MESSAGE_FLUSH_INTERVAL=2,
+    MESSAGE_FLUSH_MAX_RETRIES=3,
+    MESSAGE_FLUSH_MAX_BACKOFF=60,
+)
+
+
+class SlowRepository:
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.saved: List[Any] = []
+        self.fail = False
+
+    async def save_chat_messages(self, chats: List[dict]) -> int:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if self.fail:
+                raise ConnectionError("write failed")
+            self.saved.extend(chats)
+            return len(chats)
+        finally:
+            self.active -= 1
+
+
+def persister_with(repo: SlowRepository) -> MessagePersister:
+    return MessagePersister(repo, SimpleNamespace(record=lambda *args: None), CONFIG)
+
+
+def test_flushes_of_one_conversation_never_overlap():
+    repo = SlowRepository()
+    persister = persister_with(repo)
+
+    async def run():
+        for round_number in range(20):
+            persister.enqueue("conv", Message(role="user", content=f"m{round_number}"))
+            # Flushes queue up on the lock while the first one is writing
+            flushes = [asyncio.create_task(persister.flush("conv")) for _ in range(3)]
+            await asyncio.sleep(0)
+            persister.enqueue("conv", Message(role="assistant", content=f"a{round_number}"))
+            # Every accepted message stays visible until it is written
+            written = {chat["content"] for chat in repo.saved}
+            pending = {message.content for message in persister.pending("conv")}
+            assert {f"m{round_number}", f"a{round_number}"} <= written | pending
+            await asyncio.gather(*flushes)
+
+    asyncio.run(run())
+
+    assert repo.max_active == 1
+    assert len(repo.saved) == 40
+    assert persister._locks == {} and persister._lock_users == {}
+
+
+def test_failed_batch_is_requeued_then_dropped():
+    repo = SlowRepository()
+    repo.fail = True
+    persister = persister_with(repo)
+
+    async def run():
+        persister.enqueue("conv", Message(role="user", content="hello"))
+        for attempt in range(CONFIG.MESSAGE_FLUSH_MAX_RETRIES):
+            try:
+                await persister.flush("conv")
+            except ConnectionError:
+                pass
+            queued = len(persister.pending("conv"))
+            assert queued == (1 if attempt < CONFIG.MESSAGE_FLUSH_MAX_RETRIES - 1 else 0)
+
+    asyncio.run(run())
+
+    assert persister.dropped == 1
+
+
+def truncate_to_ms(value):
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+
+def test_tool_turn_keeps_its_order_at_millisecond_precision():
+    persister = persister_with(SlowRepository())
+
+    for _ in range(50):
+        conversation_id = generate_cuid()
+        # The tool_calls stub and its results are enqueued back to back
+        stub = Message(role="assistant", content="", toolCalls=[{"id": "call"}])
+        enqueued = [
+            persister.enqueue(conversation_id, stub),
+            persister.enqueue(conversation_id, Message(role="tool", content="r1", toolCallId="call")),
+            persister.enqueue(conversation_id, Message(role="tool", content="r2", toolCallId="call")),
+        ]
+
+        # createdAt is TIMESTAMP(3) and get_chats orders by it
+        stored = [truncate_to_ms(message.createdAt) for message in enqueued]
+        assert stored == [message.createdAt for message in enqueued]
+        assert stored[0] < stored[1] < stored[2]
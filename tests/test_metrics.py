@@ -0,0 +1,97 @@
+import os
+import time
+import asyncio
+
+from app.core.metrics import LatencyRecorder, MetricsExporter, merge_snapshots, render_prometheus
+
+BUCKETS = (0.1, 1.0)
+
+
+def recorder_with(*samples: tuple, followups: int = 0) -> LatencyRecorder:
+    recorder = LatencyRecorder(buckets=BUCKETS)
+    for stage, seconds in samples:
+        recorder.record(stage, seconds)
+    if followups:
+        recorder.increment("tool_followups", followups)
+    return recorder
+
+
+def test_merged_worker_snapshots_render_cumulative_histograms():
+    first = recorder_with(("provider", 0.0625), ("provider", 0.5), followups=2)
+    second = recorder_with(("provider", 2.0), ("history", 0.03125), followups=1)
+    caches = {"bots": {"size": 3, "hits": 10, "misses": 2, "evictions": 0}}
+
+    merged = merge_snapshots(
+        [{**first.snapshot(), "caches": caches}, {**second.snapshot(), "caches": caches}]
+    )
+    lines = render_prometheus(merged, {"db_up": [({"worker": 1}, 1)]}).splitlines()
+
+    assert merged["stages"]["provider"]["buckets"] == [1, 1]
+    assert merged["stages"]["provider"]["max"] == 2.0
+    for line in [
+        "# TYPE chat_stage_seconds histogram",
+        'chat_stage_seconds_bucket{stage="provider",le="0.1"} 1',
+        'chat_stage_seconds_bucket{stage="provider",le="1.0"} 2',
+        'chat_stage_seconds_bucket{stage="provider",le="+Inf"} 3',
+        'chat_stage_seconds_sum{stage="provider"} 2.5625',
+        'chat_stage_seconds_count{stage="provider"} 3',
+        'chat_stage_seconds_bucket{stage="history",le="0.1"} 1',
+        'chat_stage_seconds_bucket{stage="history",le="+Inf"} 1',
+        "# TYPE chat_tool_followups_total counter",
+        "chat_tool_followups_total 3",
+        'cache_hits_total{cache="bots"} 20',
+        'cache_entries{cache="bots"} 6',
+        'db_up{worker="1"} 1',
+    ]:
+        assert line in lines, line
+    # Stages are rendered in name order
+    assert lines.index('chat_stage_seconds_count{stage="history"} 1') < lines.index(
+        'chat_stage_seconds_bucket{stage="provider",le="0.1"} 1'
+    )
+
+
+def test_collect_merges_fresh_sibling_exports_only(tmp_path):
+    recorder = recorder_with(("provider", 0.5), followups=1)
+    exporter = MetricsExporter(recorder, str(tmp_path), interval=1)
+
+    sibling = MetricsExporter(recorder_with(("provider", 0.0625), followups=4), str(tmp_path), 1)
+    sibling.path = tmp_path / "sibling.json"
+    sibling._write(sibling.snapshot())
+
+    crashed = MetricsExporter(recorder_with(followups=100), str(tmp_path), 1)
+    crashed.path = tmp_path / "crashed.json"
+    crashed._write(crashed.snapshot())
+    stale = time.time() - 60
+    os.utime(crashed.path, (stale, stale))
+
+    (tmp_path / "partial.json").write_text('{"stages": ')
+    # This worker's own file is older than its live recorder and is skipped
+    exporter._write(recorder_with(followups=1000).snapshot())
+
+    merged = asyncio.run(exporter.collect())
+
+    assert merged["counters"] == {"tool_followups": 5}
+    assert merged["stages"]["provider"]["count"] == 2
+    assert merged["stages"]["provider"]["buckets"] == [1, 1]
+
+
+def test_disabled_recorder_records_nothing():
+    recorder = LatencyRecorder(enabled=False)
+
+    with recorder.time("provider"):
+        pass
+    recorder.record("provider", 1.0)
+    recorder.increment("tool_followups")
+    assert asyncio.run(recorder.timed("history", asyncio.sleep(0, result="ok"))) == "ok"
+
+    # Every timer is the same shared no-op context manager
+    assert recorder.time("a") is recorder.time("b")
+    assert recorder.stats() == {}
+    assert recorder.snapshot()["stages"] == {} and recorder.snapshot()["counters"] == {}
+
+    async def start():
+        exporter = MetricsExporter(recorder, "unused", interval=1)
+        exporter.start()
+        return exporter._task
+
+    assert asyncio.run(start()) is None
@@ -0,0 +1,370 @@
+"""
+Checks for the in-process product search: ProductSearchIndex ranking,
+prefix and misspelling matches, incremental updates that must match the
+same products as a fresh build, the ProductSearchEngine gating on
+DB_NOTIFY_ENABLED, and misspelled queries answered by a single
+search_products call.
+
+The latency benchmark over a synthetic 100k-product catalog is skipped by
+default; set RUN_BENCHMARKS to run it. Its baseline, the tsquery
+statement search_products runs without the index, seeds the same
+catalog inside a rolled-back transaction and also needs DATABASE_URL.
+"""
+import os
+import time
+import random
+import asyncio
+import logging
+from datetime import timedelta
+from types import SimpleNamespace
+from typing import Any, List, Optional
+
+import pytest
+
+from app.infrastructure.ai.tools.functions import business as business_module
+from app.services.product_search import (
+    ProductSearchEngine,
+    ProductSearchIndex,
+    ProductTokenizer,
+)
+
+BRANDS = ["adidas", "nike", "puma", "reebok", "asics", "fila", "vans", "converse"]
+KINDS = ["sneakers", "hoodie", "jacket", "shorts", "socks", "backpack", "cap", "sandals"]
+COLOURS = ["red", "black", "white", "navy", "olive", "grey", "pink", "yellow"]
+CATEGORIES = ["Footwear", "Clothing", "Accessories"]
+
+
+def product(
+    product_id: str,
+    name: str,
+    category: Optional[str] = "Footwear",
+    description: str = "",
+    is_active: bool = True,
+    business_id: str = "biz",
+):
+    return SimpleNamespace(
+        id=product_id,
+        businessId=business_id,
+        name=name,
+        description=description,
+        price=100,
+        stock=5,
+        category=SimpleNamespace(name=category) if category else None,
+        images=[],
+        isActive=is_active,
+    )
+
+
+def catalog(size: int, seed: int = 0) -> List[Any]:
+    rng = random.Random(seed)
+    return [
+        product(
+            f"p{i}",
+            f"{rng.choice(BRANDS)} {rng.choice(COLOURS)} {rng.choice(KINDS)} {i}",
+            rng.choice(CATEGORIES),
+            f"{rng.choice(COLOURS)} {rng.choice(KINDS)} made for everyday wear",
+        )
+        for i in range(size)
+    ]
+
+
+def build(products: List[Any]) -> ProductSearchIndex:
+    index = ProductSearchIndex(ProductTokenizer.from_data_files())
+    index.build(products)
+    return index
+
+
+def names(results) -> List[str]:
+    return [result["name"] for result in results]
+
+
+def test_name_matches_outrank_description_matches():
+    index = build(
+        [
+            product("1", "Trail jacket", "Clothing", "Warm jacket for red sneakers fans"),
+            product("2", "Red sneakers", "Footwear", "Everyday trainers"),
+            product("3", "Blue cap", "Accessories", "A cap"),
+        ]
+    )
+
+    assert names(index.search("red sneakers")) == ["Red sneakers", "Trail jacket"]
+
+
+def test_prefix_and_misspelled_terms_match():
+    index = build([product("1", "Adidas sneakers"), product("2", "Leather sandals")])
+
+    assert names(index.search("sneak")) == ["Adidas sneakers"]
+    assert names(index.search("adiddas")) == ["Adidas sneakers"]
+    # Different words of similar shape stay apart
+    assert index.search("phones") == []
+
+
+def test_inactive_products_are_not_indexed():
+    index = build([product("1", "Red cap", is_active=False), product("2", "Red hoodie")])
+
+    assert names(index.search("red")) == ["Red hoodie"]
+
+
+def test_incremental_updates_match_a_fresh_build():
+    rng = random.Random(1)
+    products = {item.id: item for item in catalog(300)}
+    index = build(list(products.values()))
+
+    for step in range(600):
+        product_id = f"p{rng.randrange(400)}"
+        if rng.random() < 0.3:
+            products.pop(product_id, None)
+            index.remove(product_id)
+        else:
+            products[product_id] = catalog(1, seed=step)[0]
+            products[product_id].id = product_id
+            index.upsert(products[product_id])
+
+    fresh = build(list(products.values()))
+    assert len(index) == len(fresh) == len(products)
+    # Length norms are refreshed lazily, so compare matches rather than ranks
+    for query in ["red", "nike hoodie", "snea", "olive socks", "backpak", "*latest*"]:
+        matched = {result["id"] for result in index.search(query, limit=len(products))}
+        expected = {result["id"] for result in fresh.search(query, limit=len(products))}
+        assert matched == expected, query
+
+
+class FakeBusinessRepository:
+    def __init__(self, products: List[Any]):
+        self.products = {item.id: item for item in products}
+        self.builds = 0
+
+    async def get_active_products(self, business_id: str) -> List[Any]:
+        self.builds += 1
+        return [item for item in self.products.values() if item.businessId == business_id]
+
+    async def get_product(self, product_id: str):
+        return self.products.get(product_id)
+
+
+def engine_config(**overrides) -> SimpleNamespace:
+    settings = dict(
+        PRODUCT_SEARCH_INDEX=True,
+        PRODUCT_FUZZY_SEARCH=True,
+        DB_NOTIFY_ENABLED=True,
+        PRODUCT_INDEX_CACHE_SIZE=8,
+        PRODUCT_INDEX_TTL=60,
+    )
+    settings.update(overrides)
+    return SimpleNamespace(**settings)
+
+
+def test_engine_requires_notify(caplog):
+    repo = FakeBusinessRepository([])
+
+    with caplog.at_level(logging.WARNING):
+        engine = ProductSearchEngine(repo, engine_config(DB_NOTIFY_ENABLED=False))
+
+    assert not engine.enabled and not engine.fuzzy_fallback
+    assert "PRODUCT_SEARCH_INDEX ignored" in caplog.text
+    assert "PRODUCT_FUZZY_SEARCH ignored" in caplog.text
+    assert ProductSearchEngine(repo, engine_config()).enabled
+
+
+def test_engine_applies_product_notifications():
+    repo = FakeBusinessRepository([product("1", "Red hoodie"), product("2", "Red cap")])
+    engine = ProductSearchEngine(repo, engine_config())
+
+    async def run():
+        assert names(await engine.search("biz", "red")) == ["Red cap", "Red hoodie"]
+
+        repo.products["1"] = product("1", "Red hoodie", is_active=False)
+        await engine.handle_notification(
+            {"table": "products", "op": "UPDATE", "id": "1", "businessId": "biz"}
+        )
+        await engine.handle_notification(
+            {"table": "products", "op": "DELETE", "id": "2", "businessId": "biz"}
+        )
+        assert await engine.search("biz", "red") == []
+
+        await engine.handle_notification({"table": "categories", "businessId": "biz"})
+        await engine.search("biz", "red")
+
+    asyncio.run(run())
+
+    # Product rows are patched in place; only the category change rebuilt
+    assert repo.builds == 2
+
+
+def test_changes_during_a_lazy_build_are_not_lost():
+    repo = FakeBusinessRepository([product("1", "Red hoodie"), product("2", "Red cap")])
+    engine = ProductSearchEngine(repo, engine_config())
+
+    async def run():
+        release = asyncio.Event()
+        read = repo.get_active_products
+
+        async def slow_read(business_id: str) -> List[Any]:
+            # The build reads its rows before the changes below land
+            rows = await read(business_id)
+            await release.wait()
+            return rows
+
+        repo.get_active_products = slow_read
+        search = asyncio.create_task(engine.search("biz", "red"))
+        await asyncio.sleep(0)
+
+        repo.products["1"] = product("1", "Red hoodie", is_active=False)
+        await engine.handle_notification(
+            {"table": "products", "op": "UPDATE", "id": "1", "businessId": "biz"}
+        )
+        await engine.handle_notification(
+            {"table": "products", "op": "DELETE", "id": "2", "businessId": "biz"}
+        )
+        del repo.products["2"]
+        release.set()
+        await search
+
+        repo.get_active_products = read
+        assert await engine.search("biz", "red") == []
+
+    asyncio.run(run())
+
+    # The racing build was not cached, so the next search rebuilt
+    assert repo.builds == 2
+
+
+class EmptySearchReader:
+    """The prefix tsquery path: misspelled terms match nothing"""
+
+    def __init__(self):
+        self.queries = 0
+
+    async def query_raw(self, query: str, *args) -> List[Any]:
+        self.queries += 1
+        return []
+
+
+@pytest.mark.parametrize("index_enabled", [True, False])
+def test_misspelled_query_is_answered_by_one_search_products_call(monkeypatch, index_enabled):
+    reader = EmptySearchReader()
+    monkeypatch.setattr(business_module, "db", SimpleNamespace(prisma=None, reader=reader))
+    repo = FakeBusinessRepository(
+        [product("1", "Adidas Yeezy Boost 350"), product("2", "Nike Air Max")]
+    )
+    engine = ProductSearchEngine(repo, engine_config(PRODUCT_SEARCH_INDEX=index_enabled))
+    functions = business_module.BusinessFunctions("biz", search_engine=engine)
+
+    results = asyncio.run(functions.search_products("adiddas yezy"))
+
+    assert names(results) == ["Adidas Yeezy Boost 350"]
+    # With the index off, the SQL path ran once and the fuzzy fallback answered
+    assert reader.queries == (0 if index_enabled else 1)
+
+
+BENCHMARK_QUERIES = {
+    "several terms": ["adidas navy hoodie 4242", "pink sandals 99999", "olve socks 123"],
+    "one term": ["red", "sneakers", "nike"],
+}
+
+# The same vocabulary as catalog(), generated in SQL for the baseline
+BENCHMARK_SEED = [
+    """
+    INSERT INTO "categories" ("id", "businessId", "name")
+    SELECT 'bench-cat-' || i, 'bench-biz', (ARRAY{categories})[i]
+    FROM generate_series(1, {category_count}) i
+    """,
+    """
+    INSERT INTO "products" ("id", "businessId", "categoryId", "name", "description", "price",
+                            "stock", "isActive", "updatedAt")
+    SELECT 'bench-prod-' || i, 'bench-biz', 'bench-cat-' || (i % {category_count} + 1),
+           (ARRAY{brands})[i % {brand_count} + 1] || ' ' || (ARRAY{colours})[i * 7 % {colour_count} + 1]
+               || ' ' || (ARRAY{kinds})[i * 13 % {kind_count} + 1] || ' ' || i,
+           (ARRAY{colours})[i * 3 % {colour_count} + 1] || ' ' || (ARRAY{kinds})[i * 5 % {kind_count} + 1]
+               || ' made for everyday wear',
+           100, 5, true, now()
+    FROM generate_series(0, {size} - 1) i
+    """,
+    'ANALYZE "categories", "products"',
+]
+
+
+async def time_queries(search) -> None:
+    for kind, terms in BENCHMARK_QUERIES.items():
+        timings = []
+        for _ in range(20):
+            for query in terms:
+                started = time.perf_counter()
+                await search(query)
+                timings.append(time.perf_counter() - started)
+        timings.sort()
+        p50, p95 = timings[len(timings) // 2], timings[int(len(timings) * 0.95)]
+        print(f"{kind}: p50 {p50 * 1000:.2f}ms, p95 {p95 * 1000:.2f}ms")
+
+
+async def benchmark_index(size: int) -> None:
+    started = time.perf_counter()
+    index = build(catalog(size))
+    print(f"index build: {time.perf_counter() - started:.2f}s for {len(index)} products")
+
+    async def search(query: str) -> None:
+        assert index.search(query)
+
+    await time_queries(search)
+
+
+class _Rollback(Exception):
+    pass
+
+
+async def benchmark_sql(size: int, monkeypatch) -> None:
+    from prisma import Prisma
+
+    def array(words: List[str]) -> str:
+        return "[" + ", ".join(f"'{word}'" for word in words) + "]"
+
+    client = Prisma()
+    await client.connect()
+    try:
+        # Seeding and timing outlast the default 5s interactive transaction
+        async with client.tx(timeout=timedelta(minutes=10)) as tx:
+            # Seed without satisfying the foreign key to businesses
+            await tx.execute_raw("SET LOCAL session_replication_role = replica")
+            for statement in BENCHMARK_SEED:
+                await tx.execute_raw(
+                    statement.format(
+                        size=size,
+                        brands=array(BRANDS),
+                        brand_count=len(BRANDS),
+                        kinds=array(KINDS),
+                        kind_count=len(KINDS),
+                        colours=array(COLOURS),
+                        colour_count=len(COLOURS),
+                        categories=array(CATEGORIES),
+                        category_count=len(CATEGORIES),
+                    )
+                )
+            # search_products without an engine runs the tsquery statement
+            monkeypatch.setattr(business_module, "db", SimpleNamespace(prisma=tx, reader=tx))
+            # Misspelled terms legitimately match nothing on this path
+            functions = business_module.BusinessFunctions("bench-biz")
+            await time_queries(functions.search_products)
+            raise _Rollback()
+    except _Rollback:
+        pass
+    finally:
+        await client.disconnect()
+
+
+@pytest.mark.skipif(not os.environ.get("RUN_BENCHMARKS"), reason="RUN_BENCHMARKS is not set")
+@pytest.mark.parametrize(
+    "path",
+    [
+        "index",
+        pytest.param(
+            "sql",
+            marks=pytest.mark.skipif(
+                not os.environ.get("DATABASE_URL"), reason="DATABASE_URL is not set"
+            ),
+        ),
+    ],
+)
+def test_search_latency_benchmark(path: str, monkeypatch):
+    print(f"\n{path} path over 100000 products")
+    benchmark = benchmark_index(100_000) if path == "index" else benchmark_sql(100_000, monkeypatch)
+    asyncio.run(benchmark)
@@ -0,0 +1,207 @@
+"""
+Regression check for the chat hot-path indexes: seeds rows inside a
+transaction that is rolled back, EXPLAINs the raw SQL the app runs and
+asserts the planner picks the intended index for each. Sequential scans
+(and, for the ANN pass, sorts) are disabled so the answer doesn't depend
+on how much data was seeded.
+
+Queries issued through Prisma's `find_many` (chat history, the latest
+products) are generated by the query engine and can't be EXPLAINed from
+here; for those the check is only that an index leads with the filter
+and order columns they use.
+
+Needs a migrated database: set DATABASE_URL to run it.
+"""
+import os
+import json
+import asyncio
+from typing import Any, Dict, List, Set
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("DATABASE_URL"), reason="DATABASE_URL is not set"
+)
+
+SEED = [
+    """
+    INSERT INTO "conversations" ("id", "botId", "sessionId", "createdAt", "updatedAt")
+    SELECT 'plan-conv-' || i, 'plan-bot', 'plan-session-' || i, now(), now()
+    FROM generate_series(1, 500) i
+    """,
+    """
+    INSERT INTO "chats" ("id", "conversationId", "role", "content", "tokens", "createdAt", "updatedAt")
+    SELECT 'plan-chat-' || i, 'plan-conv-' || (i % 500 + 1), 'user', 'message ' || i, 2,
+           now() + i * interval '1 millisecond', now()
+    FROM generate_series(1, 10000) i
+    """,
+    """
+    INSERT INTO "categories" ("id", "businessId", "name")
+    SELECT 'plan-cat-' || i, 'plan-biz-' || (i % 20), 'category ' || md5(i::text)
+    FROM generate_series(1, 400) i
+    """,
+    """
+    INSERT INTO "products" ("id", "businessId", "categoryId", "name", "description", "price", "updatedAt")
+    SELECT 'plan-prod-' || i, 'plan-biz-' || (i % 20), 'plan-cat-' || (i % 400 + 1),
+           'product ' || md5(i::text), 'description ' || md5((i * 7)::text), 10, now()
+    FROM generate_series(1, 10000) i
+    """,
+    """
+    INSERT INTO "bot_sources" ("id", "botId", "sourceId")
+    SELECT 'plan-bot-source-' || i, 'plan-bot', 'plan-source-' || i FROM generate_series(1, 10) i
+    """,
+    """
+    INSERT INTO "vectors" ("id", "workspaceId", "sourceId", "embedding", "chunkContent",
+                           "metadata", "chunkLength", "updatedAt")
+    SELECT 'plan-vector-' || i, 'plan-workspace', 'plan-source-' || (i % 10 + 1),
+           array_fill((i % 97)::real + 0.5, ARRAY[{dims}])::vector,
+           'chunk about ' || md5(i::text), '{{}}'::jsonb, 40, now()
+    FROM generate_series(1, 5000) i
+    """,
+]
+
+ANALYZE = 'ANALYZE "conversations", "chats", "categories", "products", "bot_sources", "vectors"'
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _index_names(plan: Any) -> Set[str]:
+    names: Set[str] = set()
+    if isinstance(plan, dict):
+        if "Index Name" in plan:
+            names.add(plan["Index Name"])
+        for value in plan.values():
+            names |= _index_names(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            names |= _index_names(item)
+    return names
+
+
+async def _collect_plans() -> Dict[str, Set[str]]:
+    from prisma import Prisma
+    from app.repositories.chat import ChatRepository
+    from app.repositories.vector import VectorRepository
+    from app.infrastructure.ai.tools.functions.business import BusinessFunctions
+
+    async def explain(tx: Prisma, query: str, *params: Any) -> Set[str]:
+        rows = await tx.query_raw("EXPLAIN (FORMAT JSON) " + query, *params)
+        plan = rows[0]["QUERY PLAN"]
+        return _index_names(json.loads(plan) if isinstance(plan, str) else plan)
+
+    query_vector: List[float] = []
+    plans: Dict[str, Set[str]] = {}
+    client = Prisma()
+    await client.connect()
+    try:
+        async with client.tx() as tx:
+            # Seed without satisfying foreign keys to workspaces, bots, businesses...
+            await tx.execute_raw("SET LOCAL session_replication_role = replica")
+            dims = await tx.query_raw(
+                "SELECT atttypmod AS dims FROM pg_attribute "
+                "WHERE attrelid = '\"vectors\"'::regclass AND attname = 'embedding'"
+            )
+            query_vector = [0.5] * int(dims[0]["dims"])
+            for statement in SEED:
+                await tx.execute_raw(statement.format(dims=len(query_vector)))
+            await tx.execute_raw(ANALYZE)
+            await tx.execute_raw("SET LOCAL enable_seqscan = off")
+
+            plans["conversation"] = await explain(
+                tx,
+                ChatRepository.RESOLVE_CONVERSATION_QUERY,
+                "plan-conv-missing",
+                "plan-bot",
+                "plan-session-1",
+                "plan-conv-new",
+                None,
+                False,
+            )
+            plans["product_search"] = await explain(
+                tx, BusinessFunctions.SEARCH_PRODUCTS_QUERY, "plan-biz-1", "product:*", 15
+            )
+            plans["vector_sync"] = await explain(
+                tx,
+                VectorRepository.VECTORS_SINCE_QUERY,
+                "plan-workspace",
+                "-infinity",
+                "",
+                1000,
+                60,
+            )
+            # Only the ANN index can produce the `<=>` order without a sort
+            await tx.execute_raw("SET LOCAL enable_sort = off")
+            plans["chunk_search"] = await explain(
+                tx,
+                VectorRepository.HYBRID_SEARCH_QUERY,
+                "plan-workspace",
+                "plan-bot",
+                VectorRepository.to_vector_literal(query_vector),
+                "chunk about",
+                40,
+                60,
+                5,
+                "10",
+            )
+            raise _Rollback()
+    except _Rollback:
+        pass
+    finally:
+        await client.disconnect()
+    return plans
+
+
+@pytest.fixture(scope="module")
+def plans() -> Dict[str, Set[str]]:
+    return asyncio.run(_collect_plans())
+
+
+@pytest.mark.parametrize(
+    "query, indexes",
+    [
+        ("conversation", {"conversations_botId_sessionId_createdAt_idx"}),
+        ("product_search", {"products_search_idx", "categories_name_search_idx"}),
+        ("vector_sync", {"vectors_workspace_updated_idx"}),
+        ("chunk_search", {"vectors_embedding_idx", "vectors_content_idx"}),
+    ],
+)
+def test_query_uses_index(plans: Dict[str, Set[str]], query: str, indexes: Set[str]):
+    missing = indexes - plans[query]
+    assert not missing, f"{query} plan does not use {missing}; indexes used: {plans[query]}"
+
+
+async def _index_definitions() -> Dict[str, str]:
+    from prisma import Prisma
+
+    client = Prisma()
+    await client.connect()
+    try:
+        rows = await client.query_raw(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename IN ('chats', 'products')"
+        )
+    finally:
+        await client.disconnect()
+    return {row["indexname"]: row["indexdef"] for row in rows}
+
+
+@pytest.fixture(scope="module")
+def index_definitions() -> Dict[str, str]:
+    return asyncio.run(_index_definitions())
+
+
+@pytest.mark.parametrize(
+    "index, columns",
+    [
+        # ChatRepository.get_chats / get_chats_since: conversationId =, createdAt order
+        ("chats_conversationId_createdAt_idx", '("conversationId", "createdAt"'),
+        # search_products("*LATEST*"): businessId =, isActive =, name order
+        ("products_businessId_isActive_name_idx", '("businessId", "isActive", "name"'),
+    ],
+)
+def test_prisma_query_has_leading_index(
+    index_definitions: Dict[str, str], index: str, columns: str
+):
+    assert index in index_definitions, f"{index} is missing"
+    assert columns in index_definitions[index], index_definitions[index]
@@ -0,0 +1,149 @@
+import math
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, List
+
+from app.core.metrics import LatencyRecorder
+from app.services.response_cache import ResponseCache
+
+CONFIG = SimpleNamespace(
+    RESPONSE_CACHE_ENABLED=True,
+    RESPONSE_CACHE_THRESHOLD=0.95,
+    RESPONSE_CACHE_TTL=60,
+    RESPONSE_CACHE_SIZE=16,
+    RESPONSE_CACHE_ENTRIES=2,
+)
+
+
+def at_angle(degrees: float) -> List[float]:
+    """A unit vector whose cosine similarity with at_angle(0) is cos(degrees)"""
+    return [math.cos(math.radians(degrees)), math.sin(math.radians(degrees))]
+
+
+class FakeEmbeddingClient:
+    configured = True
+
+    def __init__(self, vectors: Dict[str, List[float]]):
+        self.vectors = vectors
+        self.calls: List[str] = []
+
+    async def embed(self, text: str) -> List[float]:
+        self.calls.append(text)
+        return self.vectors[text]
+
+
+VECTORS = {
+    "do you ship to lagos": at_angle(0),
+    # cos(10°) ≈ 0.985, above the threshold
+    "do you deliver to lagos": at_angle(10),
+    # cos(30°) ≈ 0.866, below it
+    "do you ship to abuja": at_angle(30),
+    "what payment methods do you take": at_angle(90),
+    "is the red hoodie in stock": at_angle(180),
+}
+
+
+def cache_with(vectors: Dict[str, List[float]] = VECTORS) -> ResponseCache:
+    return ResponseCache(FakeEmbeddingClient(vectors), CONFIG)
+
+
+async def answer(cache: ResponseCache, prompt: str, text: str, version: str = "v1") -> None:
+    lookup = await cache.lookup("biz", "sell", version, prompt)
+    assert lookup is not None and lookup.answer is None
+    cache.store(lookup, text)
+    await asyncio.gather(*cache._tasks)
+
+
+async def cached(cache: ResponseCache, prompt: str, version: str = "v1"):
+    lookup = await cache.lookup("biz", "sell", version, prompt)
+    return lookup.answer if lookup else None
+
+
+def test_exact_and_semantic_hits_respect_the_threshold():
+    cache = cache_with()
+
+    async def run():
+        await answer(cache, "Do you ship to Lagos?", "Yes, in 2 days.")
+        embedded = len(cache.embeddings.calls)
+        # Normalized text matches without an embedding call
+        assert await cached(cache, "do you SHIP to lagos") == "Yes, in 2 days."
+        assert len(cache.embeddings.calls) == embedded
+        assert await cached(cache, "Do you deliver to Lagos?") == "Yes, in 2 days."
+        assert await cached(cache, "Do you ship to Abuja?") is None
+
+    asyncio.run(run())
+
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["semantic_hits"], stats["misses"]) == (1, 1, 2)
+
+
+def test_a_new_business_data_version_starts_a_fresh_bucket():
+    cache = cache_with()
+
+    async def run():
+        await answer(cache, "Do you ship to Lagos?", "Yes, in 2 days.")
+        assert await cached(cache, "Do you ship to Lagos?", version="v2") is None
+        assert await cached(cache, "Do you ship to Lagos?") == "Yes, in 2 days."
+
+        cache.invalidate("biz")
+        assert await cached(cache, "Do you ship to Lagos?") is None
+
+    asyncio.run(run())
+
+
+def test_buckets_keep_the_latest_max_entries():
+    cache = cache_with()
+
+    async def run():
+        await answer(cache, "Do you ship to Lagos?", "Yes.")
+        await answer(cache, "What payment methods do you take?", "Cards and transfers.")
+        await answer(cache, "Is the red hoodie in stock?", "Two left.")
+
+        assert await cached(cache, "Do you ship to Lagos?") is None
+        assert await cached(cache, "What payment methods do you take?") == "Cards and transfers."
+        assert await cached(cache, "Is the red hoodie in stock?") == "Two left."
+
+    asyncio.run(run())
+
+
+def test_answers_relative_to_the_current_time_are_not_cached():
+    cache = cache_with({**VECTORS, "where is your shop": at_angle(45)})
+
+    async def run():
+        # The prompt's Current time tail decides these, not the business data
+        assert await cache.lookup("biz", "sell", "v1", "Are you open now?") is None
+        assert await cache.lookup("biz", "sell", "v1", "Are you still open tonight?") is None
+
+        await answer(cache, "Where is your shop?", "12 Allen Avenue, we close at 6pm today.")
+        assert await cached(cache, "Where is your shop?") is None
+
+    asyncio.run(run())
+
+    assert cache.stats()["uncacheable"] == 3
+    assert cache.stores == 0
+
+
+def test_opening_hours_are_cached_and_counted_on_the_shared_recorder():
+    latency = LatencyRecorder()
+    cache = ResponseCache(
+        FakeEmbeddingClient({"what are your opening hours": at_angle(60)}), CONFIG, latency
+    )
+    hours = "Monday to Friday 9am to 6pm, Saturday 10am to 4pm, closed on Sundays."
+
+    async def run():
+        await answer(cache, "What are your opening hours?", hours)
+        assert await cached(cache, "What are your opening hours?") == hours
+
+        # Editing the schedule invalidates the business through its NOTIFY
+        cache.invalidate("biz")
+        assert await cached(cache, "What are your opening hours?") is None
+
+    asyncio.run(run())
+
+    snapshot = latency.snapshot()
+    assert snapshot["counters"] == {
+        "response_cache_misses": 2,
+        "response_cache_stores": 1,
+        "response_cache_exact_hits": 1,
+    }
+    assert snapshot["stages"]["response_cache_lookup"]["count"] == 3
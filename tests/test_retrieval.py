@@ -0,0 +1,169 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence
+
+from app.services.retrieval import RetrievalService
+
+CONFIG = SimpleNamespace(
+    RETRIEVAL_ENABLED=True,
+    RETRIEVAL_TOP_K=2,
+    RETRIEVAL_CANDIDATES=40,
+    RETRIEVAL_PROBES=10,
+    RETRIEVAL_RRF_K=60,
+    RETRIEVAL_SOURCES_TTL=300,
+)
+
+BOT = SimpleNamespace(id="bot", workspaceId="workspace")
+QUERY = "how do refunds work"
+
+
+def row(chunk_id: str, source_id: str, score: float, metadata: Any = None) -> Dict[str, Any]:
+    return {
+        "id": chunk_id,
+        "sourceId": source_id,
+        "chunkContent": f"content of {chunk_id}",
+        "metadata": metadata,
+        "score": score,
+    }
+
+
+class FakeVectorRepository:
+    def __init__(self, bot_sources: Dict[str, List[str]]):
+        self.bot_sources = bot_sources
+        self.source_loads = 0
+        self.searches: List[Dict[str, Any]] = []
+
+    async def get_bot_source_ids(self, bot_id: str) -> List[str]:
+        self.source_loads += 1
+        return list(self.bot_sources.get(bot_id, []))
+
+    async def hybrid_search(
+        self, workspace_id: str, bot_id: str, embedding: Sequence[float], query: str, **kwargs
+    ) -> List[Dict[str, Any]]:
+        self.searches.append(
+            dict(workspace_id=workspace_id, bot_id=bot_id, embedding=embedding, query=query, **kwargs)
+        )
+        return [row("chunk-b", "refunds", 0.0325, {"page": 2}), row("chunk-a", "hours", 0.0164)]
+
+
+class FakeEmbeddingClient:
+    configured = True
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls: List[str] = []
+
+    async def embed(self, text: str) -> List[float]:
+        self.calls.append(text)
+        if self.fail:
+            raise RuntimeError("embedding provider is down")
+        return [1.0, 0.0]
+
+
+class FakeVectorIndex:
+    def __init__(self, serves: bool, fail: bool = False):
+        self._serves = serves
+        self.fail = fail
+        self.searches: List[FrozenSet[str]] = []
+
+    def serves(self, workspace_id: str) -> bool:
+        return self._serves
+
+    async def search(
+        self, workspace_id: str, embedding: Sequence[float], source_ids: FrozenSet[str], k: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        self.searches.append(source_ids)
+        if self.fail:
+            raise RuntimeError("index file is truncated")
+        return [row("chunk-c", sorted(source_ids)[0], 0.91)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+def service(
+    repo: FakeVectorRepository,
+    index: Optional[FakeVectorIndex] = None,
+    embeddings: Optional[FakeEmbeddingClient] = None,
+) -> RetrievalService:
+    return RetrievalService(
+        repo, embeddings or FakeEmbeddingClient(), index or FakeVectorIndex(serves=False), CONFIG
+    )
+
+
+def test_pgvector_search_gets_the_bot_scope_and_fusion_settings():
+    repo = FakeVectorRepository({"bot": ["refunds", "hours"]})
+    retrieval = service(repo)
+
+    chunks = asyncio.run(retrieval.retrieve(BOT, QUERY))
+
+    (search,) = repo.searches
+    assert search == {
+        "workspace_id": "workspace",
+        "bot_id": "bot",
+        "embedding": [1.0, 0.0],
+        "query": QUERY,
+        "limit": 2,
+        "candidates": 40,
+        "probes": 10,
+        "rrf_k": 60,
+    }
+    # Rows keep the fused order; a missing metadata column becomes {}
+    assert [(chunk.id, chunk.source_id, chunk.metadata) for chunk in chunks] == [
+        ("chunk-b", "refunds", {"page": 2}),
+        ("chunk-a", "hours", {}),
+    ]
+    assert RetrievalService.format_context(chunks) == (
+        "[1] content of chunk-b\n\n[2] content of chunk-a"
+    )
+
+
+def test_hot_index_searches_only_the_bots_sources():
+    repo = FakeVectorRepository({"bot": ["refunds", "hours"], "other": ["catalogue"]})
+    index = FakeVectorIndex(serves=True)
+
+    (chunk,) = asyncio.run(service(repo, index).retrieve(BOT, QUERY))
+
+    assert index.searches == [frozenset({"refunds", "hours"})]
+    assert (chunk.id, chunk.score) == ("chunk-c", 0.91)
+    assert repo.searches == []
+
+
+def test_a_failing_hot_index_falls_back_to_pgvector():
+    repo = FakeVectorRepository({"bot": ["refunds"]})
+    index = FakeVectorIndex(serves=True, fail=True)
+
+    chunks = asyncio.run(service(repo, index).retrieve(BOT, QUERY))
+
+    assert len(index.searches) == 1
+    assert len(repo.searches) == 1
+    assert [chunk.id for chunk in chunks] == ["chunk-b", "chunk-a"]
+
+
+def test_a_failing_embedding_call_returns_no_context():
+    repo = FakeVectorRepository({"bot": ["refunds"]})
+    embeddings = FakeEmbeddingClient(fail=True)
+
+    assert asyncio.run(service(repo, embeddings=embeddings).retrieve(BOT, QUERY)) == []
+    assert repo.searches == []
+
+
+def test_attaching_a_source_is_picked_up_through_the_notification():
+    repo = FakeVectorRepository({})
+    embeddings = FakeEmbeddingClient()
+    retrieval = service(repo, embeddings=embeddings)
+
+    async def run():
+        # A bot without sources is remembered and skips the embedding call
+        assert await retrieval.retrieve(BOT, QUERY) == []
+        assert await retrieval.retrieve(BOT, QUERY) == []
+        assert (repo.source_loads, embeddings.calls) == (1, [])
+
+        repo.bot_sources["bot"] = ["refunds"]
+        retrieval.handle_notification({"table": "bot_sources", "op": "INSERT", "botId": "bot"})
+        return await retrieval.retrieve(BOT, QUERY)
+
+    chunks = asyncio.run(run())
+
+    assert repo.source_loads == 2
+    assert [chunk.id for chunk in chunks] == ["chunk-b", "chunk-a"]
@@ -0,0 +1,168 @@
+"""
+Prefix-stability checks for SellerPromptGenerator: the static prefix (and
+so prefix_hash) must not change from turn to turn or with the order the
+database returns locations and hours in, and BusinessCache must render it
+once per business rather than once per turn.
+
+The render-time comparison is a benchmark; set RUN_BENCHMARKS to run it.
+"""
+import os
+import time
+import random
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.infrastructure.ai.prompts.seller import SellerPromptGenerator
+from app.services.business_cache import BusinessCache
+
+DAYS = ["MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY", "SATURDAY", "SUNDAY"]
+
+
+def business_data(seed: int = 0, description: str = "Shoes and sportswear"):
+    """A business snapshot, with locations and hours in a seeded random order"""
+    rng = random.Random(seed)
+    locations = [
+        SimpleNamespace(
+            id=f"loc-{i}",
+            name=f"Store {i}",
+            isMain=i == 2,
+            address=f"{i} Main Street",
+            city="Lagos",
+            country="Nigeria",
+            phone=f"+23480000000{i}" if i % 2 else None,
+        )
+        for i in range(4)
+    ]
+    hours = [
+        SimpleNamespace(
+            id=f"hours-{location.id}-{day}",
+            locationId=location.id,
+            dayOfWeek=day,
+            openTime="09:00",
+            closeTime="18:00",
+            isClosed=day == "SUNDAY",
+        )
+        for location in locations
+        for day in DAYS
+    ]
+    rng.shuffle(locations)
+    rng.shuffle(hours)
+    return SimpleNamespace(
+        id="biz",
+        name="Kicks",
+        type="retail store",
+        description=description,
+        configurations=SimpleNamespace(
+            currency="NGN",
+            hasDelivery=True,
+            minDeliveryOrderAmount=5000,
+            deliveryFee=1500,
+            acceptsReturns=True,
+            returnPeriod="7 days",
+            hasWarranty=False,
+            warrantyPeriod=None,
+        ),
+        locations=locations,
+        operatingHours=hours,
+    )
+
+
+def generator_for(business, **kwargs) -> SellerPromptGenerator:
+    return SellerPromptGenerator(
+        business=business,
+        config=business.configurations,
+        locations=business.locations,
+        operating_hours=business.operatingHours,
+        **kwargs,
+    )
+
+
+def test_prefix_hash_is_stable_across_turns(monkeypatch):
+    generator = generator_for(business_data(), mode="web")
+    prefix_hash = generator.prefix_hash
+
+    prompts = []
+    for turn, now in enumerate(["Mon Oct 12 2026 10:00:00", "Mon Oct 12 2026 10:05:31"]):
+        monkeypatch.setattr(generator, "_get_current_time", lambda now=now: now)
+        generator.extra_context = f"turn {turn}"
+        prompts.append(generator.generate_prompt())
+
+    static = generator.generate_static_prompt()
+    assert all(prompt.startswith(static) for prompt in prompts)
+    assert prompts[0] != prompts[1]
+    assert generator.prefix_hash == prefix_hash
+
+
+def test_prefix_hash_ignores_row_order():
+    hashes = {generator_for(business_data(seed)).prefix_hash for seed in range(10)}
+
+    assert len(hashes) == 1
+
+
+def test_prefix_hash_follows_business_data_and_mode():
+    base = generator_for(business_data()).prefix_hash
+
+    assert generator_for(business_data(description="Now selling bags")).prefix_hash != base
+    assert generator_for(business_data(), mode="web").prefix_hash != base
+
+
+class CountingBusinessRepository:
+    def __init__(self):
+        self.loads = 0
+
+    async def get_business_data(self, business_id: str):
+        self.loads += 1
+        return business_data(seed=self.loads)
+
+
+def test_business_cache_renders_the_prefix_once(monkeypatch):
+    renders = []
+    render = SellerPromptGenerator._render_static_prompt
+    monkeypatch.setattr(
+        SellerPromptGenerator,
+        "_render_static_prompt",
+        lambda self: renders.append(self) or render(self),
+    )
+    repo = CountingBusinessRepository()
+    cache = BusinessCache(repo, SimpleNamespace(BUSINESS_CACHE_SIZE=8, BUSINESS_CACHE_TTL=60))
+
+    async def turns(count: int):
+        hashes = set()
+        for _ in range(count):
+            prompt, _ = await cache.get_prompt("biz", "whatsapp")
+            generator = await cache.get_prompt_generator("biz", "whatsapp")
+            assert prompt.startswith(generator.generate_static_prompt())
+            hashes.add(generator.prefix_hash)
+        return hashes
+
+    first = asyncio.run(turns(50))
+    assert len(first) == 1
+    assert len(renders) == 1 and repo.loads == 1
+
+    cache.invalidate("biz")
+    # Reloaded rows come back in another order; the prefix is still the same
+    assert asyncio.run(turns(50)) == first
+    assert len(renders) == 2 and repo.loads == 2
+
+
+@pytest.mark.skipif(not os.environ.get("RUN_BENCHMARKS"), reason="RUN_BENCHMARKS is not set")
+def test_prompt_render_benchmark():
+    business = business_data()
+    rounds = 2000
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        generator_for(business).generate_prompt()
+    full = (time.perf_counter() - started) / rounds
+
+    generator = generator_for(business)
+    generator.generate_static_prompt()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        generator.generate_prompt()
+    cached = (time.perf_counter() - started) / rounds
+
+    print(f"full render {full * 1e6:.1f}us, cached prefix {cached * 1e6:.1f}us per turn")
+    assert cached < full
@@ -0,0 +1,204 @@
+"""
+Checks for the SSE helpers in app.api.streaming: coalesce_tokens must keep
+the text and the event order intact while merging token runs, and must
+flush a buffered run when upstream stalls; encode_event must produce one
+`data:` frame per event with or without orjson. A client disconnect must
+close the chat generator feeding the stream right away.
+
+The tokens/sec measurement is a benchmark; set RUN_BENCHMARKS to run it.
+"""
+import os
+import json
+import time
+import asyncio
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List
+
+import pytest
+
+from app.api import streaming
+from app.api.streaming import coalesce_tokens, encode_event
+from app.controllers.chat import ChatController
+from app.core.metrics import LatencyRecorder
+
+
+async def upstream(events: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+    for event in events:
+        await asyncio.sleep(0)
+        yield event
+
+
+async def collect(events: AsyncIterator[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [event async for event in events]
+
+
+def coalesced(events: List[Dict[str, Any]], max_chars: int = 8, max_delay: float = 60):
+    return asyncio.run(collect(coalesce_tokens(upstream(events), max_chars, max_delay)))
+
+
+def test_token_runs_are_merged_up_to_max_chars():
+    tokens = ["Hel", "lo", ", ", "wor", "ld", "! ", "How", " are", " you", "?"]
+
+    frames = coalesced([{"token": token} for token in tokens])
+
+    assert "".join(frame["token"] for frame in frames) == "".join(tokens)
+    assert [len(frame["token"]) for frame in frames] == [10, 11, 5]
+
+
+def test_other_events_flush_the_run_and_keep_their_order():
+    events = [
+        {"token": "Let "},
+        {"token": "me"},
+        {"action": "searching"},
+        {"token": "Found "},
+        {"token": "it"},
+        {"token": "lamp", "messageId": "m1"},
+        {"complete": True},
+    ]
+
+    assert coalesced(events, max_chars=64) == [
+        {"token": "Let me"},
+        {"action": "searching"},
+        {"token": "Found it"},
+        {"token": "lamp", "messageId": "m1"},
+        {"complete": True},
+    ]
+
+
+def test_small_max_chars_passes_events_through():
+    events = [{"token": "a"}, {"token": "b"}, {"complete": True}]
+
+    assert coalesced(events, max_chars=1) == events
+
+
+def test_buffered_run_is_flushed_while_upstream_stalls():
+    released = None
+
+    async def stalling() -> AsyncIterator[Dict[str, Any]]:
+        yield {"token": "Thinking"}
+        yield {"token": "..."}
+        # Only the consumer can end the stall, after it got the buffered text
+        await released.wait()
+        yield {"token": " done"}
+
+    async def run() -> List[Dict[str, Any]]:
+        nonlocal released
+        released = asyncio.Event()
+        frames = []
+        async for frame in coalesce_tokens(stalling(), max_chars=64, max_delay=0.01):
+            frames.append(frame)
+            released.set()
+        return frames
+
+    frames = asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+    assert frames == [{"token": "Thinking..."}, {"token": " done"}]
+
+
+def test_closing_early_cancels_the_pending_read():
+    cancelled = None
+
+    async def endless() -> AsyncIterator[Dict[str, Any]]:
+        nonlocal cancelled
+        yield {"token": "a"}
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    async def run() -> Dict[str, Any]:
+        frames = coalesce_tokens(endless(), max_chars=64, max_delay=0.01)
+        first = await frames.__anext__()
+        await frames.aclose()
+        await asyncio.sleep(0)
+        return first
+
+    assert asyncio.run(asyncio.wait_for(run(), timeout=5)) == {"token": "a"}
+    assert cancelled
+
+
+@pytest.mark.parametrize("max_chars", [1, 64])
+def test_client_disconnect_closes_the_chat_generator(max_chars):
+    closed = []
+    discarded = []
+
+    async def handle_chat(**kwargs: Any) -> AsyncIterator[Dict[str, Any]]:
+        try:
+            yield {"token": "Hello"}
+            # Still waiting on the model when the client goes away
+            await asyncio.sleep(60)
+            yield {"token": " there"}
+        finally:
+            closed.append(kwargs["conversation_id"])
+
+    async def get_bot(bot_id: str) -> Any:
+        return SimpleNamespace(id=bot_id)
+
+    async def get_or_create_conversation(**kwargs: Any) -> Any:
+        return SimpleNamespace(id="conv")
+
+    async def is_disconnected() -> bool:
+        return True
+
+    controller = ChatController.__new__(ChatController)
+    controller.chat_service = SimpleNamespace(
+        handle_chat=handle_chat, suggestions=SimpleNamespace(cancel=lambda conversation_id: None)
+    )
+    controller.chat_repo = SimpleNamespace(get_or_create_conversation=get_or_create_conversation)
+    controller.bot_cache = SimpleNamespace(get_bot=get_bot)
+    controller.context_window = SimpleNamespace(invalidate=lambda conversation_id: None)
+    controller.persister = SimpleNamespace(
+        discard_latest=lambda conversation_id, role: discarded.append(role) or True
+    )
+    controller.config = SimpleNamespace(
+        STREAM_COALESCE_CHARS=max_chars, STREAM_COALESCE_INTERVAL=0.01
+    )
+    controller.latency = LatencyRecorder(enabled=False)
+    request = SimpleNamespace(is_disconnected=is_disconnected)
+
+    async def run() -> List[bytes]:
+        stream = await controller.handle_prompt(
+            "bot", "conv", SimpleNamespace(prompt="Hi"), request, None
+        )
+        frames = [frame async for frame in stream]
+        # Closed by the stream itself, not later by the event loop's finalizer
+        assert closed == ["conv"]
+        return frames
+
+    assert asyncio.run(asyncio.wait_for(run(), timeout=5)) == []
+    assert discarded == ["user"]
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_encode_event_frames(monkeypatch, use_orjson):
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(streaming, "orjson", None)
+    event = {"token": "Größe: 42 €", "messageId": "m1"}
+
+    frame = encode_event(event)
+
+    assert frame.startswith(b"data: ") and frame.endswith(b"\n\n")
+    assert frame.count(b"\n\n") == 1
+    assert json.loads(frame[len(b"data: ") : -2]) == event
+
+
+@pytest.mark.skipif(not os.environ.get("RUN_BENCHMARKS"), reason="RUN_BENCHMARKS is not set")
+def test_coalesce_and_encode_benchmark():
+    tokens = [{"token": word} for word in ("lorem ", "ipsum ", "dolor ", "sit ", "amet, ") * 40_000]
+
+    async def run() -> int:
+        frames = 0
+        async for event in coalesce_tokens(upstream(tokens), max_chars=24, max_delay=0.05):
+            encode_event(event)
+            frames += 1
+        return frames
+
+    started = time.perf_counter()
+    frames = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(tokens) / elapsed:.0f} tokens/s, {len(tokens) / frames:.1f} tokens per frame")
+    assert frames < len(tokens) / 3
@@ -0,0 +1,97 @@
+import asyncio
+from types import SimpleNamespace
+from typing import List
+
+from app.core.metrics import LatencyRecorder
+from app.domain.interfaces import Message
+from app.services import chat as chat_module
+from app.services.chat import ChatService
+from app.services.suggestions import SuggestionService
+
+OPENING = [Message(role="user", content="hi"), Message(role="assistant", content="Hello!")]
+
+
+def test_cached_suggestions_are_scoped_to_bot_and_prompt():
+    service = SuggestionService()
+    calls: List[str] = []
+
+    def generator(label: str):
+        async def generate(messages: List[Message]) -> List[str]:
+            calls.append(label)
+            return [f"suggestion from {label}"]
+
+        return generate
+
+    def start(conversation_id: str, label: str, scope: str, prompt_version: str):
+        return service.start(
+            conversation_id, OPENING, generator(label), scope=scope, prompt_version=prompt_version
+        )
+
+    async def run():
+        first = await start("conv-1", "a", "bot-a", "shop A")
+        same_bot = await start("conv-2", "a2", "bot-a", "shop A")
+        other_bot = await start("conv-3", "b", "bot-b", "shop A")
+        other_prompt = await start("conv-4", "c", "bot-a", "shop C")
+        return first, same_bot, other_bot, other_prompt
+
+    first, same_bot, other_bot, other_prompt = asyncio.run(run())
+
+    assert first == same_bot == ["suggestion from a"]
+    assert other_bot == ["suggestion from b"]
+    assert other_prompt == ["suggestion from c"]
+    assert calls == ["a", "b", "c"]
+
+
+class TickingPromptGenerator:
+    """A seller prompt whose `Current time` tail changes on every render"""
+
+    prefix_hash = "prefix-v1"
+
+    def __init__(self):
+        self.renders = 0
+
+    def generate_prompt(self) -> str:
+        self.renders += 1
+        return f"Shop rules\nCurrent time: 10:00:{self.renders:02d}"
+
+
+def test_suggestions_are_reused_across_renders_of_the_same_prompt(monkeypatch):
+    prompt_generator = TickingPromptGenerator()
+    prompts: List[str] = []
+
+    async def get_prompt_generator(business_id, mode):
+        return prompt_generator
+
+    class FakeCloudflareProvider:
+        def __init__(self, client, model):
+            pass
+
+        async def generate_suggestions(self, messages, system_prompt):
+            prompts.append(system_prompt)
+            return ["Do you deliver?"]
+
+    async def get_client(**kwargs):
+        return None
+
+    monkeypatch.setattr(chat_module, "CloudflareProvider", FakeCloudflareProvider)
+    service = ChatService.__new__(ChatService)
+    service.business_cache = SimpleNamespace(get_prompt_generator=get_prompt_generator)
+    service.client_registry = SimpleNamespace(get_client=get_client)
+    service.suggestions = SuggestionService()
+    service.latency = LatencyRecorder(enabled=False)
+    bot = SimpleNamespace(id="bot", businessId="biz")
+    history = OPENING * 2
+
+    async def run():
+        results = []
+        for conversation_id in ("conv-1", "conv-2"):
+            system_prompt, prompt_version = await service._get_system_prompt(bot, None)
+            task = service._start_question_suggestions(
+                bot, conversation_id, history, system_prompt, prompt_version
+            )
+            results.append(await task)
+        return results
+
+    assert asyncio.run(run()) == [["Do you deliver?"], ["Do you deliver?"]]
+    assert prompt_generator.renders == 2
+    assert len(prompts) == 1
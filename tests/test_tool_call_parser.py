@@ -0,0 +1,254 @@
+"""
+Fuzz and throughput checks for ToolCallStreamParser: random splits of
+generated completions must parse exactly like a regex over the whole text,
+native `tool_calls` deltas must come out as one call per index, and each
+token may rescan at most a partial tag of the text fed before it.
+
+The tokens/sec measurement is a benchmark; set RUN_BENCHMARKS to run it.
+"""
+import os
+import re
+import json
+import time
+import random
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from app.domain.interfaces import StreamResponseType, ToolCall
+from app.infrastructure.ai.providers.openai import OpenAIProvider
+from app.infrastructure.ai.tools.parser import (
+    CLOSE_TAG,
+    OPEN_TAG,
+    ToolCallStreamParser,
+    parse_tool_call,
+)
+
+TOOL_CALL_PATTERN = re.compile(re.escape(OPEN_TAG) + r"(.*?)" + re.escape(CLOSE_TAG), re.DOTALL)
+
+# Text that keeps running into tag prefixes without completing one
+TEXT_PIECES = ["Sure", ", ", "the ", "price", " is ", "<", "</", "<tool", "<tool_", "call", ">", "\n", "€12"]
+TOOL_NAMES = ["search_products", "check_product_availability", "get_locations", "get_delivery_info"]
+
+
+def reference(stream: str) -> Tuple[str, List[ToolCall]]:
+    """Text and tool calls of a complete stream, by regex over the whole string"""
+    calls = [parse_tool_call(match.strip()) for match in TOOL_CALL_PATTERN.findall(stream)]
+    return TOOL_CALL_PATTERN.sub("", stream), calls
+
+
+def random_text(rng: random.Random) -> str:
+    text = "".join(rng.choice(TEXT_PIECES) for _ in range(rng.randint(0, 12)))
+    # Generated pieces can spell a whole opening tag; keep those for the calls
+    return text.replace(OPEN_TAG, "<tool call>")
+
+
+def random_call(rng: random.Random) -> str:
+    arguments: Dict[str, Any] = {"query": rng.choice(["shoes", "red < blue", "a/b", ""])}
+    if rng.random() < 0.5:
+        arguments["quantity"] = rng.randint(1, 5)
+    payload = json.dumps({"name": rng.choice(TOOL_NAMES), "arguments": arguments})
+    padding = rng.choice(["", " ", "\n"])
+    return f"{OPEN_TAG}{padding}{payload}{padding}{CLOSE_TAG}"
+
+
+def random_stream(rng: random.Random) -> str:
+    parts = [random_text(rng)]
+    for _ in range(rng.randint(0, 4)):
+        parts.append(random_call(rng))
+        parts.append(random_text(rng))
+    return "".join(parts)
+
+
+def random_split(rng: random.Random, text: str) -> List[str]:
+    cuts = []
+    if len(text) > 1:
+        cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(0, 40))))
+    bounds = [0, *cuts, len(text)]
+    return [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def run_parser(tokens: List[str]) -> Tuple[str, List[ToolCall], ToolCallStreamParser]:
+    parser = ToolCallStreamParser()
+    events = []
+    for token in tokens:
+        events.extend(parser.feed(token))
+    events.extend(parser.finish())
+    text = "".join(event.content for event in events if event.type == StreamResponseType.TOKEN)
+    calls = [event.tool_call for event in events if event.type == StreamResponseType.TOOL_CALL]
+    return text, calls, parser
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_splits_match_regex_reference(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        stream = random_stream(rng)
+        expected_text, expected_calls = reference(stream)
+
+        text, calls, parser = run_parser(random_split(rng, stream))
+
+        assert text == expected_text, stream
+        assert calls == expected_calls, stream
+        assert parser.tool_calls == expected_calls
+
+
+def test_single_character_tokens():
+    stream = f"One{random_call(random.Random(1))}two{random_call(random.Random(2))}three"
+    expected_text, expected_calls = reference(stream)
+
+    text, calls, _ = run_parser(list(stream))
+
+    assert text == expected_text == "Onetwothree"
+    assert calls == expected_calls
+    assert len(calls) == 2
+
+
+def test_several_calls_in_one_token():
+    stream = (
+        f'{OPEN_TAG}{{"name": "get_locations", "arguments": {{}}}}{CLOSE_TAG}'
+        f'{OPEN_TAG}{{"name": "search_products", "arguments": {{"query": "tea"}}}}{CLOSE_TAG}'
+        f'{OPEN_TAG}{{"name": "get_delivery_info", "arguments": "{{\\"city\\": \\"Oslo\\"}}"}}{CLOSE_TAG}'
+    )
+
+    text, calls, _ = run_parser([stream])
+
+    assert text == ""
+    assert calls == [
+        ToolCall(name="get_locations", arguments={}),
+        ToolCall(name="search_products", arguments={"query": "tea"}),
+        ToolCall(name="get_delivery_info", arguments={"city": "Oslo"}),
+    ]
+
+
+def test_text_is_released_before_the_tag_completes():
+    parser = ToolCallStreamParser()
+
+    assert [event.content for event in parser.feed("Price: <to")] == ["Price: "]
+    assert parser.feed("ol_call>{") == []
+    assert parser.collecting
+
+
+def test_unterminated_tool_call_fails_on_finish():
+    parser = ToolCallStreamParser()
+    events = parser.feed('Checking <tool_call>{"name": "get_locations"')
+
+    assert [event.content for event in events] == ["Checking "]
+    with pytest.raises(ValueError, match="Unterminated tool call"):
+        parser.finish()
+
+
+def test_partial_open_tag_at_end_is_text():
+    text, calls, _ = run_parser(["See you ", "<tool"])
+
+    assert text == "See you <tool"
+    assert calls == []
+
+
+def test_lenient_repair_of_python_reprs():
+    stream = f"{OPEN_TAG}{{'name': 'search_products', 'arguments': {{'query': 'mug', 'category': None}}}}{CLOSE_TAG}"
+
+    _, calls, _ = run_parser(random_split(random.Random(3), stream))
+
+    assert calls == [ToolCall(name="search_products", arguments={"query": "mug", "category": None})]
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        "not json",
+        '["search_products"]',
+        '{"arguments": {"query": "mug"}}',
+        '{"name": "search_products", "arguments": "{broken"}',
+    ],
+)
+def test_invalid_tool_calls_raise(payload):
+    parser = ToolCallStreamParser()
+    with pytest.raises(ValueError):
+        parser.feed(f"{OPEN_TAG}{payload}{CLOSE_TAG}")
+
+
+def _chunk(content=None, tool_calls=None, finish_reason=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)])
+
+
+def _delta(index, name=None, arguments=None):
+    return SimpleNamespace(index=index, function=SimpleNamespace(name=name, arguments=arguments))
+
+
+async def _collect(chunks) -> List[Any]:
+    async def completion():
+        for chunk in chunks:
+            yield chunk
+
+    provider = OpenAIProvider(client=None, model="test-model")
+    return [response async for response in provider.stream(completion())]
+
+
+def test_native_tool_call_deltas_yield_one_call_per_index():
+    chunks = [
+        _chunk(content="Let me check"),
+        _chunk(tool_calls=[_delta(0, name="search_products", arguments='{"que')]),
+        _chunk(tool_calls=[_delta(1, name="get_locations", arguments="")]),
+        _chunk(tool_calls=[_delta(0, arguments='ry": "la'), _delta(1, arguments="{}")]),
+        _chunk(tool_calls=[_delta(0, arguments='mp"}')]),
+        _chunk(finish_reason="tool_calls"),
+    ]
+
+    responses = asyncio.run(_collect(chunks))
+
+    assert [(response.type, response.content) for response in responses[:1]] == [
+        (StreamResponseType.TOKEN, "Let me check")
+    ]
+    assert [response.tool_call for response in responses[1:]] == [
+        ToolCall(name="search_products", arguments={"query": "lamp"}),
+        ToolCall(name="get_locations", arguments={}),
+    ]
+
+    # The chat service records native calls on the same parser as tagged ones
+    parser = ToolCallStreamParser()
+    for response in responses:
+        if response.type == StreamResponseType.TOOL_CALL:
+            parser.add(response.tool_call)
+    assert [call.name for call in parser.tool_calls] == ["search_products", "get_locations"]
+
+
+def test_parser_scans_each_character_a_bounded_number_of_times():
+    rng = random.Random(0)
+    stream = "".join(random_stream(rng) for _ in range(2000))
+    tokens = [stream[i : i + 4] for i in range(0, len(stream), 4)]
+
+    parser = ToolCallStreamParser()
+    calls = []
+    scanned = held = 0
+    for token in tokens:
+        # feed() scans the held-back tail plus the new token, nothing older
+        held = max(held, len(parser._buffer))
+        scanned += len(parser._buffer) + len(token)
+        calls.extend(
+            event.tool_call
+            for event in parser.feed(token)
+            if event.type == StreamResponseType.TOOL_CALL
+        )
+    parser.finish()
+
+    assert calls == reference(stream)[1]
+    assert held < len(CLOSE_TAG)
+    assert scanned <= len(stream) + len(tokens) * (len(CLOSE_TAG) - 1)
+
+
+@pytest.mark.skipif(not os.environ.get("RUN_BENCHMARKS"), reason="RUN_BENCHMARKS is not set")
+def test_parser_throughput_benchmark():
+    rng = random.Random(0)
+    stream = "".join(random_stream(rng) for _ in range(2000))
+    tokens = [stream[i : i + 4] for i in range(0, len(stream), 4)]
+
+    started = time.perf_counter()
+    _, calls, _ = run_parser(tokens)
+    elapsed = time.perf_counter() - started
+
+    assert calls == reference(stream)[1]
+    print(f"{len(tokens) / elapsed:.0f} tokens/s")
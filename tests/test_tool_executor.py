@@ -0,0 +1,123 @@
+import json
+import time
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from app.core.metrics import LatencyRecorder
+from app.domain.interfaces import ToolCall
+from app.infrastructure.ai.tools.executor import NO_RESULTS, ToolExecutor
+from app.services.chat import ChatService, ChatTurn
+
+
+def executor(timeout: float = 1.0, max_result_chars: int = 200, **functions) -> ToolExecutor:
+    return ToolExecutor(functions, timeout=timeout, max_result_chars=max_result_chars)
+
+
+def run(tool_executor: ToolExecutor, *calls: ToolCall):
+    return asyncio.run(tool_executor.run(list(calls)))
+
+
+async def search_products(query: str) -> List[Dict[str, Any]]:
+    return [{"name": f"{query} {i}", "price": 10 * i} for i in range(3)]
+
+
+def test_results_are_serialized_and_empty_results_say_so():
+    async def nothing(**kwargs: Any) -> List[Any]:
+        return []
+
+    (found, empty) = run(
+        executor(search_products=search_products, get_category_counts=nothing),
+        ToolCall("search_products", {"query": "hoodie"}),
+        ToolCall("get_category_counts", {}),
+    )
+
+    assert not found.failed and json.loads(found.content)[0] == {"name": "hoodie 0", "price": 0}
+    assert (empty.content, empty.failed) == (NO_RESULTS, False)
+
+
+def test_long_lists_drop_whole_rows_and_other_results_are_cut():
+    rows = [{"name": f"product {i}", "description": "x" * 40} for i in range(10)]
+
+    async def many() -> List[Dict[str, Any]]:
+        return rows
+
+    async def text() -> str:
+        return "y" * 500
+
+    (listed, cut) = run(
+        executor(many=many, text=text, max_result_chars=200),
+        ToolCall("many", {}),
+        ToolCall("text", {}),
+    )
+
+    kept, note = listed.content.split("\n")
+    assert len(kept) <= 200
+    assert json.loads(kept) == rows[: len(json.loads(kept))]
+    assert note == f"({len(rows) - len(json.loads(kept))} more results omitted)"
+    assert cut.content == "y" * 200 + "... (truncated)"
+
+
+def test_failures_become_error_results_next_to_their_siblings():
+    async def broken(query: str) -> None:
+        raise ValueError("connection reset")
+
+    results = run(
+        executor(search_products=search_products, broken=broken),
+        ToolCall("broken", {"query": "hoodie"}),
+        ToolCall("check_availability", {"id": "p1"}),
+        ToolCall("search_products", {"query": "hoodie"}),
+        # Arguments the function doesn't accept fail the call, not the turn
+        ToolCall("search_products", {"q": "hoodie"}),
+    )
+
+    assert [result.failed for result in results] == [True, True, False, True]
+    assert results[0].content == "broken failed: connection reset"
+    assert results[1].content == "Unknown function: check_availability"
+    assert results[3].content.startswith("search_products failed: ")
+
+
+def test_each_call_has_its_own_timeout_and_calls_run_concurrently():
+    async def slow(seconds: float) -> str:
+        await asyncio.sleep(seconds)
+        return f"slept {seconds}"
+
+    started = time.perf_counter()
+    results = run(
+        executor(slow=slow, timeout=0.3),
+        ToolCall("slow", {"seconds": 0.2}),
+        ToolCall("slow", {"seconds": 5}),
+        ToolCall("slow", {"seconds": 0.2}),
+        ToolCall("slow", {"seconds": 0.2}),
+    )
+    elapsed = time.perf_counter() - started
+
+    # Results keep the order of the calls; only the hung one timed out
+    assert [result.content for result in results] == [
+        "slept 0.2",
+        "slow timed out, try again later.",
+        "slept 0.2",
+        "slept 0.2",
+    ]
+    assert [result.failed for result in results] == [False, True, False, False]
+    assert [result.tool_call.arguments["seconds"] for result in results] == [0.2, 5, 0.2, 0.2]
+    # Gathered: bounded by the timeout, not the sum of the calls
+    assert elapsed < 1.0
+
+
+def test_calls_refused_at_the_depth_limit_are_not_counted_as_followups():
+    service = ChatService.__new__(ChatService)
+    service.latency = LatencyRecorder()
+    turn = ChatTurn(
+        bot=SimpleNamespace(id="bot"),
+        conversation_id="conv",
+        chat_request=None,
+        depth=ChatService.MAX_RECURSION_DEPTH,
+    )
+
+    async def respond() -> List[Dict[str, Any]]:
+        calls = [ToolCall("search_products", {"query": "hoodie"})]
+        return [event async for event in service._handle_tool_response(turn, calls)]
+
+    assert asyncio.run(respond()) == [{"warning": "Maximum tool call recursion depth reached"}]
+    assert service.latency.snapshot()["counters"] == {}
@@ -0,0 +1,256 @@
+"""
+Recall and freshness checks for the FAISS hot index (VectorIndexManager)
+against exact cosine search over the same rows, served from an in-memory
+stand-in for VectorRepository. Needs faiss-cpu and numpy.
+
+The latency comparison with exact search is a benchmark; set
+RUN_BENCHMARKS to run it.
+"""
+import os
+import json
+import time
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, FrozenSet, List, Optional
+
+import pytest
+
+faiss = pytest.importorskip("faiss")
+np = pytest.importorskip("numpy")
+
+from app.services.vector_index import VectorIndexManager  # noqa: E402
+
+DIMENSIONS = 64
+SOURCES = [f"source-{i}" for i in range(8)]
+WORKSPACE = "workspace"
+EPOCH = datetime(2026, 1, 1)
+
+
+def timestamp(value: datetime) -> str:
+    """`updatedAt` as returned for a timestamp(3) column"""
+    return value.isoformat(timespec="milliseconds")
+
+
+class InMemoryVectorRepository:
+    """The keyset-paged slice of VectorRepository used by the hot index"""
+
+    def __init__(self, embeddings: Any):
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.clock = 0
+        for embedding in embeddings:
+            self.put(f"chunk-{len(self.rows):06d}", embedding)
+
+    def put(self, chunk_id: str, embedding: Any, updated_at: Optional[str] = None) -> None:
+        """Commit a row stamped `updated_at`, by default 1ms after the previous one"""
+        self.clock += 1
+        self.rows[chunk_id] = {
+            "id": chunk_id,
+            "sourceId": SOURCES[int(chunk_id.rsplit("-", 1)[1]) % len(SOURCES)],
+            "chunkContent": f"content of {chunk_id}",
+            "metadata": {},
+            "embedding": json.dumps([float(value) for value in embedding]),
+            "updatedAt": updated_at or timestamp(EPOCH + timedelta(milliseconds=self.clock)),
+        }
+
+    async def get_vectors_since(
+        self,
+        workspace_id: str,
+        updated_at: Optional[str],
+        last_id: str,
+        limit: int,
+        overlap: float = 0,
+    ) -> List[Dict[str, Any]]:
+        rows = sorted(self.rows.values(), key=lambda row: (row["updatedAt"], row["id"]))
+        if updated_at is not None:
+            since = timestamp(datetime.fromisoformat(updated_at) - timedelta(seconds=overlap))
+            rows = [row for row in rows if (row["updatedAt"], row["id"]) > (since, last_id)]
+        return rows[:limit]
+
+    async def get_vector_ids(self, workspace_id: str) -> List[str]:
+        return list(self.rows)
+
+
+def clustered(rng: Any, count: int, centres: Any) -> Any:
+    """Embeddings grouped around `centres`, like chunks of related documents"""
+    picks = rng.integers(0, len(centres), count)
+    return centres[picks] + rng.standard_normal((count, DIMENSIONS))
+
+
+def centres(rng: Any, clusters: int = 64) -> Any:
+    return rng.standard_normal((clusters, DIMENSIONS))
+
+
+def manager_for(repo: InMemoryVectorRepository, directory: str, **overrides) -> VectorIndexManager:
+    settings = dict(
+        FAISS_ENABLED=True,
+        FAISS_WORKSPACES="",
+        FAISS_INDEX_DIR=directory,
+        FAISS_CACHE_SIZE=4,
+        FAISS_IVF_MIN_ROWS=5000,
+        FAISS_SYNC_INTERVAL=3600,
+        FAISS_SYNC_OVERLAP=60,
+        FAISS_DELTA_LIMIT=5000,
+        FAISS_REBUILD_INTERVAL=3600,
+        EMBEDDING_DIMENSIONS=DIMENSIONS,
+        RETRIEVAL_PROBES=10,
+    )
+    settings.update(overrides)
+    return VectorIndexManager(repo, SimpleNamespace(**settings))
+
+
+class ExactSearch:
+    """Brute-force cosine search over the repository rows of some sources"""
+
+    def __init__(self, repo: InMemoryVectorRepository, source_ids: FrozenSet[str]):
+        rows = [row for row in repo.rows.values() if row["sourceId"] in source_ids]
+        self.ids = [row["id"] for row in rows]
+        self.vectors = np.array([json.loads(row["embedding"]) for row in rows], dtype="float32")
+        self.vectors /= np.linalg.norm(self.vectors, axis=1, keepdims=True)
+
+    def top_k(self, query: Any, k: int) -> List[str]:
+        scores = self.vectors @ query.astype("float32")
+        return [self.ids[position] for position in np.argsort(-scores)[:k]]
+
+
+def recall_at_k(manager, repo, queries, k: int, source_ids: FrozenSet[str]) -> float:
+    exact = ExactSearch(repo, source_ids)
+
+    async def run() -> float:
+        found = 0
+        for query in queries:
+            results = await manager.search(WORKSPACE, query.tolist(), source_ids, k)
+            assert all(result["sourceId"] in source_ids for result in results)
+            expected = set(exact.top_k(query, k))
+            found += len(expected & {result["id"] for result in results})
+        return found / (k * len(queries))
+
+    return asyncio.run(run())
+
+
+def test_ivf_recall_against_exact_search(tmp_path):
+    rng = np.random.default_rng(0)
+    topics = centres(rng)
+    repo = InMemoryVectorRepository(clustered(rng, 20_000, topics))
+    manager = manager_for(repo, str(tmp_path))
+    queries = clustered(rng, 50, topics)
+
+    all_sources = frozenset(SOURCES)
+    some_sources = frozenset(SOURCES[:2])
+
+    assert recall_at_k(manager, repo, queries, 10, all_sources) >= 0.95
+    assert recall_at_k(manager, repo, queries, 10, some_sources) >= 0.95
+
+
+def test_updates_and_deletions_are_served_after_sync(tmp_path):
+    rng = np.random.default_rng(1)
+    repo = InMemoryVectorRepository(clustered(rng, 2_000, centres(rng)))
+    manager = manager_for(repo, str(tmp_path))
+    sources = frozenset(SOURCES)
+    query = rng.standard_normal(DIMENSIONS)
+
+    async def run():
+        await manager.search(WORKSPACE, query.tolist(), sources, 5)
+        index = manager._indexes.get(WORKSPACE)
+
+        exact = ExactSearch(repo, sources)
+        moved, deleted = exact.top_k(-query, 1)[0], exact.top_k(query, 1)[0]
+        repo.put(moved, query)
+        del repo.rows[deleted]
+        await manager._sync(WORKSPACE, index)
+
+        results = await manager.search(WORKSPACE, query.tolist(), sources, 5)
+        return moved, deleted, [result["id"] for result in results]
+
+    moved, deleted, ids = asyncio.run(run())
+
+    assert ids[0] == moved
+    assert deleted not in ids
+    assert len(manager._indexes.get(WORKSPACE)) == len(repo.rows)
+
+
+def test_rows_committed_behind_the_watermark_are_picked_up(tmp_path):
+    rng = np.random.default_rng(4)
+    repo = InMemoryVectorRepository(clustered(rng, 1_000, centres(rng)))
+    manager = manager_for(repo, str(tmp_path))
+    sources = frozenset(SOURCES)
+    query = rng.standard_normal(DIMENSIONS)
+
+    async def run():
+        await manager.search(WORKSPACE, query.tolist(), sources, 5)
+        index = manager._indexes.get(WORKSPACE)
+        watermark = datetime.fromisoformat(index.watermark[0])
+
+        # A transaction that started 5s before the newest mirrored row commits
+        # its chunk after the index synced, while another deletes a row: the
+        # row count behind the watermark is unchanged
+        late = "chunk-late-000001"
+        repo.put(late, query, updated_at=timestamp(watermark - timedelta(seconds=5)))
+        deleted = ExactSearch(repo, sources).top_k(query, 2)[1]
+        del repo.rows[deleted]
+        await manager._sync(WORKSPACE, index)
+
+        results = await manager.search(WORKSPACE, query.tolist(), sources, 5)
+        delta = dict(index.delta)
+        # Re-reading the overlap again changes nothing
+        await manager._sync(WORKSPACE, index)
+        return late, deleted, [result["id"] for result in results], delta, index
+
+    late, deleted, ids, delta, index = asyncio.run(run())
+
+    assert ids[0] == late
+    assert deleted not in ids
+    # Rows re-read from the overlap that the snapshot already holds are skipped
+    assert list(delta) == [late]
+    assert index.delta == delta
+    assert index.ids() == set(repo.rows)
+
+
+def test_other_workers_map_the_saved_snapshot(tmp_path):
+    rng = np.random.default_rng(2)
+    repo = InMemoryVectorRepository(clustered(rng, 1_000, centres(rng)))
+    query = rng.standard_normal(DIMENSIONS).tolist()
+    sources = frozenset(SOURCES)
+
+    first, second = manager_for(repo, str(tmp_path)), manager_for(repo, str(tmp_path))
+    results = [
+        asyncio.run(manager.search(WORKSPACE, query, sources, 5)) for manager in (first, second)
+    ]
+
+    assert results[0] == results[1]
+    assert second._indexes.get(WORKSPACE).version == first._indexes.get(WORKSPACE).version
+
+
+@pytest.mark.skipif(not os.environ.get("RUN_BENCHMARKS"), reason="RUN_BENCHMARKS is not set")
+def test_search_latency_benchmark(tmp_path):
+    rng = np.random.default_rng(3)
+    topics = centres(rng, 256)
+    repo = InMemoryVectorRepository(clustered(rng, 100_000, topics))
+    manager = manager_for(repo, str(tmp_path))
+    sources = frozenset(SOURCES[:4])
+    queries = clustered(rng, 200, topics)
+
+    started = time.perf_counter()
+    asyncio.run(manager.search(WORKSPACE, queries[0].tolist(), sources, 10))
+    print(f"build: {time.perf_counter() - started:.2f}s for {len(repo.rows)} chunks")
+
+    index = manager._indexes.get(WORKSPACE)
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        manager._search(index, query.tolist(), sources, 10)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+
+    exact_search = ExactSearch(repo, sources)
+    started = time.perf_counter()
+    for query in queries:
+        exact_search.top_k(query, 10)
+    exact = (time.perf_counter() - started) / len(queries)
+
+    recall = recall_at_k(manager, repo, queries[:50], 10, sources)
+    print(
+        f"hot index p50 {timings[len(timings) // 2] * 1000:.2f}ms, "
+        f"p95 {timings[int(len(timings) * 0.95)] * 1000:.2f}ms, "
+        f"exact {exact * 1000:.2f}ms, recall@10 {recall:.3f}"
+    )